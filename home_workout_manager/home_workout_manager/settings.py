@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project
@@ -33,8 +34,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'workout_app.memo.RequestMemoMiddleware',
 ]
 
+# Opt-in SQL instrumentation: flags N+1 query patterns and per-view query budget overruns
+if os.environ.get('QUERY_BUDGET_MIDDLEWARE'):
+    MIDDLEWARE.append('workout_app.middleware.QueryBudgetMiddleware')
+
+QUERY_BUDGET = {
+    'DEFAULT_BUDGET': None,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'RAISE': False,
+    'HEADERS': DEBUG,
+}
+
 ROOT_URLCONF = 'home_workout_manager.urls'
 
 TEMPLATES = [
@@ -67,6 +80,51 @@ DATABASES = {
     }
 }
 
+# Cache configuration
+# Pick the backend with the CACHE_BACKEND environment variable ('file', 'db' or
+# 'locmem'). The database backend needs `python manage.py createcachetable`.
+# The test runner always uses the in-memory backend.
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'workout_app_cache',
+    },
+}
+
+TESTING = sys.argv[1:2] == ['test']
+
+CACHES = {
+    'default': CACHE_BACKENDS['locmem' if TESTING else os.environ.get('CACHE_BACKEND', 'file')],
+}
+
+STATS_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+# Database-backed job queue (workout_app.jobs). Jobs are run by the
+# run_background_jobs worker, or in process when EAGER is enabled.
+BACKGROUND_JOBS = {
+    'EAGER': os.environ.get('BACKGROUND_JOBS_EAGER', '1' if DEBUG else '0') == '1',
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 30,
+    'POLL_INTERVAL': 2,
+}
+
+# Resized WebP/JPEG copies of uploaded images (workout_app.images)
+IMAGE_VARIANTS = {
+    'WIDTHS': [160, 320, 640, 960],
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
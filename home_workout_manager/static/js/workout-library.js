@@ -332,6 +332,44 @@ const WorkoutManager = (function() {
         });
     }
 
+    /**
+     * Loads a chart's data from the URL in the canvas' data-chart-url attribute
+     * once the canvas scrolls into view, then draws it with initChart
+     * @param {string} elementId - ID of the canvas element
+     * @param {function} buildChart - Turns the JSON payload into the chart type and data
+     * @param {Object} options - Chart options
+     * @returns {Promise} Resolves with the chart instance, or null
+     */
+    function loadChart(elementId, buildChart, options = {}) {
+        const element = document.getElementById(elementId);
+        if (!element || !element.dataset.chartUrl) return Promise.resolve(null);
+        
+        const draw = () => fetch(element.dataset.chartUrl, {
+            headers: {'X-Requested-With': 'XMLHttpRequest'}
+        })
+            .then(response => {
+                if (!response.ok) throw new Error(`Chart request failed with status ${response.status}`);
+                return response.json();
+            })
+            .then(payload => initChart(elementId, buildChart(payload), options))
+            .catch(error => {
+                console.error('Error loading chart:', error);
+                return null;
+            });
+        
+        if (!('IntersectionObserver' in window)) return draw();
+        
+        return new Promise(resolve => {
+            const observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    observer.disconnect();
+                    resolve(draw());
+                }
+            }, {rootMargin: '200px'});
+            observer.observe(element);
+        });
+    }
+
     /**
      * Shows a confirmation dialog
      * @param {string} message - Confirmation message
@@ -524,6 +562,7 @@ const WorkoutManager = (function() {
         makeDroppable,
         playSound,
         initChart,
+        loadChart,
         confirmAction
     };
 })();
@@ -6,7 +6,11 @@ from .models import (
     WorkoutExercise,
     WorkoutLog,
     ExerciseLog,
-    UserProfile
+    ExerciseSet,
+    DailyActivity,
+    DailyExerciseActivity,
+    UserProfile,
+    BackgroundJob
 )
 
 admin.site.register(Exercise)
@@ -15,4 +19,8 @@ admin.site.register(WorkoutDay)
 admin.site.register(WorkoutExercise)
 admin.site.register(WorkoutLog)
 admin.site.register(ExerciseLog)
-admin.site.register(UserProfile)
\ No newline at end of file
+admin.site.register(ExerciseSet)
+admin.site.register(DailyActivity)
+admin.site.register(DailyExerciseActivity)
+admin.site.register(UserProfile)
+admin.site.register(BackgroundJob)
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkoutAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "workout_app"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import tasks  # noqa: F401
@@ -0,0 +1,188 @@
+"""
+Benchmark Harness
+-----------------
+Times the statistics and progress code paths against the current database.
+Features include:
+- Wall time (median, min, max) and query count per benchmark
+- Direct calls into workout_utils and full requests through the main views
+- JSON reports that can be compared against an earlier run
+
+Caches are cleared before every repetition unless warm runs are requested,
+so results measure the database work rather than cache hits.
+"""
+
+import datetime
+import platform
+import statistics
+import time
+
+import django
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from .models import ExerciseLog, WorkoutDay
+from .testing import record_queries
+from .workout_utils import (
+    get_user_stats,
+    calculate_streak,
+    get_exercise_progress,
+    suggest_workout,
+    get_progress_summary,
+    get_workout_history_page
+)
+
+VIEW_BENCHMARKS = [
+    ('dashboard', []),
+    ('workout_plans', []),
+    ('progress', []),
+    ('workout_history', []),
+    ('advanced_stats', []),
+    ('exercise_library', []),
+]
+
+
+def get_function_benchmarks(user):
+    """
+    Build the workout_utils benchmarks for a user.
+
+    Args:
+        user: The User object the benchmarks run as
+
+    Returns:
+        list: (name, callable) pairs
+    """
+    # Benchmark progress on the user's most logged exercise
+    top_exercise = ExerciseLog.objects.filter(workout_log__user=user).values('exercise_id').annotate(
+        count=Count('id')
+    ).order_by('-count').values_list('exercise_id', flat=True).first()
+
+    benchmarks = [
+        ('get_user_stats(30)', lambda: get_user_stats(user, days=30)),
+        ('get_user_stats(365)', lambda: get_user_stats(user, days=365)),
+        ('calculate_streak', lambda: calculate_streak(user)),
+        ('suggest_workout', lambda: suggest_workout(user)),
+        ('get_progress_summary', lambda: get_progress_summary(user)),
+        ('get_workout_history_page', lambda: get_workout_history_page(user)),
+    ]
+    if top_exercise is not None:
+        benchmarks += [
+            ('get_exercise_progress(90)', lambda: get_exercise_progress(user, top_exercise, days=90)),
+            ('get_exercise_progress(730, week)', lambda: get_exercise_progress(user, top_exercise, days=730, bucket='week')),
+        ]
+    return benchmarks
+
+
+def get_view_benchmarks(user):
+    """
+    Build the view benchmarks for a user, each a GET through the test client.
+
+    Args:
+        user: The User object the requests are made as
+
+    Returns:
+        list: (name, callable) pairs
+    """
+    client = Client()
+    client.force_login(user)
+
+    def request(url):
+        def run():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+        return run
+
+    benchmarks = [(f"view:{name}", request(reverse(name, args=args))) for name, args in VIEW_BENCHMARKS]
+    day = WorkoutDay.objects.filter(plan__user=user).order_by('id').first()
+    if day is not None:
+        benchmarks.append(('view:workout_day_detail', request(reverse('workout_day_detail', args=[day.pk]))))
+    return benchmarks
+
+
+def time_benchmark(func, repeat=5, warm=False):
+    """
+    Run a benchmark several times, recording wall time and query count.
+
+    Args:
+        func: Callable to benchmark
+        repeat: Number of timed repetitions
+        warm: Keep caches between repetitions (default clears them first)
+
+    Returns:
+        dict: median_ms, min_ms, max_ms and queries (the most any repetition ran)
+    """
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        if not warm:
+            for cache in caches.all():
+                cache.clear()
+        with record_queries() as recorder:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, recorder.count)
+
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': queries,
+    }
+
+
+def run_benchmarks(user, repeat=5, warm=False, include_views=True):
+    """
+    Run every benchmark as a user and build a report.
+
+    Args:
+        user: The User object the benchmarks run as
+        repeat: Number of timed repetitions per benchmark
+        warm: Keep caches between repetitions
+        include_views: Also benchmark requests through the main views
+
+    Returns:
+        dict: Report with environment details and per-benchmark results
+    """
+    benchmarks = get_function_benchmarks(user)
+    if include_views:
+        benchmarks += get_view_benchmarks(user)
+
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'user': user.username,
+        'workout_logs': user.workout_logs.count(),
+        'repeat': repeat,
+        'warm': warm,
+        'results': {name: time_benchmark(func, repeat=repeat, warm=warm) for name, func in benchmarks},
+    }
+
+
+def compare_reports(report, baseline):
+    """
+    Compare a report with a baseline report.
+
+    Args:
+        report: Report from run_benchmarks
+        baseline: Earlier report to compare against
+
+    Returns:
+        list: One dict per benchmark with the current and baseline results and the
+              relative change in median time (None when the baseline lacks it)
+    """
+    rows = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        change = None
+        if previous and previous['median_ms']:
+            change = (result['median_ms'] - previous['median_ms']) / previous['median_ms'] * 100
+        rows.append({'name': name, 'result': result, 'baseline': previous, 'change_percent': change})
+    return rows
@@ -0,0 +1,82 @@
+"""
+Exercise Catalogue Versioning
+-----------------------------
+The exercise catalogue is shared by every user and rarely changes, so pages
+built from it are cached and revalidated against a catalogue-wide version.
+Features include:
+- A version stamp, bumped by signals whenever an Exercise is saved or deleted
+- Rendered catalogue fragments cached per version
+- An ETag helper for conditional GETs
+
+The version is a millisecond timestamp of the last change, so it never
+repeats after a cache eviction.
+"""
+
+import hashlib
+import time
+
+from django.contrib import messages
+from django.core.cache import cache
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+CATALOGUE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def _now_version():
+    return time.time_ns() // 1_000_000
+
+
+def get_catalogue_version():
+    """
+    Get the current exercise catalogue version.
+
+    Returns:
+        int: Millisecond timestamp of the last catalogue change
+    """
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # Unknown after an eviction or restart: treat the catalogue as changed now
+        cache.add(CATALOGUE_VERSION_KEY, _now_version(), None)
+        version = cache.get(CATALOGUE_VERSION_KEY, _now_version())
+    return version
+
+
+def bump_catalogue_version():
+    """Mark the catalogue as changed, invalidating cached fragments and ETags"""
+    # Move forward by at least a second, even if clocks differ between processes
+    cache.set(CATALOGUE_VERSION_KEY, max(_now_version(), get_catalogue_version() + 1000), None)
+
+
+def get_catalogue_fragment(name, render):
+    """
+    Return a rendered catalogue fragment for the current version, rendering it on a miss.
+
+    Args:
+        name: Name of the fragment
+        render: Callable returning the rendered HTML
+
+    Returns:
+        str: Rendered HTML
+    """
+    key = f"catalogue:{get_catalogue_version()}:{name}"
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, CATALOGUE_FRAGMENT_TIMEOUT)
+    return html
+
+
+def catalogue_etag(request, *args, **kwargs):
+    """
+    ETag for a page built from the catalogue.
+
+    The page also shows the user's navigation, flash messages and forms with a
+    CSRF token, so the tag covers the user, the session and the CSRF secret, and
+    pages with pending messages get no tag at all.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    session = hashlib.sha256(
+        f"{request.session.session_key}:{request.META.get('CSRF_COOKIE', '')}".encode()
+    ).hexdigest()[:16]
+    return f"catalogue-{get_catalogue_version()}-{request.user.pk}-{session}"
@@ -0,0 +1,114 @@
+"""
+Chart Payloads
+--------------
+Compact JSON series for the progress and stats charts, served by their own
+endpoints so pages do not embed chart data and can load charts after first paint.
+Features include:
+- One payload shape for every chart: labels plus named series of equal length
+- Largest-Triangle-Three-Buckets downsampling, so long ranges are sent as a
+  bounded number of points that keep the shape of the line
+- Values rounded for the wire
+
+Payloads are cached per user data version by the views, like the other stats.
+"""
+
+from .workout_utils import get_exercise_progress, get_progress_summary
+
+CHART_MAX_POINTS = 200  # Default points per series after downsampling
+CHART_POINT_LIMITS = (3, 1000)  # Bounds for a requested number of points
+CHART_PERIOD_LIMITS = (1, 3650)  # Bounds for a requested range in days
+WEEKDAY_LABELS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def lttb(points, threshold):
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Every other bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs.
+
+    Args:
+        points: List of (x, y) pairs, sorted by x
+        threshold: Number of points to keep
+
+    Returns:
+        list: Indices of the points to keep, in order
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    bucket_size = (count - 2) / (threshold - 2)
+    keep = [0]
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        prev_x, prev_y = points[previous]
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        best, best_area = start, -1
+        for index in range(start, end):
+            x, y = points[index]
+            # Twice the triangle area; the factor does not change the ranking
+            area = abs((prev_x - avg_x) * (y - prev_y) - (prev_x - x) * (avg_y - prev_y))
+            if area > best_area:
+                best, best_area = index, area
+
+        keep.append(best)
+        previous = best
+
+    keep.append(count - 1)
+    return keep
+
+
+def workout_distribution_chart(user):
+    """
+    Chart payload for the number of workouts per weekday.
+
+    Args:
+        user: The User object
+
+    Returns:
+        dict: Weekday labels and a 'workouts' series
+    """
+    return {
+        'labels': WEEKDAY_LABELS,
+        'series': {'workouts': get_progress_summary(user)['workout_distribution']},
+    }
+
+
+def exercise_progress_chart(user, exercise_id, days=90, bucket=None, max_points=CHART_MAX_POINTS):
+    """
+    Chart payload for the volume and max weight of an exercise over time.
+
+    Args:
+        user: The User object
+        exercise_id: ID of the exercise to chart
+        days: Number of days to look back
+        bucket: None for one point per session, or 'week' / 'month'
+        max_points: Points to keep when the range is longer, picked by LTTB on volume
+
+    Returns:
+        dict: Date labels, 'volume' and 'max_weight' series, and the number of
+              points before downsampling
+    """
+    progress = get_exercise_progress(user, exercise_id, days=days, bucket=bucket)
+    keep = lttb([(entry['date'].toordinal(), entry['volume']) for entry in progress], max_points)
+    entries = [progress[index] for index in keep]
+
+    return {
+        'labels': [entry['date'].isoformat() for entry in entries],
+        'series': {
+            'volume': [round(entry['volume'], 1) for entry in entries],
+            'max_weight': [round(entry['max_weight'], 1) for entry in entries],
+        },
+        'total_points': len(progress),
+    }
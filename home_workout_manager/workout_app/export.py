@@ -0,0 +1,245 @@
+"""
+Training History Export
+-----------------------
+Streams a user's complete training history as CSV or newline-delimited JSON.
+Features include:
+- Plan definitions, workout logs and per-set data in one flat record stream
+- Queries read with iterator(chunk_size=...), which uses server-side cursors on
+  PostgreSQL, so memory stays flat however long the history is
+- Encoders that yield one chunk of text at a time for StreamingHttpResponse
+  and the export_workout_history management command
+- An async variant for ASGI servers, where Django would otherwise read a
+  synchronous streaming response into memory before sending it
+
+Every record carries a `record` field ('plan', 'workout' or 'set'); CSV rows
+leave the columns a record type does not use empty.
+"""
+
+import csv
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import WorkoutPlan, WorkoutLog, ExerciseLog
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_FIELDS = [
+    'record', 'workout_id', 'date', 'plan', 'day', 'exercise', 'completed', 'duration',
+    'sets_completed', 'set_number', 'reps', 'weight', 'order', 'sets', 'rest_time', 'notes',
+]
+
+
+def iter_plan_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one record per exercise of each of the user's workout plans.
+
+    Plans and days without exercises still yield a record, with the missing
+    columns left as None.
+
+    Args:
+        user: The User object
+        chunk_size: Rows fetched from the database per round trip
+
+    Yields:
+        dict: Plan records
+    """
+    rows = WorkoutPlan.objects.filter(user=user).order_by(
+        'id', 'workout_days__id', 'workout_days__exercises__order', 'workout_days__exercises__id'
+    ).values_list(
+        'name',
+        'workout_days__day_name',
+        'workout_days__exercises__exercise__name',
+        'workout_days__exercises__order',
+        'workout_days__exercises__sets',
+        'workout_days__exercises__reps',
+        'workout_days__exercises__rest_time',
+    )
+    for plan, day, exercise, order, sets, reps, rest_time in rows.iterator(chunk_size=chunk_size):
+        yield {
+            'record': 'plan',
+            'plan': plan,
+            'day': day,
+            'exercise': exercise,
+            'order': order,
+            'sets': sets,
+            'reps': reps,
+            'rest_time': rest_time,
+        }
+
+
+def iter_workout_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one record per workout log of the user, oldest first.
+
+    Args:
+        user: The User object
+        chunk_size: Rows fetched from the database per round trip
+
+    Yields:
+        dict: Workout records
+    """
+    rows = WorkoutLog.objects.filter(user=user).order_by('date', 'id').values_list(
+        'id', 'date', 'workout_plan__name', 'workout_day__day_name', 'completed', 'duration'
+    )
+    for workout_id, date, plan, day, completed, duration in rows.iterator(chunk_size=chunk_size):
+        yield {
+            'record': 'workout',
+            'workout_id': workout_id,
+            'date': date,
+            'plan': plan,
+            'day': day,
+            'completed': completed,
+            'duration': duration,
+        }
+
+
+def iter_set_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one record per logged set of the user, oldest workout first.
+
+    Exercise logs without sets yield a single record with the set columns as None.
+
+    Args:
+        user: The User object
+        chunk_size: Rows fetched from the database per round trip
+
+    Yields:
+        dict: Set records, linked to their workout record by workout_id and
+              by (date, plan, day)
+    """
+    rows = ExerciseLog.objects.filter(workout_log__user=user).order_by(
+        'workout_log__date', 'workout_log_id', 'id', 'sets__set_number'
+    ).values_list(
+        'workout_log_id',
+        'workout_log__date',
+        'workout_log__workout_plan__name',
+        'workout_log__workout_day__day_name',
+        'exercise__name',
+        'sets_completed',
+        'notes',
+        'sets__set_number',
+        'sets__reps',
+        'sets__weight',
+    )
+    for workout_id, date, plan, day, exercise, sets_completed, notes, set_number, reps, weight in rows.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            'record': 'set',
+            'workout_id': workout_id,
+            'date': date,
+            'plan': plan,
+            'day': day,
+            'exercise': exercise,
+            'sets_completed': sets_completed,
+            'set_number': set_number,
+            'reps': reps,
+            'weight': weight,
+            'notes': notes,
+        }
+
+
+def iter_export_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield every export record of a user: plans, then workouts, then sets.
+
+    Args:
+        user: The User object
+        chunk_size: Rows fetched from the database per round trip
+
+    Yields:
+        dict: Export records
+    """
+    yield from iter_plan_records(user, chunk_size)
+    yield from iter_workout_records(user, chunk_size)
+    yield from iter_set_records(user, chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(records):
+    """
+    Encode records as CSV, one line at a time.
+
+    Args:
+        records: Iterable of export records
+
+    Yields:
+        str: The header line, then one line per record
+    """
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS, restval='')
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def iter_ndjson(records):
+    """
+    Encode records as newline-delimited JSON, one line at a time.
+
+    Args:
+        records: Iterable of export records
+
+    Yields:
+        str: One JSON object and newline per record
+    """
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(user, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a user's training history in an export format.
+
+    Args:
+        user: The User object
+        export_format: 'csv' or 'ndjson'
+        chunk_size: Rows fetched from the database per round trip
+
+    Returns:
+        generator: Encoded lines of the export
+
+    Raises:
+        ValueError: If the format is not one of EXPORT_FORMATS
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'")
+
+    encode = iter_csv if export_format == 'csv' else iter_ndjson
+    return encode(iter_export_records(user, chunk_size))
+
+
+async def astream_export(user, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a user's training history in an export format from async code.
+
+    The synchronous export runs in the thread used for sync code, so its
+    database cursor stays on one connection, and up to `chunk_size` lines are
+    joined per step to keep the number of thread hand-offs low.
+
+    Args:
+        user: The User object
+        export_format: 'csv' or 'ndjson'
+        chunk_size: Rows fetched from the database per round trip
+
+    Yields:
+        str: Encoded chunks of the export
+
+    Raises:
+        ValueError: If the format is not one of EXPORT_FORMATS
+    """
+    lines = stream_export(user, export_format, chunk_size)
+    read_block = sync_to_async(lambda: ''.join(itertools.islice(lines, chunk_size)))
+    while block := await read_block():
+        yield block
@@ -1,3 +1,5 @@
+import math
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
@@ -85,7 +87,87 @@ class WorkoutExerciseForm(forms.ModelForm):
 class ExerciseLogForm(forms.ModelForm):
     class Meta:
         model = ExerciseLog
-        fields = ['sets_completed', 'reps_completed', 'weight_used', 'notes']
+        fields = ['sets_completed', 'notes']
         widgets = {
             'notes': forms.Textarea(attrs={'rows': 2}),
-        }
\ No newline at end of file
+        }
+
+class SetListField(forms.JSONField):
+    """JSON array of non-negative numbers up to max_value, one entry per set"""
+
+    def __init__(self, *args, number_type=float, max_value=None, **kwargs):
+        self.number_type = number_type
+        self.max_value = max_value
+        kwargs.setdefault('required', False)
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return []
+        if not isinstance(value, list):
+            raise forms.ValidationError('Expected a list with one value per set.')
+
+        cleaned = []
+        for entry in value:
+            if entry in ('', None):
+                entry = 0
+            if isinstance(entry, bool):
+                raise forms.ValidationError(f'"{entry}" is not a valid number.')
+            try:
+                number = float(entry)
+            except (TypeError, ValueError, OverflowError):
+                raise forms.ValidationError(f'"{entry}" is not a valid number.')
+            # JSON allows Infinity and NaN, and 1e400 parses as infinity
+            if not math.isfinite(number) or (self.number_type is int and not number.is_integer()):
+                raise forms.ValidationError(f'"{entry}" is not a valid number.')
+            if number < 0:
+                raise forms.ValidationError('Values cannot be negative.')
+            if self.max_value is not None and number > self.max_value:
+                raise forms.ValidationError(f'Values cannot be greater than {self.max_value}.')
+            cleaned.append(self.number_type(number))
+        return cleaned
+
+
+class ExerciseLogCompletionForm(forms.Form):
+    """Validate the values submitted for one exercise when a workout is completed"""
+    sets_completed = forms.IntegerField(min_value=0, required=False)
+    reps_completed = SetListField(number_type=int, max_value=10000)
+    weight_used = SetListField(number_type=float, max_value=10000)
+    notes = forms.CharField(required=False)
+
+    def __init__(self, data, exercise_log, **kwargs):
+        # perform_workout.html suffixes each field with the exercise log pk
+        self.exercise_log = exercise_log
+        data = {name: data.get(f'{name}_{exercise_log.pk}') for name in self.base_fields}
+        super().__init__(data, **kwargs)
+
+    def clean_sets_completed(self):
+        return self.cleaned_data.get('sets_completed') or 0
+
+
+class SessionSetForm(forms.Form):
+    """Validate one set autosaved while a workout is in progress"""
+    exercise_log = forms.IntegerField(min_value=1)
+    set_number = forms.IntegerField(min_value=1, max_value=100)
+    reps = forms.IntegerField(min_value=0, max_value=10000, required=False)
+    weight = forms.FloatField(min_value=0, max_value=10000, required=False)
+
+    def clean_reps(self):
+        return self.cleaned_data.get('reps') or 0
+
+    def clean_weight(self):
+        return self.cleaned_data.get('weight') or 0
+
+
+class WorkoutCompletionForm(forms.Form):
+    workout_duration = forms.IntegerField(min_value=0, required=False)
+
+    def clean_workout_duration(self):
+        return self.cleaned_data.get('workout_duration') or 0
+
+
+class ImportHistoryForm(forms.Form):
+    """Upload of a training history file to import"""
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'JSON Lines')], initial='csv')
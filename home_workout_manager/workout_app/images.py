@@ -0,0 +1,199 @@
+"""
+Responsive Image Variants
+-------------------------
+Resized copies of uploaded exercise images and profile pictures, built with Pillow.
+Features include:
+- WebP and JPEG variants at a few widths, never wider than the original
+- Content-hashed file names, so variants can be cached by browsers forever
+- Generation in a background job queued whenever an image field changes,
+  with the variants of the previous image deleted afterwards
+- srcset strings for serving the right variant to each screen
+
+Variant metadata is stored next to each image field in a `<field>_variants`
+JSON field: the source file name and one entry per variant. Configure the
+widths, formats and quality with the IMAGE_VARIANTS setting.
+"""
+
+import hashlib
+import io
+import os
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .catalogue import bump_catalogue_version
+from .jobs import background_task, enqueue
+
+DEFAULT_IMAGE_VARIANTS_SETTINGS = {
+    'WIDTHS': [160, 320, 640, 960],  # Variant widths in pixels
+    'FORMATS': ['webp', 'jpeg'],  # Encoded formats, most preferred first
+    'QUALITY': 80,  # Encoder quality for both formats
+}
+
+# (model name, image field) pairs that get variants in <field>_variants
+IMAGE_FIELDS = [
+    ('Exercise', 'image'),
+    ('UserProfile', 'profile_picture'),
+]
+
+_PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_image_variants_settings():
+    """
+    Get the IMAGE_VARIANTS settings merged over the defaults.
+
+    Returns:
+        dict: Effective image variant settings
+    """
+    return {**DEFAULT_IMAGE_VARIANTS_SETTINGS, **getattr(settings, 'IMAGE_VARIANTS', {})}
+
+
+def _encode(image, image_format, quality):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+
+    options = {'optimize': True, 'progressive': True} if image_format == 'jpeg' else {'method': 6}
+    output = io.BytesIO()
+    image.save(output, _PIL_FORMATS[image_format], quality=quality, **options)
+    return output.getvalue()
+
+
+def build_image_variants(field_file):
+    """
+    Encode and store the variants of an image.
+
+    Args:
+        field_file: FieldFile of the source image
+
+    Returns:
+        dict: source name and the list of variants (name, width, height, format),
+              smallest first
+    """
+    config = get_image_variants_settings()
+    storage = field_file.storage
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+
+    with field_file.open('rb'), Image.open(field_file) as source:
+        source = ImageOps.exif_transpose(source)
+        source = source.convert('RGBA' if 'A' in source.getbands() or 'transparency' in source.info else 'RGB')
+
+    max_width = max(config['WIDTHS'])
+    widths = sorted({width for width in config['WIDTHS'] if width < source.width} | {min(source.width, max_width)})
+
+    variants = []
+    for width in widths:
+        height = max(1, round(source.height * width / source.width))
+        resized = source.resize((width, height), Image.LANCZOS) if width != source.width else source
+        for image_format in config['FORMATS']:
+            content = _encode(resized, image_format, config['QUALITY'])
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = f"{directory}/variants/{stem}-{width}w.{digest}.{_EXTENSIONS[image_format]}"
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            variants.append({'name': name, 'width': width, 'height': height, 'format': image_format})
+
+    return {'source': field_file.name, 'variants': variants}
+
+
+def delete_variant_files(storage, names):
+    """Delete stored variant files, ignoring ones that are already gone"""
+    for name in names:
+        storage.delete(name)
+
+
+def variant_names(metadata):
+    """Names of the variant files listed in variant metadata"""
+    return {variant['name'] for variant in (metadata or {}).get('variants', [])}
+
+
+@background_task
+def generate_image_variants(model, pk, field):
+    """
+    Build the variants of one image field and replace the previous ones.
+
+    Args:
+        model: Model name, one of IMAGE_FIELDS
+        pk: Primary key of the instance
+        field: Name of the image field
+
+    Returns:
+        dict: Number of variants stored, or None if the instance is gone or
+              its image changed since the job was queued
+    """
+    Model = apps.get_model('workout_app', model)
+    instance = Model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+
+    field_file = getattr(instance, field)
+    previous = getattr(instance, f"{field}_variants")
+    metadata = build_image_variants(field_file) if field_file else None
+
+    # Only store the variants if the image was not replaced in the meantime
+    updated = Model.objects.filter(pk=pk, **{field: field_file.name or ''}).update(**{f"{field}_variants": metadata})
+    if not updated:
+        delete_variant_files(field_file.storage, variant_names(metadata) - variant_names(previous))
+        return None
+
+    stale = variant_names(previous) - variant_names(metadata)
+    transaction.on_commit(partial(delete_variant_files, field_file.storage, stale))
+    if model == 'Exercise':
+        # The cached library fragment embeds the srcset
+        transaction.on_commit(bump_catalogue_version)
+    return {'variants': len(metadata['variants']) if metadata else 0}
+
+
+def queue_image_variants(instance, field):
+    """
+    Queue generate_image_variants when an image field no longer matches its variants.
+
+    Args:
+        instance: Model instance with the image field
+        field: Name of the image field
+
+    Returns:
+        BackgroundJob: The queued job, or None if the variants are current
+    """
+    field_file = getattr(instance, field)
+    metadata = getattr(instance, f"{field}_variants") or {}
+    if (field_file.name or None) == metadata.get('source'):
+        return None
+
+    model = type(instance).__name__
+    return enqueue(
+        generate_image_variants,
+        key=f"image_variants:{model}:{instance.pk}:{field}",
+        model=model,
+        pk=instance.pk,
+        field=field
+    )
+
+
+def build_srcset(metadata, image_format, storage=default_storage):
+    """
+    Build a srcset attribute value from variant metadata.
+
+    Args:
+        metadata: Contents of a <field>_variants field
+        image_format: 'webp' or 'jpeg'
+        storage: Storage the variants were saved to
+
+    Returns:
+        str: Comma separated "url width" candidates, empty when there are none
+    """
+    return ', '.join(
+        f"{storage.url(variant['name'])} {variant['width']}w"
+        for variant in (metadata or {}).get('variants', [])
+        if variant['format'] == image_format
+    )
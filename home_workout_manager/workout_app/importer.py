@@ -0,0 +1,416 @@
+"""
+Training History Import
+-----------------------
+Loads historical workouts from CSV or newline-delimited JSON in batches.
+Features include:
+- Parsers that read an upload or file one line at a time
+- The record layout written by workout_app.export, as well as plain per-set
+  rows (date, plan, day, exercise, reps, weight) from other trackers
+- Exercises resolved by name from one in-memory lookup built with a single query
+- WorkoutLog, ExerciseLog and ExerciseSet rows inserted with bulk_create, one
+  transaction per batch, with errors reported per row and per batch
+- Daily activity rollups, streaks and cached stats rebuilt once at the end
+
+Sessions that already exist (same workout day and date) are left untouched, so
+importing the same file twice does not duplicate workouts. Plans and days named
+in the input are created when the user does not have them yet.
+"""
+
+import csv
+import datetime
+import json
+import math
+
+from django.db import DatabaseError, transaction
+
+from .models import Exercise, WorkoutPlan, WorkoutDay, WorkoutLog, ExerciseLog, ExerciseSet
+from .stats_cache import bump_data_version
+from .workout_utils import refresh_daily_activity, rebuild_streak
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 100
+DEFAULT_PLAN_NAME = 'Imported'
+DEFAULT_DAY_NAME = 'Imported'
+MAX_IMPORT_VALUE = 100000  # Upper bound for reps, weights, set counts and durations
+
+_TRUE_VALUES = {'true', 'yes', '1'}
+_FALSE_VALUES = {'false', 'no', '0'}
+
+
+class ImportRowError(ValueError):
+    """Raised for an input row that cannot be imported"""
+
+
+def iter_csv_records(lines):
+    """
+    Parse CSV with a header row into records.
+
+    Args:
+        lines: Iterable of text lines
+
+    Yields:
+        tuple: (line number, record dict)
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def iter_ndjson_records(lines):
+    """
+    Parse newline-delimited JSON into records, skipping blank lines.
+
+    Args:
+        lines: Iterable of text lines
+
+    Yields:
+        tuple: (line number, decoded value, or None when the line is not valid JSON)
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def _parse_date(value):
+    if value in (None, ''):
+        raise ImportRowError('Missing date')
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ImportRowError(f"Invalid date '{value}'")
+
+
+def _parse_number(value, name, number_type):
+    if value in (None, ''):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ImportRowError(f"Invalid {name} '{value}'")
+    # float() accepts 'nan' and 'inf', and 1e400 parses as infinity
+    if not math.isfinite(number) or not 0 <= number <= MAX_IMPORT_VALUE:
+        raise ImportRowError(f"Invalid {name} '{value}'")
+    if number_type is int and not number.is_integer():
+        raise ImportRowError(f"Invalid {name} '{value}'")
+    return number_type(number)
+
+
+def _parse_bool(value, name):
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ImportRowError(f"Invalid {name} '{value}'")
+
+
+def _clean_name(value, default, max_length, name):
+    value = str(value).strip() if value not in (None, '') else default
+    if len(value) > max_length:
+        raise ImportRowError(f"{name} '{value}' is longer than {max_length} characters")
+    return value
+
+
+class HistoryImporter:
+    """
+    Import one user's workout history.
+
+    Rows are collected into batches of about `batch_size` records. A batch is
+    only cut between two exercise logs, so the sets of one exercise log always
+    land in the same transaction.
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.report = {
+            'batches': 0,
+            'workouts': 0,
+            'exercise_logs': 0,
+            'sets': 0,
+            'existing_workouts': 0,
+            'skipped_rows': 0,
+            'error_count': 0,
+            'errors': [],
+        }
+        self.imported_dates = set()
+
+        # Exercises are matched by case-insensitive name; the oldest exercise wins
+        self.exercises = {
+            name.casefold(): pk
+            for pk, name in Exercise.objects.order_by('-id').values_list('id', 'name')
+        }
+        self.plans = {
+            name: pk
+            for pk, name in WorkoutPlan.objects.filter(user=user).order_by('-id').values_list('id', 'name')
+        }
+        self.days = {}
+        self.day_plans = {}
+        for pk, plan_id, plan_name, day_name in WorkoutDay.objects.filter(
+            plan__user=user
+        ).order_by('-id').values_list('id', 'plan_id', 'plan__name', 'day_name'):
+            self.days[(plan_name, day_name)] = pk
+            self.day_plans[pk] = plan_id
+
+        # ((plan name, day name), date) -> (WorkoutLog id, created by this import)
+        self.sessions = {}
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self.pending_workouts = {}
+        self.pending_groups = []
+        self.pending_rows = 0
+        self.batch_start_line = None
+
+    def add_error(self, line_number, message):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({
+                'batch': self.report['batches'] + 1,
+                'line': line_number,
+                'error': message,
+            })
+
+    def day_key(self, plan_name, day_name):
+        """Validate plan and day names, returning the (plan name, day name) key of the workout day"""
+        plan_name = _clean_name(plan_name, DEFAULT_PLAN_NAME, WorkoutPlan._meta.get_field('name').max_length, 'Plan')
+        day_name = _clean_name(day_name, DEFAULT_DAY_NAME, WorkoutDay._meta.get_field('day_name').max_length, 'Day')
+        return plan_name, day_name
+
+    def _resolve_days(self, day_keys):
+        # Must run inside the batch transaction, so a rolled back batch leaves no
+        # plans or days behind; the lookups are only updated once it commits
+        plans, days, day_plans = {}, {}, {}
+        for plan_name, day_name in day_keys:
+            if (plan_name, day_name) in self.days:
+                continue
+            plan_id = self.plans.get(plan_name) or plans.get(plan_name)
+            if plan_id is None:
+                plan_id = plans[plan_name] = WorkoutPlan.objects.create(user=self.user, name=plan_name).pk
+            day = WorkoutDay.objects.create(plan_id=plan_id, day_name=day_name)
+            days[(plan_name, day_name)] = day.pk
+            day_plans[day.pk] = plan_id
+        return plans, days, day_plans
+
+    def add_record(self, line_number, record):
+        """
+        Validate one input record and add it to the current batch.
+
+        Args:
+            line_number: Line of the record in the input, for error reports
+            record: Parsed record
+
+        Raises:
+            ImportRowError: If the record cannot be imported
+        """
+        if not isinstance(record, dict):
+            raise ImportRowError('Expected a JSON object')
+        record = {key: value.strip() if isinstance(value, str) else value for key, value in record.items() if key}
+
+        record_type = record.get('record') or ('set' if record.get('exercise') else 'workout')
+        if record_type == 'plan':
+            # Plan definitions are not imported; plans are created from workout rows
+            self.report['skipped_rows'] += 1
+            return
+        if record_type not in ('workout', 'set'):
+            raise ImportRowError(f"Unknown record type '{record_type}'")
+
+        date = _parse_date(record.get('date'))
+        if record_type == 'workout':
+            completed = _parse_bool(record.get('completed'), 'completed')
+            duration = _parse_number(record.get('duration'), 'duration', int)
+            key = (self.day_key(record.get('plan'), record.get('day')), date)
+            self._start_entry(line_number)
+            self.pending_workouts[key] = {
+                'completed': True if completed is None else completed,
+                'duration': duration or 0,
+            }
+            self.pending_rows += 1
+            return
+
+        exercise_name = str(record.get('exercise') or '')
+        exercise_id = self.exercises.get(exercise_name.casefold())
+        if exercise_id is None:
+            raise ImportRowError(f"Unknown exercise '{exercise_name}'")
+        reps = _parse_number(record.get('reps'), 'reps', int)
+        weight = _parse_number(record.get('weight'), 'weight', float)
+        sets_completed = _parse_number(record.get('sets_completed'), 'sets_completed', int)
+        key = (self.day_key(record.get('plan'), record.get('day')), date)
+
+        group = self.pending_groups[-1] if self.pending_groups else None
+        if group is None or group['key'] != key or group['exercise_id'] != exercise_id:
+            self._start_entry(line_number)
+            # Sets without a workout row imply a completed session
+            self.pending_workouts.setdefault(key, None)
+            group = {'key': key, 'exercise_id': exercise_id, 'sets_completed': None, 'notes': None, 'sets': []}
+            self.pending_groups.append(group)
+
+        if reps is not None or weight is not None:
+            group['sets'].append((reps or 0, weight or 0))
+        if sets_completed is not None:
+            group['sets_completed'] = sets_completed
+        group['notes'] = group['notes'] or record.get('notes') or None
+        self.pending_rows += 1
+
+    def _start_entry(self, line_number):
+        # Called before a new workout or exercise log; cut the batch here when it is full
+        if self.pending_rows >= self.batch_size:
+            self.flush()
+        if self.batch_start_line is None:
+            self.batch_start_line = line_number
+
+    def flush(self):
+        """Insert the current batch in one transaction"""
+        if not self.pending_workouts:
+            self._reset_batch()
+            return
+
+        self.report['batches'] += 1
+        try:
+            with transaction.atomic():
+                plans, days, day_plans = self._resolve_days({day_key for day_key, _date in self.pending_workouts})
+                sessions = self._create_sessions({**self.days, **days}, {**self.day_plans, **day_plans})
+                counts = self._create_exercise_logs(sessions)
+        except DatabaseError as error:
+            self.report['error_count'] += 1
+            if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+                self.report['errors'].append({
+                    'batch': self.report['batches'],
+                    'line': self.batch_start_line,
+                    'error': f"Batch rolled back: {error}",
+                })
+        else:
+            self.plans.update(plans)
+            self.days.update(days)
+            self.day_plans.update(day_plans)
+            self.sessions.update(sessions)
+            self.imported_dates.update(date for (_key, date), (_pk, created) in sessions.items() if created)
+            for name, count in counts.items():
+                self.report[name] += count
+        finally:
+            self._reset_batch()
+
+    def _create_sessions(self, days, day_plans):
+        sessions = {}
+        new_keys = [key for key in self.pending_workouts if key not in self.sessions]
+        if not new_keys:
+            return sessions
+
+        keys_by_day = {(days[day_key], date): (day_key, date) for day_key, date in new_keys}
+        existing = WorkoutLog.objects.filter(
+            user=self.user,
+            workout_day_id__in={day_id for day_id, _date in keys_by_day},
+            date__in={date for _day_id, date in keys_by_day}
+        ).values_list('workout_day_id', 'date', 'id')
+        for day_id, date, pk in existing:
+            if (day_id, date) in keys_by_day:
+                sessions[keys_by_day[(day_id, date)]] = (pk, False)
+
+        workout_logs = []
+        for (day_id, date), key in keys_by_day.items():
+            if key in sessions:
+                continue
+            values = self.pending_workouts[key] or {'completed': True, 'duration': 0}
+            workout_logs.append(WorkoutLog(
+                user=self.user,
+                workout_plan_id=day_plans[day_id],
+                workout_day_id=day_id,
+                date=date,
+                **values
+            ))
+        WorkoutLog.objects.bulk_create(workout_logs)
+
+        self.report['existing_workouts'] += len(sessions)
+        for workout_log in workout_logs:
+            sessions[keys_by_day[(workout_log.workout_day_id, workout_log.date)]] = (workout_log.pk, True)
+        return sessions
+
+    def _create_exercise_logs(self, sessions):
+        lookup = {**self.sessions, **sessions}
+        created_sessions = sum(created for _pk, created in sessions.values())
+
+        # Exercise logs of sessions that existed before the import are skipped
+        groups = [group for group in self.pending_groups if lookup[group['key']][1]]
+        exercise_logs = [
+            ExerciseLog(
+                workout_log_id=lookup[group['key']][0],
+                exercise_id=group['exercise_id'],
+                sets_completed=len(group['sets']) if group['sets_completed'] is None else group['sets_completed'],
+                notes=group['notes']
+            )
+            for group in groups
+        ]
+        ExerciseLog.objects.bulk_create(exercise_logs)
+
+        exercise_sets = [
+            ExerciseSet(exercise_log=exercise_log, set_number=number, reps=reps, weight=weight)
+            for exercise_log, group in zip(exercise_logs, groups)
+            for number, (reps, weight) in enumerate(group['sets'], start=1)
+        ]
+        ExerciseSet.objects.bulk_create(exercise_sets, batch_size=1000)
+
+        return {'workouts': created_sessions, 'exercise_logs': len(exercise_logs), 'sets': len(exercise_sets)}
+
+    def run(self, records):
+        """
+        Import parsed records and rebuild the user's derived state once.
+
+        Args:
+            records: Iterable of (line number, record) pairs
+
+        Returns:
+            dict: Import report
+        """
+        line_number = 0
+        try:
+            try:
+                for line_number, record in records:
+                    try:
+                        self.add_record(line_number, record)
+                    except ImportRowError as error:
+                        self.add_error(line_number, str(error))
+            except (UnicodeDecodeError, csv.Error) as error:
+                # The rest of the input cannot be read; keep the rows read so far
+                self.add_error(line_number + 1, f"Could not read the file: {error}")
+            self.flush()
+        finally:
+            # Batches that committed must never be left without rollups
+            if self.imported_dates:
+                refresh_daily_activity(self.user, self.imported_dates)
+                rebuild_streak(self.user)
+                # bulk_create sends no signals, so invalidate cached stats here
+                bump_data_version(self.user.pk)
+        return self.report
+
+
+def import_history(user, lines, import_format, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import a user's workout history from CSV or NDJSON.
+
+    Args:
+        user: The User object the workouts belong to
+        lines: Iterable of text lines, e.g. an open file
+        import_format: 'csv' or 'ndjson'
+        batch_size: Approximate number of rows inserted per transaction
+
+    Returns:
+        dict: Counts of created workouts, exercise logs and sets, the number of
+              batches, existing sessions and skipped rows, and row and batch errors
+
+    Raises:
+        ValueError: If the format is not one of IMPORT_FORMATS
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format '{import_format}'")
+
+    parse = iter_csv_records if import_format == 'csv' else iter_ndjson_records
+    return HistoryImporter(user, batch_size=batch_size).run(parse(lines))
@@ -0,0 +1,302 @@
+"""
+Background Jobs
+---------------
+A small database-backed job queue for work that should not run on the request path.
+Features include:
+- Tasks registered by name with the background_task decorator
+- enqueue(), which stores a job in the caller's transaction, so a job never
+  runs for writes that were rolled back
+- De-duplication of queued jobs by key
+- Retries with exponential backoff, then a final failed state
+- A worker loop, run by the run_background_jobs command, that claims jobs with a
+  conditional UPDATE so concurrent workers never run the same job twice
+
+Configure it with the BACKGROUND_JOBS setting. With EAGER enabled jobs run in
+process as soon as the enqueuing transaction commits, so development servers
+work without a worker.
+"""
+
+import datetime
+import logging
+import time
+import traceback
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKGROUND_JOBS_SETTINGS = {
+    'EAGER': False,  # Run jobs in process when the enqueuing transaction commits
+    'MAX_ATTEMPTS': 3,  # Attempts before a job is marked failed
+    'RETRY_DELAY': 30,  # Seconds before the first retry, doubled for every further attempt
+    'POLL_INTERVAL': 2,  # Seconds an idle worker waits before polling again
+    'STALE_AFTER': 60 * 15,  # Seconds after which a running job is assumed lost and requeued
+    'KEEP_FINISHED': 60 * 60 * 24 * 7,  # Seconds finished jobs are kept for the status API
+}
+
+_tasks = {}
+
+
+def get_background_jobs_settings():
+    """
+    Get the BACKGROUND_JOBS settings merged over the defaults.
+
+    Returns:
+        dict: Effective background job settings
+    """
+    return {**DEFAULT_BACKGROUND_JOBS_SETTINGS, **getattr(settings, 'BACKGROUND_JOBS', {})}
+
+
+def background_task(func=None, *, name=None, max_attempts=None):
+    """
+    Register a function as a background task.
+
+    Tasks are called with the keyword arguments given to enqueue, which must be
+    JSON serializable, and may return a JSON serializable result.
+
+    Args:
+        func: Function to register
+        name: Task name (default the function's name)
+        max_attempts: Attempts before a job of this task is marked failed
+
+    Returns:
+        function: The function, with task_name and max_attempts attributes
+    """
+    if func is None:
+        return partial(background_task, name=name, max_attempts=max_attempts)
+
+    func.task_name = name or func.__name__
+    func.max_attempts = max_attempts
+    _tasks[func.task_name] = func
+    return func
+
+
+def enqueue(task, user=None, key=None, delay=0, **kwargs):
+    """
+    Queue a job for a registered task.
+
+    Args:
+        task: Registered task function or task name
+        user: User who may see the job's status (optional)
+        key: De-duplication key; while a job with this key is queued, that job
+             is returned instead of queueing another
+        delay: Seconds before the job may run
+        **kwargs: Arguments for the task
+
+    Returns:
+        BackgroundJob: The queued job
+
+    Raises:
+        ValueError: If the task is not registered
+    """
+    name = getattr(task, 'task_name', task)
+    if name not in _tasks:
+        raise ValueError(f"Unknown background task '{name}'")
+
+    job = BackgroundJob(
+        name=name,
+        kwargs=kwargs,
+        user=user,
+        key=key,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        max_attempts=_tasks[name].max_attempts or get_background_jobs_settings()['MAX_ATTEMPTS'],
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # An equivalent job is already waiting
+        existing = BackgroundJob.objects.filter(key=key, status=BackgroundJob.QUEUED).first()
+        if existing is None:
+            raise
+        return existing
+
+    if get_background_jobs_settings()['EAGER'] and not delay:
+        transaction.on_commit(partial(run_job_by_id, job.pk))
+    return job
+
+
+def _claim(pk, now):
+    # Only the worker whose UPDATE changes the row owns the job
+    return BackgroundJob.objects.filter(pk=pk, status=BackgroundJob.QUEUED).update(
+        status=BackgroundJob.RUNNING,
+        started_at=now,
+        attempts=F('attempts') + 1
+    )
+
+
+def claim_job(candidates=10):
+    """
+    Claim the next due job.
+
+    Args:
+        candidates: Number of due jobs to try before giving up
+
+    Returns:
+        BackgroundJob: The claimed job, now running, or None when nothing is due
+    """
+    now = timezone.now()
+    due = BackgroundJob.objects.filter(
+        status=BackgroundJob.QUEUED,
+        run_after__lte=now
+    ).order_by('run_after', 'id').values_list('pk', flat=True)[:candidates]
+
+    for pk in due:
+        if _claim(pk, now):
+            return BackgroundJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome, scheduling a retry on failure.
+
+    Args:
+        job: BackgroundJob in the running state
+
+    Returns:
+        BackgroundJob: The job with its new status
+    """
+    task = _tasks.get(job.name)
+    try:
+        if task is None:
+            raise LookupError(f"Unknown background task '{job.name}'")
+        # A failed attempt leaves no partial writes behind
+        with transaction.atomic():
+            job.result = task(**job.kwargs)
+    except Exception:
+        logger.exception("Background job %s failed (attempt %s of %s)", job, job.attempts, job.max_attempts)
+        job.error = traceback.format_exc()
+        superseded = job.key and BackgroundJob.objects.filter(key=job.key, status=BackgroundJob.QUEUED).exists()
+        if job.attempts < job.max_attempts and not superseded:
+            delay = get_background_jobs_settings()['RETRY_DELAY'] * 2 ** (job.attempts - 1)
+            job.status = BackgroundJob.QUEUED
+            job.run_after = timezone.now() + datetime.timedelta(seconds=delay)
+        else:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = BackgroundJob.SUCCEEDED
+        job.error = ''
+        job.finished_at = timezone.now()
+
+    try:
+        with transaction.atomic():
+            job.save(update_fields=['status', 'result', 'error', 'run_after', 'finished_at'])
+    except IntegrityError:
+        # An equivalent job was queued after the superseded check; let it do the retry
+        job.status = BackgroundJob.FAILED
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'error', 'run_after', 'finished_at'])
+    return job
+
+
+def run_job_by_id(pk):
+    """Claim and run one specific job, if it is still queued"""
+    if _claim(pk, timezone.now()):
+        return run_job(BackgroundJob.objects.get(pk=pk))
+    return None
+
+
+def run_pending_jobs(limit=None):
+    """
+    Run due jobs until none are left.
+
+    Args:
+        limit: Maximum number of jobs to run (default no limit)
+
+    Returns:
+        int: Number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale_jobs():
+    """
+    Requeue running jobs whose worker has presumably died.
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=get_background_jobs_settings()['STALE_AFTER'])
+    requeued = 0
+    for job in BackgroundJob.objects.filter(status=BackgroundJob.RUNNING, started_at__lt=cutoff):
+        job.error = f"Requeued after running for more than {get_background_jobs_settings()['STALE_AFTER']} seconds"
+        if job.attempts >= job.max_attempts:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = BackgroundJob.QUEUED
+            requeued += 1
+        try:
+            with transaction.atomic():
+                job.save(update_fields=['status', 'error', 'finished_at'])
+        except IntegrityError:
+            # An equivalent job was queued in the meantime
+            BackgroundJob.objects.filter(pk=job.pk).update(status=BackgroundJob.FAILED, finished_at=timezone.now())
+            requeued -= 1
+    return requeued
+
+
+def purge_finished_jobs():
+    """
+    Delete finished jobs older than the KEEP_FINISHED setting.
+
+    Returns:
+        int: Number of jobs deleted
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=get_background_jobs_settings()['KEEP_FINISHED'])
+    deleted, _ = BackgroundJob.objects.filter(
+        status__in=[BackgroundJob.SUCCEEDED, BackgroundJob.FAILED],
+        finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def work(stop=lambda: False, max_jobs=None, burst=False):
+    """
+    Worker loop: run due jobs, sleeping while the queue is empty.
+
+    Args:
+        stop: Callable returning True once the worker should exit
+        max_jobs: Exit after running this many jobs (default no limit)
+        burst: Exit as soon as no job is due
+
+    Returns:
+        int: Number of jobs run
+    """
+    config = get_background_jobs_settings()
+    count = 0
+    last_maintenance = None
+
+    while not stop() and (max_jobs is None or count < max_jobs):
+        close_old_connections()
+        if last_maintenance is None or time.monotonic() - last_maintenance > config['STALE_AFTER']:
+            requeue_stale_jobs()
+            purge_finished_jobs()
+            last_maintenance = time.monotonic()
+
+        job = claim_job()
+        if job is not None:
+            run_job(job)
+            count += 1
+        elif burst:
+            break
+        else:
+            time.sleep(config['POLL_INTERVAL'])
+
+    close_old_connections()
+    return count
@@ -0,0 +1,67 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workout_app.benchmark import compare_reports, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the stats and progress functions and the main views against the current database, "
+        "recording wall time and query counts. Caches are cleared between runs unless --warm is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            default='synthetic1',
+            help="User to run the benchmarks as (default 'synthetic1', see generate_workout_data).",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per benchmark (default 5).')
+        parser.add_argument('--warm', action='store_true', help='Keep caches between repetitions.')
+        parser.add_argument('--no-views', action='store_true', help='Only benchmark workout_utils functions.')
+        parser.add_argument('--output', help='Write the JSON report to this file.')
+        parser.add_argument('--compare', help='Compare against a JSON report from an earlier run.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user'], profile__isnull=False).first()
+        if user is None:
+            raise CommandError(f"Unknown user '{options['user']}'. Run generate_workout_data first.")
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        report = run_benchmarks(
+            user,
+            repeat=options['repeat'],
+            warm=options['warm'],
+            include_views=not options['no_views'],
+        )
+
+        self.stdout.write(
+            f"{report['environment']['database']} database, user {report['user']} "
+            f"({report['workout_logs']} workouts), {report['repeat']} runs, {'warm' if report['warm'] else 'cold'} caches"
+        )
+        if baseline is None:
+            self.stdout.write(f"{'Benchmark':<36}{'Median ms':>12}{'Min ms':>12}{'Max ms':>12}{'Queries':>9}")
+            for name, result in report['results'].items():
+                self.stdout.write(
+                    f"{name:<36}{result['median_ms']:>12.2f}{result['min_ms']:>12.2f}"
+                    f"{result['max_ms']:>12.2f}{result['queries']:>9}"
+                )
+        else:
+            self.stdout.write(f"{'Benchmark':<36}{'Median ms':>12}{'Baseline':>12}{'Change':>10}{'Queries':>12}")
+            for row in compare_reports(report, baseline):
+                result, previous = row['result'], row['baseline']
+                baseline_ms = f"{previous['median_ms']:.2f}" if previous else '-'
+                change = f"{row['change_percent']:+.1f}%" if row['change_percent'] is not None else '-'
+                queries = f"{previous['queries']}->{result['queries']}" if previous else str(result['queries'])
+                self.stdout.write(f"{row['name']:<36}{result['median_ms']:>12.2f}{baseline_ms:>12}{change:>10}{queries:>12}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workout_app.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream a user's plans, workout logs and per-set data as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose training history is exported.')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Export format (default csv).')
+        parser.add_argument('--output', help='File to write the export to (default stdout).')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched from the database per round trip (default {EXPORT_CHUNK_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        lines = stream_export(user, options['format'], chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+            self.stdout.write(self.style.SUCCESS(f"Exported {user.username}'s history to {options['output']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from workout_app.images import IMAGE_FIELDS, generate_image_variants, queue_image_variants
+
+
+class Command(BaseCommand):
+    help = "Queue responsive variants for images uploaded without them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Generate the variants here instead of queueing jobs.')
+
+    def handle(self, *args, **options):
+        count = 0
+        for model, field in IMAGE_FIELDS:
+            queryset = apps.get_model('workout_app', model).objects.exclude(**{field: ''}).exclude(**{field: None})
+            for instance in queryset.iterator():
+                if options['now']:
+                    metadata = getattr(instance, f"{field}_variants") or {}
+                    if metadata.get('source') != getattr(instance, field).name:
+                        generate_image_variants(model=model, pk=instance.pk, field=field)
+                        count += 1
+                elif queue_image_variants(instance, field) is not None:
+                    count += 1
+
+        action = 'Generated' if options['now'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f"{action} variants for {count} image(s)."))
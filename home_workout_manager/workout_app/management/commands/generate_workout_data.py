@@ -0,0 +1,59 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workout_app.synthetic import delete_synthetic_data, generate_synthetic_data
+
+
+class Command(BaseCommand):
+    help = "Generate deterministic synthetic users, plans and multi-year workout histories for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=3, help='Number of users to create (default 3).')
+        parser.add_argument('--exercises', type=int, default=200, help='Size of the exercise catalogue (default 200).')
+        parser.add_argument('--plans', type=int, default=2, help='Workout plans per user (default 2).')
+        parser.add_argument('--days-per-plan', type=int, default=4, help='Workout days per plan (default 4).')
+        parser.add_argument('--exercises-per-day', type=int, default=5, help='Exercises per workout day (default 5).')
+        parser.add_argument('--years', type=int, default=2, help='Years of workout history per user (default 2).')
+        parser.add_argument('--workouts-per-week', type=float, default=4, help='Average workouts per week (default 4).')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42).')
+        parser.add_argument(
+            '--end-date',
+            type=datetime.date.fromisoformat,
+            help='Date of the most recent workout, YYYY-MM-DD (default today). Fix it for identical data across days.',
+        )
+        parser.add_argument('--prefix', default='synthetic', help="Username prefix (default 'synthetic').")
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='Delete previously generated users and exercises with the same prefix first.',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['replace']:
+            deleted = delete_synthetic_data(prefix)
+            self.stdout.write(f"Deleted {deleted} synthetic user(s)")
+        elif User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named '{prefix}*' already exist. Use --replace or another --prefix.")
+
+        created = generate_synthetic_data(
+            users=options['users'],
+            exercises=options['exercises'],
+            seed=options['seed'],
+            username_prefix=prefix,
+            plans=options['plans'],
+            days_per_plan=options['days_per_plan'],
+            exercises_per_day=options['exercises_per_day'],
+            years=options['years'],
+            workouts_per_week=options['workouts_per_week'],
+            end_date=options['end_date'],
+        )
+
+        for username, counts in created.items():
+            self.stdout.write(
+                f"{username}: {counts['plans']} plans, {counts['days']} days, {counts['workout_logs']} workouts, "
+                f"{counts['exercise_logs']} exercise logs, {counts['sets']} sets"
+            )
+        self.stdout.write(self.style.SUCCESS('Synthetic workout data generated.'))
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workout_app.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, import_history
+
+
+class Command(BaseCommand):
+    help = "Import a user's workout history from CSV or NDJSON in batched transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User the workouts are imported for.')
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Input format (default from the file extension).')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Rows inserted per transaction (default {IMPORT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        import_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as lines:
+                report = import_history(user, lines, import_format, batch_size=options['batch_size'])
+        except OSError as error:
+            raise CommandError(f"Cannot read {options['path']}: {error}")
+
+        for error in report['errors']:
+            self.stderr.write(f"Batch {error['batch']}, line {error['line']}: {error['error']}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... {report['error_count'] - len(report['errors'])} more errors")
+
+        self.stdout.write(
+            f"{report['batches']} batches: {report['workouts']} workouts, {report['exercise_logs']} exercise logs, "
+            f"{report['sets']} sets imported; {report['existing_workouts']} existing workouts and "
+            f"{report['skipped_rows']} plan rows skipped"
+        )
+        self.stdout.write(self.style.SUCCESS('Import finished.'))
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workout_app.workout_utils import refresh_daily_activity, rebuild_streak
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user daily activity rollup and streaks from the raw workout logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Username to rebuild (can be repeated). Defaults to every user.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        for user in users.select_related('profile').iterator():
+            refresh_daily_activity(user)
+            rebuild_streak(user)
+            self.stdout.write(f"Rebuilt daily activity and streaks for {user.username}")
+
+        self.stdout.write(self.style.SUCCESS('Workout stats rebuilt.'))
@@ -0,0 +1,27 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from workout_app.jobs import work
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling.')
+        parser.add_argument('--max-jobs', type=int, help='Exit after running this many jobs.')
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def stop(signum, frame):
+            # Finish the running job, then exit
+            self.stdout.write('Stopping after the current job...')
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        count = work(stop=lambda: bool(stopping), max_jobs=options['max_jobs'], burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} background job(s)."))
@@ -0,0 +1,84 @@
+"""
+Request-Scoped Memoization
+--------------------------
+Lets helpers that templates call repeatedly run once per request.
+Features include:
+- The request_memoize decorator for workout_utils helpers and template tags
+- RequestMemoMiddleware, which opens a fresh memo for every request
+- The request_memo context manager for code running outside a request
+
+Outside an open memo (management commands, direct calls in tests) decorated
+functions are called normally, so results are never shared between requests.
+"""
+
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+_memo = contextvars.ContextVar('workout_app_request_memo', default=None)
+
+
+@contextmanager
+def request_memo():
+    """Memoize request_memoize functions for the duration of the block"""
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+def request_memoize(func):
+    """
+    Cache a function's results for the current request, keyed on its arguments.
+
+    Calls with unhashable arguments are not cached.
+
+    Args:
+        func: Function to memoize
+
+    Returns:
+        function: Wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        memo = _memo.get()
+        if memo is None:
+            return func(*args, **kwargs)
+
+        try:
+            key = (func, args, frozenset(kwargs.items()))
+            if key in memo:
+                return memo[key]
+        except TypeError:
+            return func(*args, **kwargs)
+
+        memo[key] = result = func(*args, **kwargs)
+        return result
+    return wrapper
+
+
+class RequestMemoMiddleware:
+    """Give every request its own memo for request_memoize functions"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI stay async so async views are not pushed into a thread
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with request_memo():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # The memo lives in a ContextVar, so it follows the request into sync_to_async calls
+        with request_memo():
+            return await self.get_response(request)
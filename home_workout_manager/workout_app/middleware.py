@@ -0,0 +1,172 @@
+"""
+Query Budget Middleware
+-----------------------
+Opt-in instrumentation that records the SQL executed while handling each request.
+Features include:
+- Per-request query counts and timings
+- Detection of repeated query shapes (N+1 patterns)
+- Per-view query budgets declared with the query_budget decorator
+
+Enable it by adding 'workout_app.middleware.QueryBudgetMiddleware' to MIDDLEWARE
+and tune it with the QUERY_BUDGET setting.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET_SETTINGS = {
+    'DEFAULT_BUDGET': None,  # Budget for views without a query_budget decorator
+    'N_PLUS_ONE_THRESHOLD': 5,  # Repeats of one query shape that count as N+1
+    'RAISE': False,  # Raise QueryBudgetExceeded instead of logging a warning
+    'HEADERS': True,  # Add X-Query-Count / X-Query-Time response headers
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\([^()]*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more queries than its budget or repeats a query shape"""
+
+
+def get_query_budget_settings():
+    """
+    Get the QUERY_BUDGET settings merged over the defaults.
+
+    Returns:
+        dict: Effective query budget settings
+    """
+    return {**DEFAULT_QUERY_BUDGET_SETTINGS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+def normalize_sql(sql):
+    """
+    Reduce a SQL statement to its shape by stripping literal values.
+
+    Args:
+        sql: SQL statement
+
+    Returns:
+        str: SQL with literals replaced by '?' and IN lists collapsed
+    """
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def query_budget(max_queries):
+    """
+    Declare the maximum number of queries a view may run per request.
+
+    Args:
+        max_queries: Query budget for the view
+
+    Returns:
+        function: Decorator that tags the view with its budget
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryRecorder:
+    """Execute wrapper that records each statement run on a connection"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'time': time.perf_counter() - start
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['time'] for query in self.queries)
+
+    def repeated_shapes(self, threshold):
+        """
+        Find query shapes that were executed at least `threshold` times.
+
+        Args:
+            threshold: Minimum number of repeats to report
+
+        Returns:
+            dict: Mapping of normalized SQL to repeat count, most repeated first
+        """
+        counts = Counter(normalize_sql(query['sql']) for query in self.queries)
+        return {shape: count for shape, count in counts.most_common() if count >= threshold}
+
+    def problems(self, budget=None, threshold=None):
+        """
+        Describe budget overruns and N+1 patterns found in the recorded queries.
+
+        Args:
+            budget: Maximum number of queries allowed (None for no limit)
+            threshold: Repeats of one shape that count as N+1 (None to skip)
+
+        Returns:
+            list: Human-readable problem descriptions
+        """
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries exceeded the budget of {budget}")
+        if threshold:
+            for shape, count in self.repeated_shapes(threshold).items():
+                problems.append(f"Possible N+1: query repeated {count} times: {shape}")
+        return problems
+
+
+class QueryBudgetMiddleware:
+    """Record each request's SQL and flag N+1 patterns and query budget overruns"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_query_budget_settings()
+        request.query_budget = config['DEFAULT_BUDGET']
+        recorder = QueryRecorder()
+
+        with connections['default'].execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        if config['HEADERS']:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time'] = f"{recorder.total_time * 1000:.1f}ms"
+
+        problems = recorder.problems(request.query_budget, config['N_PLUS_ONE_THRESHOLD'])
+        if problems:
+            message = f"{request.method} {request.path}: " + '; '.join(problems)
+            if config['RAISE']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, 'query_budget', None)
+        if budget is not None:
+            request.query_budget = budget
+        return None
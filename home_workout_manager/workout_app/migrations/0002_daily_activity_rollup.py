@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_daily_activity(apps, schema_editor):
+    WorkoutLog = apps.get_model('workout_app', 'WorkoutLog')
+    ExerciseLog = apps.get_model('workout_app', 'ExerciseLog')
+    DailyActivity = apps.get_model('workout_app', 'DailyActivity')
+    DailyExerciseActivity = apps.get_model('workout_app', 'DailyExerciseActivity')
+
+    days = WorkoutLog.objects.filter(completed=True).values('user_id', 'date').annotate(
+        workouts=Count('id', distinct=True),
+        duration=Sum('duration'),
+    ).order_by()
+    exercises = {
+        (row['workout_log__user_id'], row['workout_log__date']): row['count']
+        for row in ExerciseLog.objects.filter(workout_log__completed=True).values(
+            'workout_log__user_id', 'workout_log__date'
+        ).annotate(count=Count('id')).order_by()
+    }
+    DailyActivity.objects.bulk_create([
+        DailyActivity(
+            user_id=row['user_id'],
+            date=row['date'],
+            workouts_completed=row['workouts'],
+            total_duration=row['duration'] or 0,
+            exercises_logged=exercises.get((row['user_id'], row['date']), 0),
+        )
+        for row in days.iterator()
+    ], batch_size=1000)
+
+    DailyExerciseActivity.objects.bulk_create([
+        DailyExerciseActivity(
+            user_id=row['workout_log__user_id'],
+            date=row['workout_log__date'],
+            exercise_id=row['exercise_id'],
+            times_logged=row['count'],
+        )
+        for row in ExerciseLog.objects.filter(workout_log__completed=True).values(
+            'workout_log__user_id', 'workout_log__date', 'exercise_id'
+        ).annotate(count=Count('id')).order_by().iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('workouts_completed', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('exercises_logged', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_activity')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyExerciseActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('times_logged', models.IntegerField(default=0)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workout_app.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_exercise_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date', 'exercise'), name='unique_daily_exercise_activity')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+import datetime
+
+from django.db import migrations, models
+
+
+def backfill_streaks(apps, schema_editor):
+    UserProfile = apps.get_model('workout_app', 'UserProfile')
+    DailyActivity = apps.get_model('workout_app', 'DailyActivity')
+
+    for profile in UserProfile.objects.iterator():
+        current = longest = 0
+        last_date = None
+        dates = DailyActivity.objects.filter(user_id=profile.user_id).order_by('date').values_list('date', flat=True)
+        for date in dates.iterator():
+            if last_date is not None and date - last_date == datetime.timedelta(days=1):
+                current += 1
+            else:
+                current = 1
+            longest = max(longest, current)
+            last_date = date
+
+        profile.current_streak = current
+        profile.longest_streak = longest
+        profile.last_workout_date = last_date
+        profile.save(update_fields=['current_streak', 'longest_streak', 'last_workout_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0002_daily_activity_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='current_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_workout_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='longest_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+import json
+from itertools import zip_longest
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_values(data_string, cast):
+    if not data_string:
+        return []
+    try:
+        data = json.loads(data_string)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(data, list):
+        return []
+    values = []
+    for value in data:
+        try:
+            values.append(cast(value))
+        except (TypeError, ValueError):
+            values.append(0)
+    return values
+
+
+def copy_json_sets(apps, schema_editor):
+    ExerciseLog = apps.get_model('workout_app', 'ExerciseLog')
+    ExerciseSet = apps.get_model('workout_app', 'ExerciseSet')
+
+    batch = []
+    logs = ExerciseLog.objects.exclude(
+        reps_completed__isnull=True, weight_used__isnull=True
+    ).values_list('id', 'reps_completed', 'weight_used')
+    for log_id, reps_completed, weight_used in logs.iterator(chunk_size=2000):
+        reps = parse_values(reps_completed, lambda value: int(float(value)))
+        weights = parse_values(weight_used, float)
+        for index, (rep_count, weight) in enumerate(zip_longest(reps, weights, fillvalue=0), start=1):
+            batch.append(ExerciseSet(exercise_log_id=log_id, set_number=index, reps=rep_count, weight=weight))
+        if len(batch) >= 2000:
+            ExerciseSet.objects.bulk_create(batch)
+            batch = []
+    ExerciseSet.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0003_userprofile_streaks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('set_number', models.IntegerField()),
+                ('reps', models.IntegerField(default=0)),
+                ('weight', models.FloatField(default=0)),
+                ('exercise_log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sets', to='workout_app.exerciselog')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exercise_log', 'set_number'), name='unique_exercise_set')],
+            },
+        ),
+        migrations.RunPython(copy_json_sets, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exerciselog',
+            name='reps_completed',
+        ),
+        migrations.RemoveField(
+            model_name='exerciselog',
+            name='weight_used',
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def refresh_daily_activity(apps, days):
+    # The app's refresh_daily_activity cannot be used with historical models
+    WorkoutLog = apps.get_model('workout_app', 'WorkoutLog')
+    ExerciseLog = apps.get_model('workout_app', 'ExerciseLog')
+    DailyActivity = apps.get_model('workout_app', 'DailyActivity')
+    DailyExerciseActivity = apps.get_model('workout_app', 'DailyExerciseActivity')
+
+    for user_id, date in days:
+        logs = WorkoutLog.objects.filter(user_id=user_id, date=date, completed=True)
+        totals = logs.aggregate(workouts=Count('id'), duration=Sum('duration'))
+        exercise_counts = ExerciseLog.objects.filter(workout_log__in=logs).values('exercise_id').annotate(
+            count=Count('id')
+        ).order_by()
+
+        DailyActivity.objects.filter(user_id=user_id, date=date).delete()
+        DailyExerciseActivity.objects.filter(user_id=user_id, date=date).delete()
+        if not totals['workouts']:
+            continue
+        DailyActivity.objects.create(
+            user_id=user_id,
+            date=date,
+            workouts_completed=totals['workouts'],
+            total_duration=totals['duration'] or 0,
+            exercises_logged=sum(row['count'] for row in exercise_counts),
+        )
+        DailyExerciseActivity.objects.bulk_create([
+            DailyExerciseActivity(user_id=user_id, date=date, exercise_id=row['exercise_id'], times_logged=row['count'])
+            for row in exercise_counts
+        ])
+
+
+def remove_duplicate_sessions(apps, schema_editor):
+    # Concurrent starts could create several logs for one user, day and date.
+    # Keep one per group, preferring a completed log, then the oldest.
+    WorkoutLog = apps.get_model('workout_app', 'WorkoutLog')
+
+    duplicates = WorkoutLog.objects.values('user_id', 'workout_day_id', 'date').annotate(
+        count=Count('id')
+    ).filter(count__gt=1).order_by()
+    affected_days = set()
+    for group in list(duplicates):
+        logs = WorkoutLog.objects.filter(
+            user_id=group['user_id'],
+            workout_day_id=group['workout_day_id'],
+            date=group['date'],
+        ).order_by('-completed', 'id')
+        keep = logs.values_list('id', flat=True).first()
+        logs.exclude(id=keep).delete()
+        affected_days.add((group['user_id'], group['date']))
+
+    # The rollups backfilled in 0002 still count the deleted duplicates
+    refresh_daily_activity(apps, affected_days)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Foreign keys are deferred, and ALTER TABLE below refuses to run
+        # while the deletes above still have pending trigger events
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0004_exercise_sets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workoutlog',
+            constraint=models.UniqueConstraint(fields=('user', 'workout_day', 'date'), name='unique_workout_session'),
+        ),
+    ]
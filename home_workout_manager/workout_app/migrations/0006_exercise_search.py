@@ -0,0 +1,81 @@
+from django.db import migrations
+
+FTS_TABLE = 'workout_app_exercise_fts'
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    Exercise = apps.get_model('workout_app', 'Exercise')
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+        from django.contrib.postgres.search import SearchVector
+        from django.db.models.functions import Upper
+
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.add_index(Exercise, GinIndex(
+            SearchVector('name', 'description', config='english'),
+            name='exercise_search_vector_idx'
+        ))
+        # Serves the name__icontains (UPPER(name) LIKE ...) half of the search
+        schema_editor.add_index(Exercise, GinIndex(
+            OpClass(Upper('name'), name='gin_trgm_ops'),
+            name='exercise_name_trgm_idx'
+        ))
+
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # workout_app.search falls back to substring matching
+                return
+
+        # External content table kept in step with workout_app_exercise by triggers
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "name, description, content='workout_app_exercise', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON workout_app_exercise BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); "
+            "END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON workout_app_exercise BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+            "VALUES ('delete', old.id, old.name, old.description); "
+            "END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON workout_app_exercise BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+            "VALUES ('delete', old.id, old.name, old.description); "
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); "
+            "END"
+        )
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS exercise_search_vector_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS exercise_name_trgm_idx')
+
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0005_unique_workout_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0006_exercise_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Create the composite indexes before dropping the single-column FK
+        # indexes they make redundant
+        migrations.AddIndex(
+            model_name='exerciselog',
+            index=models.Index(fields=['exercise', 'workout_log'], name='exerciselog_exercise_workout'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', 'completed', '-date'], name='workoutlog_user_completed_date'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['user', '-date'], name='workoutlog_completed_by_date'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', '-date', '-id'], name='workoutlog_user_history'),
+        ),
+        migrations.AlterField(
+            model_name='exerciselog',
+            name='exercise',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='workout_app.exercise'),
+        ),
+        migrations.AlterField(
+            model_name='workoutlog',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='workout_logs', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
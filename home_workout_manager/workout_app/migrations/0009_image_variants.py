@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout_app', '0008_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
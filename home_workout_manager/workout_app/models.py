@@ -7,23 +7,47 @@ class Exercise(models.Model):
     description = models.TextField(blank=True, null=True)
     video_url = models.URLField(blank=True, null=True)
     image = models.ImageField(upload_to='exercise_images/', blank=True, null=True)
+    # Resized copies of image, maintained by workout_app.images
+    image_variants = models.JSONField(blank=True, null=True, editable=False)
     
     def __str__(self):
         return self.name
 
+class WorkoutPlanQuerySet(models.QuerySet):
+    def with_days_and_exercise_counts(self):
+        """Prefetch each plan's workout days, annotated with their exercise count"""
+        return self.prefetch_related(
+            models.Prefetch('workout_days', queryset=WorkoutDay.objects.with_exercise_counts().order_by('id'))
+        )
+
 class WorkoutPlan(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_plans')
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
     
+    objects = WorkoutPlanQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.name} - {self.user.username}"
 
+class WorkoutDayQuerySet(models.QuerySet):
+    def with_exercise_counts(self):
+        """Annotate each day with the number of exercises in it as exercise_count"""
+        return self.annotate(exercise_count=models.Count('exercises'))
+    
+    def with_exercises(self):
+        """Prefetch each day's exercises, in order, with their Exercise rows"""
+        return self.prefetch_related(
+            models.Prefetch('exercises', queryset=WorkoutExercise.objects.select_related('exercise').order_by('order'))
+        )
+
 class WorkoutDay(models.Model):
     plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE, related_name='workout_days')
     day_name = models.CharField(max_length=20)  # e.g., "Monday", "Day 1", etc.
     
+    objects = WorkoutDayQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.plan.name} - {self.day_name}"
 
@@ -39,34 +63,151 @@ class WorkoutExercise(models.Model):
         return f"{self.exercise.name} - {self.sets}x{self.reps}"
 
 class WorkoutLog(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_logs')
+    # Indexed by the composite indexes below, which all lead with the user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_logs', db_index=False)
     workout_plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE)
     workout_day = models.ForeignKey(WorkoutDay, on_delete=models.CASCADE)
     date = models.DateField(default=timezone.now)
     completed = models.BooleanField(default=False)
     duration = models.IntegerField(default=0)  # Duration in minutes
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'workout_day', 'date'], name='unique_workout_session'),
+        ]
+        indexes = [
+            # Statistics, streaks and suggestions: a user's completed logs by date
+            models.Index(fields=['user', 'completed', '-date'], name='workoutlog_user_completed_date'),
+            models.Index(
+                fields=['user', '-date'],
+                condition=models.Q(completed=True),
+                name='workoutlog_completed_by_date'
+            ),
+            # History pages: keyset pagination over (date, id), newest first
+            models.Index(fields=['user', '-date', '-id'], name='workoutlog_user_history'),
+        ]
+    
     def __str__(self):
         return f"{self.user.username} - {self.workout_day.day_name} - {self.date}"
 
 class ExerciseLog(models.Model):
     workout_log = models.ForeignKey(WorkoutLog, on_delete=models.CASCADE, related_name='exercise_logs')
-    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    # Indexed by exerciselog_exercise_workout, which leads with the exercise
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, db_index=False)
     sets_completed = models.IntegerField(default=0)
-    reps_completed = models.TextField(blank=True, null=True)  # Store as JSON string e.g. "[10, 8, 6]"
-    weight_used = models.TextField(blank=True, null=True)  # Store as JSON string e.g. "[15, 15, 15]"
     notes = models.TextField(blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            # Exercise progress: one exercise's logs, joined to the user's workout logs
+            models.Index(fields=['exercise', 'workout_log'], name='exerciselog_exercise_workout'),
+        ]
+    
     def __str__(self):
         return f"{self.exercise.name} - {self.workout_log.date}"
 
+class ExerciseSet(models.Model):
+    exercise_log = models.ForeignKey(ExerciseLog, on_delete=models.CASCADE, related_name='sets')
+    set_number = models.IntegerField()  # 1-based position within the exercise
+    reps = models.IntegerField(default=0)
+    weight = models.FloatField(default=0)  # in kg
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exercise_log', 'set_number'], name='unique_exercise_set'),
+        ]
+    
+    def __str__(self):
+        return f"{self.exercise_log} - Set {self.set_number}: {self.reps} x {self.weight}kg"
+
+class DailyActivity(models.Model):
+    # Per-user, per-day rollup of completed workouts, maintained by workout_utils.refresh_daily_activity
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField()
+    workouts_completed = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # Duration in minutes
+    exercises_logged = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_activity'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.workouts_completed} workouts"
+
+class DailyExerciseActivity(models.Model):
+    # Per-user, per-day, per-exercise rollup used for favorite exercise statistics
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_exercise_activity')
+    date = models.DateField()
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    times_logged = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date', 'exercise'], name='unique_daily_exercise_activity'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.exercise.name}"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     height = models.FloatField(blank=True, null=True)  # in cm
     weight = models.FloatField(blank=True, null=True)  # in kg
     fitness_goal = models.CharField(max_length=100, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture_variants = models.JSONField(blank=True, null=True, editable=False)
     preferred_theme = models.CharField(max_length=10, default='light')  # 'light' or 'dark'
+    # Streak state, maintained incrementally by workout_utils.update_streak
+    current_streak = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    last_workout_date = models.DateField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"{self.user.username}'s Profile"
+
+class BackgroundJob(models.Model):
+    # A unit of work for the database-backed queue in workout_app.jobs
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)  # Registered task name
+    kwargs = models.JSONField(default=dict, blank=True)
+    # Owner of the job, who may see its status through the API
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='background_jobs', blank=True, null=True)
+    # Identifies equivalent jobs; only one job per key may be queued at a time
+    key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_key'
+            ),
+        ]
+        indexes = [
+            # Workers poll for the next due job
+            models.Index(fields=['status', 'run_after'], name='backgroundjob_due'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username}'s Profile"
\ No newline at end of file
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,118 @@
+"""
+Exercise Search
+---------------
+Ranked, paginated search over exercise names and descriptions.
+Backends:
+- PostgreSQL: full-text search with prefix matching, ranked together with
+  trigram similarity of the name (indexes from migration 0006)
+- SQLite: the FTS5 table maintained by triggers from migration 0006, ranked by bm25
+- Anything else: case-insensitive substring matching, name matches first
+
+Every backend ranks name matches above description matches.
+"""
+
+import re
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Exercise
+
+EXERCISE_FTS_TABLE = 'workout_app_exercise_fts'
+EXERCISE_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query):
+    """
+    Split a search query into the words to match.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        list: Lowercased words, at most MAX_SEARCH_TERMS of them
+    """
+    return [term.lower() for term in _TERM.findall(query or '')][:MAX_SEARCH_TERMS]
+
+
+def _postgres_results(terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    # Same expression as the GIN index, so PostgreSQL can use it
+    vector = SearchVector('name', 'description', config='english')
+    # Every term must match, the last one as a prefix so results follow typing
+    tsquery = SearchQuery(
+        ' & '.join(f"{term}:*" if index == len(terms) - 1 else term for index, term in enumerate(terms)),
+        search_type='raw',
+        config='english'
+    )
+    query = ' '.join(terms)
+    return Exercise.objects.annotate(
+        search=vector,
+        rank=SearchRank(vector, tsquery) + TrigramSimilarity('name', query)
+    ).filter(
+        Q(search=tsquery) | Q(name__icontains=query)
+    ).order_by('-rank', 'name', 'id')
+
+
+def _sqlite_result_ids(terms):
+    # Quote each term so FTS5 syntax in user input is matched literally
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+    # bm25 weights: a name match counts ten times a description match
+    sql = (
+        f"SELECT rowid FROM {EXERCISE_FTS_TABLE} WHERE {EXERCISE_FTS_TABLE} MATCH %s "
+        f"ORDER BY bm25({EXERCISE_FTS_TABLE}, 10.0, 1.0), rowid"
+    )
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [match])
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError:
+        # SQLite built without FTS5, so migration 0006 skipped the table
+        return None
+
+
+def _fallback_results(terms):
+    name_matches = Q()
+    matches = Q()
+    for term in terms:
+        name_matches &= Q(name__icontains=term)
+        matches &= Q(name__icontains=term) | Q(description__icontains=term)
+    return Exercise.objects.filter(matches).annotate(
+        name_match=Case(When(name_matches, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by('name_match', 'name', 'id')
+
+
+def search_exercises(query, page=1, page_size=EXERCISE_SEARCH_PAGE_SIZE):
+    """
+    Search the exercise catalogue, best matches first.
+
+    Args:
+        query: Search text
+        page: 1-based page number (out of range values give the nearest page)
+        page_size: Results per page
+
+    Returns:
+        Page: Paginator page of Exercise objects
+    """
+    terms = search_terms(query)
+    if not terms:
+        return Paginator(Exercise.objects.none(), page_size).get_page(1)
+
+    if connection.vendor == 'postgresql':
+        return Paginator(_postgres_results(terms), page_size).get_page(page)
+
+    if connection.vendor == 'sqlite':
+        result_ids = _sqlite_result_ids(terms)
+        if result_ids is not None:
+            # Rank over ids only, then load just the exercises on this page
+            result_page = Paginator(result_ids, page_size).get_page(page)
+            exercises = Exercise.objects.in_bulk(result_page.object_list)
+            result_page.object_list = [exercises[pk] for pk in result_page.object_list if pk in exercises]
+            return result_page
+
+    return Paginator(_fallback_results(terms), page_size).get_page(page)
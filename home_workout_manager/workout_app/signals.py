@@ -0,0 +1,121 @@
+"""
+Signal handlers that invalidate cached data when the underlying models change:
+a user's stats when their workout data changes, and the exercise catalogue
+when an exercise is added, edited or removed. Changed exercise images and
+profile pictures also queue the generation of their resized variants.
+
+Versions are bumped once the surrounding transaction commits, so a request
+reading in the meantime cannot cache pre-commit data under the new version.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalogue import bump_catalogue_version
+from .images import delete_variant_files, queue_image_variants, variant_names
+from .models import (
+    Exercise,
+    ExerciseLog,
+    ExerciseSet,
+    UserProfile,
+    WorkoutDay,
+    WorkoutExercise,
+    WorkoutLog,
+    WorkoutPlan,
+)
+from .stats_cache import bump_data_version
+
+
+def invalidate_user_stats(user_id):
+    """Bump the user's data version when the current transaction commits"""
+    transaction.on_commit(partial(bump_data_version, user_id))
+
+
+@receiver(post_save, sender=WorkoutLog)
+@receiver(post_delete, sender=WorkoutLog)
+def workout_log_changed(sender, instance, **kwargs):
+    invalidate_user_stats(instance.user_id)
+
+
+def workout_log_user_id(exercise_log):
+    """User id of an exercise log, without loading its workout log when it is not cached"""
+    if ExerciseLog.workout_log.is_cached(exercise_log):
+        return exercise_log.workout_log.user_id
+    return WorkoutLog.objects.filter(pk=exercise_log.workout_log_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=ExerciseLog)
+def exercise_log_saved(sender, instance, **kwargs):
+    invalidate_user_stats(workout_log_user_id(instance))
+
+
+# Only saves: a delete receiver would stop Django from deleting sets in bulk.
+# Bulk writes of sets bump the version in their callers.
+@receiver(post_save, sender=ExerciseSet)
+def exercise_set_saved(sender, instance, **kwargs):
+    user_id = WorkoutLog.objects.filter(exercise_logs__pk=instance.exercise_log_id).values_list(
+        'user_id', flat=True
+    ).first()
+    invalidate_user_stats(user_id)
+
+
+@receiver(post_delete, sender=ExerciseLog)
+def exercise_log_deleted(sender, instance, origin=None, **kwargs):
+    # Deletes cascading through a workout log are covered by that log's own
+    # signal; only direct deletes and deleted exercises need a lookup here
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model not in (ExerciseLog, Exercise):
+        return
+    invalidate_user_stats(workout_log_user_id(instance))
+
+
+# Workout suggestions are drawn from the user's plans and days
+@receiver(post_save, sender=WorkoutPlan)
+@receiver(post_delete, sender=WorkoutPlan)
+def workout_plan_changed(sender, instance, **kwargs):
+    invalidate_user_stats(instance.user_id)
+
+
+@receiver(post_save, sender=WorkoutDay)
+@receiver(post_delete, sender=WorkoutDay)
+def workout_day_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, WorkoutPlan):
+        return
+    invalidate_user_stats(instance.plan.user_id)
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def workout_exercise_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (WorkoutPlan, WorkoutDay)):
+        return
+    invalidate_user_stats(instance.workout_day.plan.user_id)
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def exercise_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_image_saved(sender, instance, **kwargs):
+    queue_image_variants(instance, 'image')
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_picture_saved(sender, instance, **kwargs):
+    queue_image_variants(instance, 'profile_picture')
+
+
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=UserProfile)
+def image_owner_deleted(sender, instance, **kwargs):
+    field = 'image' if sender is Exercise else 'profile_picture'
+    names = variant_names(getattr(instance, f"{field}_variants"))
+    if names:
+        transaction.on_commit(partial(delete_variant_files, getattr(instance, field).storage, names))
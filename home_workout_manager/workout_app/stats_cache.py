@@ -0,0 +1,193 @@
+"""
+Stats Cache
+-----------
+Per-user caching for the statistics derived from a user's workout history.
+Features include:
+- A per-user data version, bumped by signals whenever workout data changes
+- Cache keys built from (user, data version, date, function, arguments), so a
+  write invalidates every cached entry of that user and nobody else's
+- Cached wrappers for the advanced stats page helpers
+- Rendered template fragments cached the same way, so repeat page views skip
+  both the queries and the rendering behind them
+
+Entries left behind by an old data version are never read again and simply
+expire. Configure the cache alias and timeout with the STATS_CACHE setting.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import Exercise
+from .workout_utils import get_user_stats, rank_workout_suggestions
+
+DEFAULT_STATS_CACHE_SETTINGS = {
+    'ALIAS': 'default',  # Cache alias used for stats entries and data versions
+    'TIMEOUT': 60 * 60 * 24,  # Lifetime of a cached entry in seconds
+}
+
+# Periods in days offered by the advanced stats page, so each user has a
+# bounded number of cached stats entries and warm-up jobs
+STATS_PERIODS = (7, 30, 90, 180, 365)
+DEFAULT_STATS_PERIOD = 30
+
+
+def get_stats_cache_settings():
+    """
+    Get the STATS_CACHE settings merged over the defaults.
+
+    Returns:
+        dict: Effective stats cache settings
+    """
+    return {**DEFAULT_STATS_CACHE_SETTINGS, **getattr(settings, 'STATS_CACHE', {})}
+
+
+def get_stats_cache():
+    return caches[get_stats_cache_settings()['ALIAS']]
+
+
+def _version_key(user_id):
+    return f"stats:{user_id}:version"
+
+
+def _initial_version():
+    # Time based, so a version key lost to eviction never restarts at a number
+    # whose entries may still be cached
+    return time.time_ns() // 1000
+
+
+def get_data_version(user_id):
+    """
+    Get the current data version for a user.
+
+    Args:
+        user_id: Primary key of the user
+
+    Returns:
+        int: Data version to include in the user's cache keys
+    """
+    cache = get_stats_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Another process may set the version between get and add, so read it back
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key, _initial_version())
+    return version
+
+
+def bump_data_version(user_id):
+    """
+    Invalidate every cached stats entry of a user.
+
+    Args:
+        user_id: Primary key of the user
+    """
+    cache = get_stats_cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def cached_for_user(user, name, compute, *args):
+    """
+    Return a cached value for the user's current data version, computing it on a miss.
+
+    Args:
+        user: The User object
+        name: Name of the cached computation
+        compute: Callable producing the value on a cache miss
+        *args: Arguments the value depends on, included in the key
+
+    Returns:
+        The cached or freshly computed value
+    """
+    cache = get_stats_cache()
+    key = _entry_key(user, name, args)
+
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, get_stats_cache_settings()['TIMEOUT'])
+    return value
+
+
+def _entry_key(user, name, args):
+    # Streaks and suggestions depend on today's date as well as on the data
+    today = timezone.now().date().isoformat()
+    parts = ':'.join(str(arg) for arg in args)
+    return f"stats:{user.pk}:{get_data_version(user.pk)}:{today}:{name}:{parts}"
+
+
+def peek_cached_for_user(user, name, *args):
+    """
+    Return a cached value for the user's current data version without computing it.
+
+    Args:
+        user: The User object
+        name: Name of the cached computation
+        *args: Arguments the value depends on
+
+    Returns:
+        The cached value, or None on a miss
+    """
+    return get_stats_cache().get(_entry_key(user, name, args))
+
+
+def get_user_fragment(user, name, render, *args):
+    """
+    Return a rendered template fragment for the user's current data version, rendering it on a miss.
+
+    Args:
+        user: The User object
+        name: Name of the fragment
+        render: Callable returning the rendered HTML; it should do the queries
+                the fragment needs, so a hit skips them too
+        *args: Arguments the fragment depends on, included in the key
+
+    Returns:
+        str: Rendered HTML
+    """
+    return cached_for_user(user, f"fragment:{name}", render, *args)
+
+
+def user_data_etag(request, *args, **kwargs):
+    """ETag for a response built only from the requesting user's workout data"""
+    return f"data-{request.user.pk}-{get_data_version(request.user.pk)}-{timezone.now().date().isoformat()}"
+
+
+def get_cached_user_stats(user, days=30):
+    """Cached get_user_stats"""
+    return cached_for_user(user, 'user_stats', lambda: get_user_stats(user, days=days), days)
+
+
+def peek_cached_user_stats(user, days=30):
+    """get_cached_user_stats, or None when it is not cached yet"""
+    return peek_cached_for_user(user, 'user_stats', days)
+
+
+def get_cached_workout_suggestions(user, limit=3):
+    """Cached rank_workout_suggestions"""
+    return cached_for_user(user, 'suggestions', lambda: rank_workout_suggestions(user, limit=limit), limit)
+
+
+def get_cached_logged_exercises(user):
+    """
+    Get the exercises a user has logged in completed workouts, cached.
+
+    Args:
+        user: The User object
+
+    Returns:
+        list: Distinct Exercise objects ordered by name
+    """
+    return cached_for_user(user, 'logged_exercises', lambda: list(
+        Exercise.objects.filter(
+            exerciselog__workout_log__user=user,
+            exerciselog__workout_log__completed=True
+        ).distinct().order_by('name')
+    ))
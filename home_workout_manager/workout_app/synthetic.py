@@ -0,0 +1,212 @@
+"""
+Synthetic Workout Data
+----------------------
+Deterministic generation of realistic workout histories for benchmarking.
+Features include:
+- A shared catalogue of synthetic exercises
+- Users with plans, days and per-day exercise lists
+- Multi-year workout logs with per-set reps and progressively heavier weights
+- Rebuilt daily activity rollups and streaks for every generated user
+
+The same seed, volumes and end date always produce the same data.
+"""
+
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Exercise,
+    WorkoutPlan,
+    WorkoutDay,
+    WorkoutExercise,
+    WorkoutLog,
+    ExerciseLog,
+    ExerciseSet,
+    UserProfile
+)
+from .workout_utils import refresh_daily_activity, rebuild_streak
+
+SYNTHETIC_EXERCISE_PREFIX = 'Synthetic Exercise'
+LOG_BATCH_SIZE = 500
+
+MUSCLE_GROUPS = ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
+MOVEMENTS = ['press', 'row', 'squat', 'curl', 'raise', 'lunge', 'pull', 'hold']
+
+
+def get_synthetic_exercises(count, rng):
+    """
+    Get or create the shared catalogue of synthetic exercises.
+
+    Args:
+        count: Number of exercises in the catalogue
+        rng: random.Random used for descriptions
+
+    Returns:
+        list: Exercise objects ordered by their number
+    """
+    names = [f"{SYNTHETIC_EXERCISE_PREFIX} {index:04d}" for index in range(count)]
+    descriptions = [
+        f"{rng.choice(MUSCLE_GROUPS).title()} {rng.choice(MOVEMENTS)} variation number {index}"
+        for index in range(count)
+    ]
+    existing = set(Exercise.objects.filter(name__in=names).values_list('name', flat=True))
+    Exercise.objects.bulk_create([
+        Exercise(name=name, description=description)
+        for name, description in zip(names, descriptions)
+        if name not in existing
+    ], batch_size=1000)
+
+    exercises = {exercise.name: exercise for exercise in Exercise.objects.filter(name__in=names)}
+    return [exercises[name] for name in names]
+
+
+def generate_user_history(username, exercises, rng, plans=2, days_per_plan=4, exercises_per_day=5,
+                          years=2, workouts_per_week=4, end_date=None):
+    """
+    Create a user with plans and a workout history ending on `end_date`.
+
+    Args:
+        username: Username of the user to create
+        exercises: Exercise catalogue to draw from
+        rng: random.Random driving every choice
+        plans: Workout plans per user
+        days_per_plan: Workout days per plan
+        exercises_per_day: Exercises per workout day
+        years: Length of the workout history in years
+        workouts_per_week: Average number of workouts per week
+        end_date: Date of the most recent possible workout (default today)
+
+    Returns:
+        dict: Counts of the created plans, days, logs, exercise logs and sets
+    """
+    end_date = end_date or timezone.now().date()
+    counts = {'plans': 0, 'days': 0, 'workout_logs': 0, 'exercise_logs': 0, 'sets': 0}
+
+    with transaction.atomic():
+        user = User.objects.create_user(username)
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+        UserProfile.objects.create(
+            user=user,
+            height=round(rng.uniform(155, 195), 1),
+            weight=round(rng.uniform(55, 100), 1)
+        )
+
+        day_exercises = {}
+        for plan_index in range(plans):
+            plan = WorkoutPlan.objects.create(user=user, name=f"Plan {plan_index + 1}")
+            counts['plans'] += 1
+            for day_index in range(days_per_plan):
+                day = WorkoutDay.objects.create(plan=plan, day_name=f"Day {day_index + 1}")
+                chosen = rng.sample(exercises, min(exercises_per_day, len(exercises)))
+                WorkoutExercise.objects.bulk_create([
+                    WorkoutExercise(workout_day=day, exercise=exercise, sets=rng.randint(3, 5), order=order)
+                    for order, exercise in enumerate(chosen)
+                ])
+                day_exercises[day] = chosen
+                counts['days'] += 1
+
+        workout_days = list(day_exercises)
+        # Starting weight per exercise, increased slowly over the whole history
+        base_weights = {exercise.pk: rng.choice(range(5, 80, 5)) for exercise in exercises}
+        total_days = years * 365
+        start_date = end_date - datetime.timedelta(days=total_days - 1)
+
+        pending = []
+        for offset in range(total_days):
+            if rng.random() < workouts_per_week / 7:
+                pending.append((start_date + datetime.timedelta(days=offset), offset / total_days))
+            if len(pending) == LOG_BATCH_SIZE or (offset == total_days - 1 and pending):
+                _create_logs(user, pending, workout_days, day_exercises, base_weights, rng, counts)
+                pending = []
+
+    refresh_daily_activity(user)
+    rebuild_streak(user)
+    return counts
+
+
+def _create_logs(user, pending, workout_days, day_exercises, base_weights, rng, counts):
+    # One bulk insert per table for a batch of workout dates
+    workout_logs = []
+    for index, (date, _progress) in enumerate(pending):
+        day = workout_days[(counts['workout_logs'] + index) % len(workout_days)]
+        workout_logs.append(WorkoutLog(
+            user=user,
+            workout_plan_id=day.plan_id,
+            workout_day=day,
+            date=date,
+            completed=rng.random() < 0.95,
+            duration=rng.randint(20, 90)
+        ))
+    WorkoutLog.objects.bulk_create(workout_logs)
+
+    exercise_logs = []
+    planned_sets = []
+    for workout_log, (_date, progress) in zip(workout_logs, pending):
+        for exercise in day_exercises[workout_log.workout_day]:
+            set_count = rng.randint(3, 5)
+            exercise_log = ExerciseLog(workout_log=workout_log, exercise=exercise, sets_completed=set_count)
+            exercise_logs.append(exercise_log)
+            weight = base_weights[exercise.pk] * (1 + progress)
+            planned_sets.append((exercise_log, [
+                (rng.randint(6, 12), round(weight + rng.choice([-2.5, 0, 0, 2.5]), 1))
+                for _ in range(set_count)
+            ]))
+    ExerciseLog.objects.bulk_create(exercise_logs)
+
+    exercise_sets = [
+        ExerciseSet(exercise_log=exercise_log, set_number=number, reps=reps, weight=max(weight, 0))
+        for exercise_log, sets in planned_sets
+        for number, (reps, weight) in enumerate(sets, start=1)
+    ]
+    ExerciseSet.objects.bulk_create(exercise_sets, batch_size=1000)
+
+    counts['workout_logs'] += len(workout_logs)
+    counts['exercise_logs'] += len(exercise_logs)
+    counts['sets'] += len(exercise_sets)
+
+
+def generate_synthetic_data(users=3, exercises=200, seed=42, username_prefix='synthetic', **volumes):
+    """
+    Generate a full synthetic data set.
+
+    Args:
+        users: Number of users to create
+        exercises: Size of the synthetic exercise catalogue
+        seed: Random seed; the same seed reproduces the same data
+        username_prefix: Prefix of the generated usernames
+        **volumes: Per-user volumes passed on to generate_user_history
+
+    Returns:
+        dict: Mapping of username to the counts created for that user
+    """
+    rng = random.Random(seed)
+    catalogue = get_synthetic_exercises(exercises, rng)
+    return {
+        f"{username_prefix}{index + 1}": generate_user_history(
+            f"{username_prefix}{index + 1}", catalogue, rng, **volumes
+        )
+        for index in range(users)
+    }
+
+
+def delete_synthetic_data(username_prefix='synthetic'):
+    """
+    Delete previously generated users (and everything they own) and the synthetic catalogue.
+
+    Args:
+        username_prefix: Prefix of the generated usernames
+
+    Returns:
+        int: Number of users deleted
+    """
+    users = User.objects.filter(username__startswith=username_prefix, profile__isnull=False)
+    count = users.count()
+    with transaction.atomic():
+        users.delete()
+        Exercise.objects.filter(name__startswith=SYNTHETIC_EXERCISE_PREFIX).delete()
+    return count
@@ -0,0 +1,68 @@
+"""
+Background tasks for the job queue in workout_app.jobs, moving expensive
+recomputation off the request path.
+"""
+
+import datetime
+
+from django.contrib.auth.models import User
+
+from .jobs import background_task, enqueue
+from .signals import invalidate_user_stats
+from .stats_cache import get_cached_user_stats, get_cached_logged_exercises, get_cached_workout_suggestions
+from .workout_utils import get_user_profile, refresh_daily_activity, rebuild_streak
+
+
+def _get_user(user_id):
+    return User.objects.select_related('profile').filter(pk=user_id).first()
+
+
+@background_task
+def warm_stats_cache(user_id, days=30):
+    """
+    Compute and cache the statistics shown on the advanced stats page.
+
+    Args:
+        user_id: Primary key of the user
+        days: Statistics period in days
+
+    Returns:
+        dict: Summary of the cached statistics, or None if the user is gone
+    """
+    user = _get_user(user_id)
+    if user is None:
+        return None
+
+    stats = get_cached_user_stats(user, days=days)
+    get_cached_workout_suggestions(user)
+    get_cached_logged_exercises(user)
+    return {'days': days, 'total_workouts': stats['total_workouts']}
+
+
+@background_task
+def rebuild_user_rollups(user_id, dates=None):
+    """
+    Rebuild a user's daily activity rollup and streak from the raw logs.
+
+    Args:
+        user_id: Primary key of the user
+        dates: ISO dates to recompute (default None rebuilds every day)
+
+    Returns:
+        dict: The user's streak after the rebuild, or None if the user is gone
+    """
+    user = _get_user(user_id)
+    if user is None:
+        return None
+
+    refresh_daily_activity(user, None if dates is None else [datetime.date.fromisoformat(date) for date in dates])
+    rebuild_streak(user)
+    # Stats cached from the stale rollup before this job ran must not be served
+    invalidate_user_stats(user.pk)
+    profile = get_user_profile(user)
+    return {'current_streak': profile.current_streak, 'longest_streak': profile.longest_streak}
+
+
+def enqueue_stats_warmup(user, days=30):
+    """Queue warm_stats_cache for a user, unless an equivalent job is already waiting"""
+    return enqueue(warm_stats_cache, user=user, key=f"warm_stats_cache:{user.pk}:{days}", user_id=user.pk, days=days)
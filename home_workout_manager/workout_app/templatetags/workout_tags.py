@@ -4,8 +4,9 @@ Custom template tags for Workout App
 
 from django import template
 from django.utils import timezone
-import json
-from workout_app.workout_utils import calculate_bmi, get_bmi_category, format_duration, parse_reps_or_weights
+from django.utils.html import format_html
+from workout_app.images import build_srcset
+from workout_app.workout_utils import calculate_bmi, get_bmi_category, format_duration, suggest_workout
 
 register = template.Library()
 
@@ -24,16 +25,6 @@ def format_mins(minutes):
     """Format minutes to human-readable duration"""
     return format_duration(minutes)
 
-@register.filter
-def parse_json(json_string):
-    """Parse JSON string to Python object"""
-    if not json_string:
-        return []
-    try:
-        return json.loads(json_string)
-    except json.JSONDecodeError:
-        return []
-
 @register.simple_tag
 def streak_class(streak_count):
     """Return CSS class based on streak count"""
@@ -48,8 +39,7 @@ def streak_class(streak_count):
 
 @register.simple_tag
 def workout_suggestion(user):
-    """Get workout suggestion for user"""
-    from workout_app.workout_utils import suggest_workout
+    """Get workout suggestion for user (computed once per request)"""
     suggestion = suggest_workout(user)
     if suggestion:
         return suggestion
@@ -69,4 +59,29 @@ def absolute(value):
     try:
         return abs(value)
     except (ValueError, TypeError):
-        return value
\ No newline at end of file
+        return value
+
+@register.simple_tag
+def responsive_image(image, variants, sizes, alt='', css_class='', style=''):
+    """
+    Render an image as a <picture> serving its resized variants through srcset,
+    or as a plain <img> of the original until the variants are generated
+    """
+    if (variants or {}).get('source') != image.name:
+        # Variants of a replaced image must not be served for the new one
+        variants = None
+    webp_srcset = build_srcset(variants, 'webp', image.storage)
+    jpeg_srcset = build_srcset(variants, 'jpeg', image.storage)
+    if not jpeg_srcset:
+        return format_html(
+            '<img src="{}" class="{}" style="{}" alt="{}" loading="lazy" decoding="async">',
+            image.url, css_class, style, alt
+        )
+
+    largest = max((v for v in variants['variants'] if v['format'] == 'jpeg'), key=lambda v: v['width'])
+    source = format_html('<source type="image/webp" srcset="{}" sizes="{}">', webp_srcset, sizes) if webp_srcset else ''
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" class="{}" style="{}" alt="{}" '
+        'loading="lazy" decoding="async"></picture>',
+        source, image.storage.url(largest['name']), jpeg_srcset, sizes, css_class, style, alt
+    )
\ No newline at end of file
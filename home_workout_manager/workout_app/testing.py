@@ -0,0 +1,82 @@
+"""
+Test helpers for enforcing query budgets and checking query plans.
+
+Example:
+    class DashboardTests(QueryBudgetTestMixin, TestCase):
+        def test_dashboard(self):
+            with self.assertQueryBudget(10):
+                self.client.get(reverse('dashboard'))
+"""
+
+from contextlib import contextmanager
+
+from django.db import connections
+
+from .middleware import QueryRecorder, get_query_budget_settings
+
+
+@contextmanager
+def record_queries(using='default'):
+    """
+    Record every statement executed on a connection inside the block.
+
+    Args:
+        using: Database alias to record (default 'default')
+
+    Yields:
+        QueryRecorder: Recorder holding the executed statements
+    """
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+
+
+def explain_query(query, using='default'):
+    """
+    Get the database's plan for a recorded query.
+
+    On PostgreSQL sequential scans are disabled first, so small test tables
+    still show which index the planner would pick for real data volumes.
+
+    Args:
+        query: Recorded query dict with 'sql' and 'params'
+        using: Database alias the query ran on (default 'default')
+
+    Returns:
+        str: Query plan, one step per line
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'], query['params'])
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN ' + query['sql'], query['params'])
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin adding query budget and N+1 assertions"""
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, n_plus_one_threshold=None, using='default'):
+        """
+        Fail if the block runs more than `max_queries` queries or repeats a query shape.
+
+        Args:
+            max_queries: Maximum number of queries allowed
+            n_plus_one_threshold: Repeats of one shape that count as N+1
+                (default from the QUERY_BUDGET setting)
+            using: Database alias to record (default 'default')
+        """
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = get_query_budget_settings()['N_PLUS_ONE_THRESHOLD']
+
+        with record_queries(using) as recorder:
+            yield recorder
+
+        problems = recorder.problems(max_queries, n_plus_one_threshold)
+        if problems:
+            executed = '\n'.join(f"{index}. {query['sql']}" for index, query in enumerate(recorder.queries, start=1))
+            self.fail('\n'.join(problems) + f"\n\nQueries executed:\n{executed}")
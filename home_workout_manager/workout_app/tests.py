@@ -1,3 +1,1489 @@
-from django.test import TestCase
+import csv
+import datetime
+import importlib
+import io
+import json
+import re
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .charts import lttb
+from .export import stream_export
+from .images import build_srcset
+from .importer import import_history
+from .jobs import background_task, claim_job, enqueue, requeue_stale_jobs, run_job, run_pending_jobs
+from .memo import request_memo
+from .middleware import QueryBudgetExceeded, QueryBudgetMiddleware, normalize_sql, query_budget
+from .models import (
+    Exercise,
+    WorkoutPlan,
+    WorkoutDay,
+    WorkoutExercise,
+    WorkoutLog,
+    ExerciseLog,
+    ExerciseSet,
+    UserProfile,
+    BackgroundJob,
+    DailyActivity,
+    DailyExerciseActivity
+)
+from .search import search_exercises
+from .stats_cache import get_data_version
+from .synthetic import delete_synthetic_data, generate_synthetic_data
+from .testing import QueryBudgetTestMixin, explain_query, record_queries
+from .workout_utils import (
+    build_exercise_sets,
+    complete_workout,
+    get_progress_summary,
+    refresh_daily_activity,
+    rebuild_streak,
+    update_streak,
+    calculate_streak,
+    get_exercise_progress,
+    decode_history_cursor,
+    encode_history_cursor,
+    get_workout_history_page,
+    get_django_weekday,
+    rank_workout_suggestions,
+    suggest_workout
+)
+from .templatetags.workout_tags import responsive_image
+
+
+def create_workout_history(user, plans=2, days_per_plan=3, exercises_per_day=4, logged_days=40):
+    """Create plans, days, exercises and a completed log per day for `user`"""
+    exercises = [Exercise.objects.create(name=f"Exercise {index}") for index in range(exercises_per_day)]
+    workout_days = []
+    for plan_index in range(plans):
+        plan = WorkoutPlan.objects.create(user=user, name=f"Plan {plan_index}")
+        for day_index in range(days_per_plan):
+            day = WorkoutDay.objects.create(plan=plan, day_name=f"Day {day_index}")
+            workout_days.append(day)
+            for order, exercise in enumerate(exercises):
+                WorkoutExercise.objects.create(workout_day=day, exercise=exercise, order=order)
+
+    today = timezone.now().date()
+    for offset in range(logged_days):
+        day = workout_days[offset % len(workout_days)]
+        workout_log = WorkoutLog.objects.create(
+            user=user,
+            workout_plan=day.plan,
+            workout_day=day,
+            date=today - datetime.timedelta(days=offset),
+            completed=True,
+            duration=45
+        )
+        for exercise in exercises:
+            exercise_log = ExerciseLog.objects.create(workout_log=workout_log, exercise=exercise, sets_completed=3)
+            ExerciseSet.objects.bulk_create([
+                ExerciseSet(exercise_log=exercise_log, set_number=number, reps=10, weight=20)
+                for number in range(1, 4)
+            ])
+
+    refresh_daily_activity(user)
+    rebuild_streak(user)
+    return workout_days
+
+
+@background_task(name='tests.flaky', max_attempts=2)
+def flaky_task(fail):
+    """Background task for the job queue tests"""
+    WorkoutPlan.objects.create(user_id=User.objects.get(username='athlete').pk, name='Written by a job')
+    if fail:
+        raise RuntimeError('Task failed')
+    return {'ok': True}
+
+
+class StreakTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.plan = WorkoutPlan.objects.create(user=self.user, name='Plan')
+        self.day = WorkoutDay.objects.create(plan=self.plan, day_name='Day')
+        self.today = timezone.now().date()
+
+    def complete(self, days_ago):
+        date = self.today - datetime.timedelta(days=days_ago)
+        WorkoutLog.objects.create(
+            user=self.user, workout_plan=self.plan, workout_day=self.day, date=date, completed=True
+        )
+        update_streak(self.user, date)
+
+    def streaks(self):
+        profile = UserProfile.objects.get(user=self.user)
+        return profile.current_streak, profile.longest_streak
+
+    def test_consecutive_days_extend_the_streak(self):
+        for days_ago in (2, 1, 0):
+            self.complete(days_ago)
+        self.assertEqual(self.streaks(), (3, 3))
+        self.assertEqual(calculate_streak(self.user), 3)
+
+    def test_gap_restarts_the_streak(self):
+        for days_ago in (5, 4, 3, 0):
+            self.complete(days_ago)
+        self.assertEqual(self.streaks(), (1, 3))
+
+    def test_same_day_twice_counts_once(self):
+        self.complete(1)
+        update_streak(self.user, self.today - datetime.timedelta(days=1))
+        self.complete(0)
+        self.assertEqual(self.streaks(), (2, 2))
+
+    def test_backdated_workout_rebuilds_the_streak(self):
+        for days_ago in (2, 0):
+            self.complete(days_ago)
+        self.assertEqual(self.streaks(), (1, 1))
+        # Filling the gap joins both days into one streak
+        self.complete(1)
+        self.assertEqual(self.streaks(), (3, 3))
+
+    def test_rebuild_matches_incremental_updates(self):
+        for days_ago in (9, 8, 7, 3, 2, 1, 0):
+            self.complete(days_ago)
+        incremental = self.streaks()
+        UserProfile.objects.filter(user=self.user).update(current_streak=0, longest_streak=0, last_workout_date=None)
+        rebuild_streak(User.objects.get(pk=self.user.pk))
+        self.assertEqual(self.streaks(), incremental)
+        self.assertEqual(incremental, (4, 4))
+
+    def test_users_without_a_profile(self):
+        admin = User.objects.create_superuser('admin', password='password')
+        self.assertEqual(calculate_streak(admin), 0)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+        # The rebuild command creates the missing profile instead of skipping the user
+        call_command('rebuild_workout_stats', '--user', 'admin', stdout=io.StringIO())
+        self.assertTrue(UserProfile.objects.filter(user=admin).exists())
+
+
+class DailyActivityRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.days = create_workout_history(self.user, plans=1, days_per_plan=2, exercises_per_day=3, logged_days=0)
+        self.today = timezone.now().date()
+
+    def complete(self, day, duration):
+        workout_log = WorkoutLog.objects.create(user=self.user, workout_plan=day.plan, workout_day=day, date=self.today)
+        entries = []
+        for workout_exercise in day.exercises.all():
+            exercise_log = ExerciseLog.objects.create(workout_log=workout_log, exercise=workout_exercise.exercise)
+            entries.append((exercise_log, {
+                'sets_completed': 2, 'reps_completed': [10, 8], 'weight_used': [20, 20], 'notes': ''
+            }))
+        complete_workout(workout_log, entries, duration)
+        return workout_log
+
+    def totals(self):
+        activity = DailyActivity.objects.get(user=self.user, date=self.today)
+        return activity.workouts_completed, activity.total_duration, activity.exercises_logged
+
+    def test_completed_workouts_are_rolled_up(self):
+        self.complete(self.days[0], 30)
+        self.assertEqual(self.totals(), (1, 30, 3))
+
+        self.complete(self.days[1], 45)
+        self.assertEqual(self.totals(), (2, 75, 6))
+        self.assertEqual(
+            set(DailyExerciseActivity.objects.filter(user=self.user, date=self.today).values_list('times_logged', flat=True)),
+            {2}
+        )
+
+    def test_edited_and_deleted_workouts_are_refreshed(self):
+        first = self.complete(self.days[0], 30)
+        second = self.complete(self.days[1], 45)
+        yesterday = DailyActivity.objects.create(user=self.user, date=self.today - datetime.timedelta(days=1))
+
+        WorkoutLog.objects.filter(pk=first.pk).update(duration=60)
+        refresh_daily_activity(self.user, [self.today])
+        self.assertEqual(self.totals(), (2, 105, 6))
+
+        first.delete()
+        refresh_daily_activity(self.user, [self.today])
+        self.assertEqual(self.totals(), (1, 45, 3))
+
+        second.delete()
+        refresh_daily_activity(self.user, [self.today])
+        self.assertFalse(DailyActivity.objects.filter(user=self.user, date=self.today).exists())
+        self.assertFalse(DailyExerciseActivity.objects.filter(user=self.user).exists())
+        # Days outside the refreshed dates are left alone
+        self.assertTrue(DailyActivity.objects.filter(pk=yesterday.pk).exists())
+
+
+class ProgressSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete')
+        self.today = timezone.now().date()
+
+    def test_user_without_workouts_gets_zeros(self):
+        with self.assertNumQueries(2):
+            summary = get_progress_summary(self.user)
+        self.assertEqual(
+            (summary['workouts_this_week'], summary['workouts_this_month'], summary['total_workouts'],
+             summary['total_duration'], summary['avg_duration']),
+            (0, 0, 0, 0, 0)
+        )
+        self.assertEqual(summary['workout_distribution'], [0] * 7)
+
+    def test_week_and_month_boundaries(self):
+        start_of_week = self.today - datetime.timedelta(days=self.today.weekday())
+        start_of_month = self.today.replace(day=1)
+        # One power of two per day, so every sum shows exactly which days it counted
+        dates = [
+            start_of_week,
+            start_of_week - datetime.timedelta(days=1),
+            start_of_month,
+            start_of_month - datetime.timedelta(days=1),
+        ]
+        rows = {}
+        for index, date in enumerate(dates):
+            rows[date] = rows.get(date, 0) + 2 ** index
+        for date, workouts in rows.items():
+            DailyActivity.objects.create(user=self.user, date=date, workouts_completed=workouts, total_duration=workouts)
+
+        summary = get_progress_summary(self.user)
+        self.assertEqual(summary['workouts_this_week'], sum(w for d, w in rows.items() if d >= start_of_week))
+        self.assertEqual(summary['workouts_this_month'], sum(w for d, w in rows.items() if d >= start_of_month))
+        self.assertEqual(summary['total_workouts'], 15)
+        self.assertEqual(
+            summary['workout_distribution'],
+            [sum(w for d, w in rows.items() if d.weekday() == weekday) for weekday in range(7)]
+        )
+
+
+class HistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete')
+        days = create_workout_history(self.user, plans=1, days_per_plan=3, logged_days=0)
+        today = timezone.now().date()
+        # Three sessions share today's date, so pages must break ties on the id
+        for offset, day_count in ((0, 3), (1, 2)):
+            for day in days[:day_count]:
+                workout_log = WorkoutLog.objects.create(
+                    user=self.user, workout_plan=day.plan, workout_day=day,
+                    date=today - datetime.timedelta(days=offset), completed=True
+                )
+                exercise_log = ExerciseLog.objects.create(workout_log=workout_log, exercise=Exercise.objects.first())
+                ExerciseSet.objects.create(exercise_log=exercise_log, set_number=1, reps=10)
+        self.expected = list(WorkoutLog.objects.filter(user=self.user).order_by('-date', '-id').values_list('id', flat=True))
+
+    def test_cursor_round_trip(self):
+        workout_log = WorkoutLog.objects.get(pk=self.expected[0])
+        cursor = encode_history_cursor(workout_log)
+        self.assertEqual(decode_history_cursor(cursor), (workout_log.date, workout_log.pk))
+
+    def test_invalid_cursors_are_ignored(self):
+        for cursor in (None, '', 'garbage', '2026-13-01_5', '2026-01-01_x', '2026-01-01_0', '2026-01-01_' + '9' * 30):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_history_cursor(cursor))
+                page = get_workout_history_page(self.user, cursor=cursor, page_size=2)
+                self.assertEqual([log.pk for log in page['logs']], self.expected[:2])
+
+    def test_pages_cover_every_log_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            with self.assertNumQueries(3):
+                page = get_workout_history_page(self.user, cursor=cursor, page_size=2)
+            seen.extend(log.pk for log in page['logs'])
+            pages += 1
+            if not page['has_more']:
+                self.assertIsNone(page['next_cursor'])
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_forged_cursor_only_returns_own_logs(self):
+        other = User.objects.create_user('other')
+        create_workout_history(other, plans=1, days_per_plan=1, logged_days=3)
+        foreign_log = WorkoutLog.objects.filter(user=other).order_by('date').first()
+        page = get_workout_history_page(self.user, cursor=encode_history_cursor(foreign_log))
+        self.assertTrue(all(log.user_id == self.user.pk for log in page['logs']))
+        self.assertEqual(
+            [log.pk for log in page['logs']],
+            [pk for pk in self.expected if (WorkoutLog.objects.get(pk=pk).date, pk) < (foreign_log.date, foreign_log.pk)]
+        )
+
+
+class DataMigrationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        create_workout_history(self.user, plans=1, days_per_plan=2, exercises_per_day=4, logged_days=2)
+        self.today = timezone.now().date()
+
+    def test_duplicate_removal_refreshes_rollups(self):
+        migration = importlib.import_module('workout_app.migrations.0005_unique_workout_session')
+        # Rollups as backfilled before the duplicates were deleted
+        DailyActivity.objects.filter(user=self.user, date=self.today).update(
+            workouts_completed=2, total_duration=90, exercises_logged=8
+        )
+        DailyExerciseActivity.objects.filter(user=self.user, date=self.today).update(times_logged=2)
+        emptied = self.today - datetime.timedelta(days=1)
+        WorkoutLog.objects.filter(user=self.user, date=emptied).delete()
+
+        migration.refresh_daily_activity(apps, {(self.user.pk, self.today), (self.user.pk, emptied)})
+
+        activity = DailyActivity.objects.get(user=self.user, date=self.today)
+        self.assertEqual((activity.workouts_completed, activity.total_duration, activity.exercises_logged), (1, 45, 4))
+        self.assertEqual(
+            set(DailyExerciseActivity.objects.filter(user=self.user, date=self.today).values_list('times_logged', flat=True)),
+            {1}
+        )
+        self.assertFalse(DailyActivity.objects.filter(user=self.user, date=emptied).exists())
+        self.assertFalse(DailyExerciseActivity.objects.filter(user=self.user, date=emptied).exists())
+
+
+class MigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_json_sets_are_copied(self):
+        old_apps = self.migrate([('workout_app', '0003_userprofile_streaks')])
+        user = old_apps.get_model('auth', 'User').objects.create(username='athlete')
+        plan = old_apps.get_model('workout_app', 'WorkoutPlan').objects.create(user=user, name='Plan')
+        day = old_apps.get_model('workout_app', 'WorkoutDay').objects.create(plan=plan, day_name='Monday')
+        exercise = old_apps.get_model('workout_app', 'Exercise').objects.create(name='Squat')
+        workout_log = old_apps.get_model('workout_app', 'WorkoutLog').objects.create(
+            user=user, workout_plan=plan, workout_day=day, date=datetime.date(2026, 1, 5), completed=True
+        )
+        ExerciseLog = old_apps.get_model('workout_app', 'ExerciseLog')
+        full = ExerciseLog.objects.create(
+            workout_log=workout_log, exercise=exercise, reps_completed='[10, "8", 6.0]', weight_used='[20, 22.5]'
+        )
+        broken = ExerciseLog.objects.create(
+            workout_log=workout_log, exercise=exercise, reps_completed='not json', weight_used='{"a": 1}'
+        )
+
+        new_apps = self.migrate([('workout_app', '0004_exercise_sets')])
+        ExerciseSet = new_apps.get_model('workout_app', 'ExerciseSet')
+        self.assertEqual(
+            list(ExerciseSet.objects.filter(exercise_log_id=full.pk).order_by('set_number').values_list(
+                'set_number', 'reps', 'weight'
+            )),
+            [(1, 10, 20.0), (2, 8, 22.5), (3, 6, 0.0)]
+        )
+        self.assertFalse(ExerciseSet.objects.filter(exercise_log_id=broken.pk).exists())
+
+    def test_duplicate_sessions_are_removed(self):
+        old_apps = self.migrate([('workout_app', '0004_exercise_sets')])
+        user = old_apps.get_model('auth', 'User').objects.create(username='athlete')
+        plan = old_apps.get_model('workout_app', 'WorkoutPlan').objects.create(user=user, name='Plan')
+        day = old_apps.get_model('workout_app', 'WorkoutDay').objects.create(plan=plan, day_name='Monday')
+        exercise = old_apps.get_model('workout_app', 'Exercise').objects.create(name='Squat')
+        date = datetime.date(2026, 1, 5)
+        OldWorkoutLog = old_apps.get_model('workout_app', 'WorkoutLog')
+        OldExerciseLog = old_apps.get_model('workout_app', 'ExerciseLog')
+        started = OldWorkoutLog.objects.create(user=user, workout_plan=plan, workout_day=day, date=date)
+        completed = OldWorkoutLog.objects.create(
+            user=user, workout_plan=plan, workout_day=day, date=date, completed=True, duration=40
+        )
+        extra = OldWorkoutLog.objects.create(
+            user=user, workout_plan=plan, workout_day=day, date=date, completed=True, duration=50
+        )
+        for workout_log in (started, completed, extra):
+            OldExerciseLog.objects.create(workout_log=workout_log, exercise=exercise)
+        # Rollups as backfilled by 0002, counting both completed duplicates
+        old_apps.get_model('workout_app', 'DailyActivity').objects.create(
+            user=user, date=date, workouts_completed=2, total_duration=90, exercises_logged=2
+        )
+        old_apps.get_model('workout_app', 'DailyExerciseActivity').objects.create(
+            user=user, date=date, exercise=exercise, times_logged=2
+        )
+
+        new_apps = self.migrate([('workout_app', '0005_unique_workout_session')])
+        self.assertEqual(
+            list(new_apps.get_model('workout_app', 'WorkoutLog').objects.values_list('id', flat=True)),
+            [completed.pk]
+        )
+        self.assertEqual(new_apps.get_model('workout_app', 'ExerciseLog').objects.count(), 1)
+        activity = new_apps.get_model('workout_app', 'DailyActivity').objects.get(user_id=user.pk, date=date)
+        self.assertEqual((activity.workouts_completed, activity.total_duration, activity.exercises_logged), (1, 40, 1))
+        self.assertEqual(
+            new_apps.get_model('workout_app', 'DailyExerciseActivity').objects.get(user_id=user.pk).times_logged, 1
+        )
+
+
+class NormalizeSqlTests(TestCase):
+    def test_literals_are_stripped(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 12 AND b = 'x' AND c IN (1, 2, 3)"),
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...)"
+        )
+
+    def test_same_shape_for_different_values(self):
+        self.assertEqual(
+            normalize_sql('SELECT "id" FROM "auth_user" WHERE "id" = 1'),
+            normalize_sql('SELECT "id" FROM "auth_user" WHERE "id" = 42')
+        )
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.users = [User.objects.create_user(f"user{index}") for index in range(6)]
+
+    def run_view(self, view):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(self.factory.get('/'))
+
+    @override_settings(QUERY_BUDGET={'RAISE': True, 'N_PLUS_ONE_THRESHOLD': 5})
+    def test_n_plus_one_raises(self):
+        def view(request):
+            for user in self.users:
+                User.objects.filter(pk=user.pk).exists()
+            return HttpResponse()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'Possible N+1'):
+            self.run_view(view)
+
+    @override_settings(QUERY_BUDGET={'RAISE': True, 'N_PLUS_ONE_THRESHOLD': None})
+    def test_declared_budget_raises(self):
+        @query_budget(1)
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'exceeded the budget of 1'):
+            self.run_view(view)
+
+    @override_settings(QUERY_BUDGET={'RAISE': True, 'HEADERS': True})
+    def test_within_budget_reports_count(self):
+        @query_budget(2)
+        def view(request):
+            User.objects.count()
+            return HttpResponse()
+
+        response = self.run_view(view)
+        self.assertEqual(response['X-Query-Count'], '1')
+
+
+class ViewQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user)
+        self.client.force_login(self.user)
+
+    def test_progress_within_budget(self):
+        with self.assertQueryBudget(10):
+            response = self.client.get(reverse('progress'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_plan_listing_views_within_budget(self):
+        # Budgets must hold regardless of how many plans and days a user has
+        create_workout_history(self.user, plans=10, days_per_plan=7, logged_days=0)
+        for name in ('dashboard', 'workout_plans', 'workout', 'start_workout'):
+            with self.subTest(view=name), self.assertQueryBudget(10):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_plan_detail_within_budget(self):
+        plan = WorkoutPlan.objects.filter(user=self.user).first()
+        with self.assertQueryBudget(6):
+            response = self.client.get(reverse('workout_plan_detail', args=[plan.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_history_page_within_budget(self):
+        cursor = self.client.get(reverse('progress')).context['next_cursor']
+        with self.assertQueryBudget(6):
+            response = self.client.get(reverse('workout_history'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rows'].count('<tr'), 20)
+        self.assertFalse(response.json()['has_more'])
+
+
+class PerformWorkoutTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.day = create_workout_history(self.user, plans=1, exercises_per_day=6, logged_days=0)[0]
+        self.client.force_login(self.user)
+        self.client.get(reverse('start_workout_day', args=[self.day.pk]))
+        self.workout_log = WorkoutLog.objects.get(user=self.user, workout_day=self.day)
+        self.exercise_logs = list(self.workout_log.exercise_logs.all())
+
+    def completion_data(self, **overrides):
+        data = {'workout_duration': '45'}
+        for exercise_log in self.exercise_logs:
+            data[f'sets_completed_{exercise_log.pk}'] = '3'
+            data[f'reps_completed_{exercise_log.pk}'] = '[10, 8, 6]'
+            data[f'weight_used_{exercise_log.pk}'] = '[20, 22.5, 25]'
+            data[f'notes_{exercise_log.pk}'] = 'Felt good'
+        data.update(overrides)
+        return data
+
+    def test_completion_runs_fixed_number_of_queries(self):
+        url = reverse('perform_workout', args=[self.workout_log.pk])
+        with self.assertQueryBudget(22):
+            response = self.client.post(url, self.completion_data())
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+        self.workout_log.refresh_from_db()
+        self.assertTrue(self.workout_log.completed)
+        self.assertEqual(self.workout_log.duration, 45)
+        self.assertEqual(ExerciseSet.objects.filter(exercise_log__workout_log=self.workout_log).count(), 18)
+        self.assertEqual(self.user.daily_activity.get().workouts_completed, 1)
+
+    def test_invalid_set_writes_nothing(self):
+        bad_log = self.exercise_logs[-1]
+        data = self.completion_data(**{f'reps_completed_{bad_log.pk}': '[10, "lots"]'})
+        response = self.client.post(reverse('perform_workout', args=[self.workout_log.pk]), data)
+        self.assertEqual(response.status_code, 200)
+
+        self.workout_log.refresh_from_db()
+        self.assertFalse(self.workout_log.completed)
+        self.assertFalse(ExerciseSet.objects.filter(exercise_log__workout_log=self.workout_log).exists())
+        self.assertFalse(ExerciseLog.objects.filter(workout_log=self.workout_log, sets_completed__gt=0).exists())
+
+    def test_build_exercise_sets_pads_the_shorter_list(self):
+        exercise_log = self.exercise_logs[0]
+        sets = build_exercise_sets(exercise_log, [10, 8, 6], [20, 22.5])
+        self.assertEqual(
+            [(item.exercise_log, item.set_number, item.reps, item.weight) for item in sets],
+            [(exercise_log, 1, 10, 20), (exercise_log, 2, 8, 22.5), (exercise_log, 3, 6, 0)]
+        )
+        self.assertEqual(build_exercise_sets(exercise_log, [], []), [])
+
+    def test_starting_again_reuses_the_session(self):
+        response = self.client.get(reverse('start_workout_day', args=[self.day.pk]))
+        self.assertRedirects(response, reverse('perform_workout', args=[self.workout_log.pk]), fetch_redirect_response=False)
+        self.assertEqual(WorkoutLog.objects.filter(user=self.user, workout_day=self.day).count(), 1)
+        self.assertEqual(self.workout_log.exercise_logs.count(), len(self.exercise_logs))
+
+    def test_failed_start_leaves_no_session(self):
+        self.workout_log.delete()
+        with mock.patch.object(ExerciseLog.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.get(reverse('start_workout_day', args=[self.day.pk]))
+        self.assertFalse(WorkoutLog.objects.filter(user=self.user, workout_day=self.day).exists())
+
+    def test_non_finite_and_non_integral_values_are_rejected(self):
+        bad_log = self.exercise_logs[0]
+        url = reverse('perform_workout', args=[self.workout_log.pk])
+        for field, value in (
+            ('reps_completed', '[Infinity]'),
+            ('reps_completed', '[1e400]'),
+            ('reps_completed', '[8.5]'),
+            ('reps_completed', '[true]'),
+            ('weight_used', '[NaN]'),
+            ('weight_used', '[1e400]'),
+            ('reps_completed', '[1000000000000]'),
+            ('weight_used', '[20000]'),
+        ):
+            with self.subTest(field=field, value=value):
+                response = self.client.post(url, self.completion_data(**{f'{field}_{bad_log.pk}': value}))
+                self.assertEqual(response.status_code, 200)
+                self.workout_log.refresh_from_db()
+                self.assertFalse(self.workout_log.completed)
+
+
+class WorkoutSessionApiTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.day = create_workout_history(self.user, plans=1, exercises_per_day=3, logged_days=0)[0]
+        self.client.force_login(self.user)
+        self.client.get(reverse('start_workout_day', args=[self.day.pk]))
+        self.workout_log = WorkoutLog.objects.get(user=self.user, workout_day=self.day)
+        self.exercise_logs = list(self.workout_log.exercise_logs.order_by('id'))
+
+    def patch_sets(self, payload, client=None):
+        return (client or self.client).patch(
+            reverse('workout_session_sets', args=[self.workout_log.pk]),
+            json.dumps(payload),
+            content_type='application/json'
+        )
+
+    def test_autosave_is_idempotent(self):
+        first = self.exercise_logs[0]
+        entry = {'exercise_log': first.pk, 'set_number': 1, 'reps': 10, 'weight': 20}
+        with self.assertQueryBudget(8):
+            response = self.patch_sets({'sets': [entry, {**entry, 'set_number': 2}], 'notes': {str(first.pk): 'Easy'}})
+        self.assertEqual(response.json(), {'status': 'success', 'saved': 2})
+
+        # A retried request after a dropped connection updates instead of duplicating
+        self.patch_sets({'sets': [{**entry, 'reps': 12}]})
+        self.assertEqual(
+            list(first.sets.order_by('set_number').values_list('set_number', 'reps')),
+            [(1, 12), (2, 10)]
+        )
+
+        state = self.client.get(reverse('workout_session', args=[self.workout_log.pk])).json()
+        self.assertEqual(state['exercise_logs'][0]['notes'], 'Easy')
+        self.assertEqual([entry['reps'] for entry in state['exercise_logs'][0]['sets']], [12, 10])
+
+    def test_autosave_rejects_foreign_and_invalid_sets(self):
+        other = User.objects.create_user('other')
+        UserProfile.objects.create(user=other)
+        other_day = create_workout_history(other, plans=1, exercises_per_day=1, logged_days=1)[0]
+        foreign_log = ExerciseLog.objects.filter(workout_log__workout_day=other_day).first()
+
+        response = self.patch_sets({'sets': [{'exercise_log': foreign_log.pk, 'set_number': 1, 'reps': 5}]})
+        self.assertEqual(response.status_code, 400)
+        response = self.patch_sets({'sets': [{'exercise_log': self.exercise_logs[0].pk, 'set_number': 0}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExerciseSet.objects.filter(exercise_log__workout_log=self.workout_log).exists())
+
+        other_log = WorkoutLog.objects.get(user=other)
+        response = self.client.get(reverse('workout_session', args=[other_log.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_finalize_completes_the_session(self):
+        self.patch_sets({'sets': [
+            {'exercise_log': self.exercise_logs[0].pk, 'set_number': number, 'reps': 8, 'weight': 30}
+            for number in (1, 2, 3)
+        ] + [{'exercise_log': self.exercise_logs[1].pk, 'set_number': 1, 'reps': 0}]})
+
+        url = reverse('finalize_workout_session', args=[self.workout_log.pk])
+        response = self.client.post(url, json.dumps({'duration': 40}), content_type='application/json')
+        self.assertEqual(response.json()['redirect'], reverse('dashboard'))
+        version = get_data_version(self.user.pk)
+
+        # A repeated finalize changes nothing
+        self.patch_sets({'sets': [{'exercise_log': self.exercise_logs[1].pk, 'set_number': 1, 'reps': 5}]})
+        response = self.client.post(url, json.dumps({'duration': 90}), content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(get_data_version(self.user.pk), version)
+
+        self.workout_log.refresh_from_db()
+        self.assertEqual((self.workout_log.completed, self.workout_log.duration), (True, 40))
+        self.assertEqual(
+            list(self.workout_log.exercise_logs.order_by('id').values_list('sets_completed', flat=True)),
+            [3, 0, 0]
+        )
+        self.assertEqual(self.user.daily_activity.get().workouts_completed, 1)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.current_streak, 1)
+
+        response = self.patch_sets({'sets': [{'exercise_log': self.exercise_logs[0].pk, 'set_number': 4}]})
+        self.assertEqual(response.status_code, 409)
+
+    async def test_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        entry = {'exercise_log': self.exercise_logs[0].pk, 'set_number': 1, 'reps': 6, 'weight': 50}
+        response = await self.patch_sets({'sets': [entry]}, client=self.async_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await ExerciseSet.objects.filter(exercise_log__workout_log=self.workout_log).acount(), 1)
+
+
+class UpdateExerciseOrderTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.day = create_workout_history(self.user, plans=1, exercises_per_day=30, logged_days=0)[0]
+        self.exercise_ids = list(self.day.exercises.order_by('order').values_list('id', flat=True))
+        self.client.force_login(self.user)
+
+    def reorder(self, exercise_ids):
+        return self.client.post(reverse('update_exercise_order'), {'exercise_ids': json.dumps(exercise_ids)})
+
+    def test_reorder_is_single_update(self):
+        new_order = list(reversed(self.exercise_ids))
+        with self.assertQueryBudget(6):
+            response = self.reorder(new_order)
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(list(self.day.exercises.order_by('order').values_list('id', flat=True)), new_order)
+
+    def test_partial_and_foreign_lists_are_rejected(self):
+        other_user = User.objects.create_user('other')
+        UserProfile.objects.create(user=other_user)
+        other_day = create_workout_history(other_user, plans=1, logged_days=0)[0]
+        foreign_ids = list(other_day.exercises.values_list('id', flat=True))
+
+        for exercise_ids in (self.exercise_ids[:-1], self.exercise_ids + foreign_ids[:1], foreign_ids):
+            with self.subTest(exercise_ids=exercise_ids):
+                self.assertEqual(self.reorder(exercise_ids).status_code, 400)
+        self.assertEqual(list(self.day.exercises.order_by('order').values_list('id', flat=True)), self.exercise_ids)
+
+
+class StatsCacheTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user)
+        self.client.force_login(self.user)
+
+    def get_stats(self, **params):
+        # Run the job a cache miss queues, then load the page again
+        response = self.client.get(reverse('advanced_stats'), params)
+        if response.context['stats_job']:
+            run_pending_jobs()
+            response = self.client.get(reverse('advanced_stats'), params)
+        return response
+
+    def test_repeat_visits_hit_cache(self):
+        url = reverse('advanced_stats')
+        for period in ('7', '90', '30'):
+            response = self.client.get(url, {'period': period})
+            self.assertIsNotNone(response.context['stats_job'])
+        self.assertEqual(run_pending_jobs(), 3)
+
+        for period in ('7', '90', '30'):
+            with self.subTest(period=period), self.assertQueryBudget(6):
+                response = self.client.get(url, {'period': period})
+            self.assertIsNone(response.context['stats_job'])
+            self.assertIsNotNone(response.context['user_stats'])
+
+    def test_unknown_periods_fall_back_to_the_default(self):
+        url = reverse('advanced_stats')
+        for period in ('abc', '-5', '31', '99999999'):
+            with self.subTest(period=period):
+                response = self.client.get(url, {'period': period})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['time_period'], 30)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_reload_after_the_job_computes_inline(self):
+        # The worker finished but its result is not in this process' cache
+        response = self.client.get(reverse('advanced_stats'), {'stats_job': '1'})
+        self.assertIsNone(response.context['stats_job'])
+        self.assertIsNotNone(response.context['user_stats'])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_writes_bump_only_the_owners_version(self):
+        other_user = User.objects.create_user('other')
+        versions = (get_data_version(self.user.pk), get_data_version(other_user.pk))
+
+        workout_log = WorkoutLog.objects.filter(user=self.user).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            ExerciseLog.objects.filter(workout_log=workout_log).first().delete()
+        self.assertNotEqual(get_data_version(self.user.pk), versions[0])
+        self.assertEqual(get_data_version(other_user.pk), versions[1])
+
+    def test_plan_exercise_and_set_writes_bump_the_version(self):
+        day = WorkoutDay.objects.filter(plan__user=self.user).first()
+        exercise = Exercise.objects.first()
+        workout_exercise = WorkoutExercise.objects.filter(workout_day=day).first()
+        exercise_log = ExerciseLog.objects.filter(workout_log__user=self.user).first()
+        writes = {
+            'add exercise': lambda: WorkoutExercise.objects.create(workout_day=day, exercise=exercise, order=9),
+            'remove exercise': workout_exercise.delete,
+            'add set': lambda: ExerciseSet.objects.create(exercise_log=exercise_log, set_number=9, reps=5),
+        }
+        for name, write in writes.items():
+            with self.subTest(name):
+                version = get_data_version(self.user.pk)
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                self.assertNotEqual(get_data_version(self.user.pk), version)
+
+        version = get_data_version(self.user.pk)
+        exercise_ids = list(WorkoutExercise.objects.filter(workout_day=day).order_by('-order').values_list('id', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('update_exercise_order'), {'exercise_ids': json.dumps(exercise_ids)})
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+    def test_exercise_log_save_reuses_the_loaded_workout_log(self):
+        workout_log = WorkoutLog.objects.filter(user=self.user).first()
+        exercise_log = workout_log.exercise_logs.first()
+        with self.assertNumQueries(1):
+            exercise_log.save()
+
+    def test_completed_workout_refreshes_stats(self):
+        total = self.get_stats().context['user_stats']['total_workouts']
+
+        workout_log = WorkoutLog.objects.filter(user=self.user).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            workout_log.delete()
+            refresh_daily_activity(self.user, [workout_log.date])
+        self.assertEqual(self.get_stats().context['user_stats']['total_workouts'], total - 1)
+
+
+class UserFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user, plans=1, logged_days=5)
+        self.client.force_login(self.user)
+
+    def count_queries(self, name):
+        with record_queries() as queries:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return queries.count, response
+
+    def test_repeat_views_skip_cached_fragments(self):
+        for name in ('dashboard', 'progress'):
+            with self.subTest(view=name):
+                first, _ = self.count_queries(name)
+                repeat, response = self.count_queries(name)
+                self.assertLess(repeat, first)
+                self.assertContains(response, 'Plan 0' if name == 'dashboard' else 'Total Workouts')
+
+    def test_exercise_progress_fragment_follows_the_selection(self):
+        exercise = Exercise.objects.get(name='Exercise 0')
+        url = reverse('advanced_stats')
+        self.assertContains(self.client.get(url, {'exercise': exercise.pk}), f'Progress for {exercise.name}')
+        self.assertContains(self.client.get(url, {'exercise': exercise.pk, 'bucket': 'week'}), 'Week of')
+        self.assertContains(self.client.get(url), 'Select an exercise to view progress data.')
+
+    def test_plan_changes_refresh_fragments(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkoutPlan.objects.create(user=self.user, name='Fresh plan')
+        self.assertContains(self.client.get(reverse('dashboard')), 'Fresh plan')
+
+    def test_workout_changes_refresh_fragments(self):
+        self.assertContains(self.client.get(reverse('progress')), 'text-info">5</div>')
+        workout_log = WorkoutLog.objects.filter(user=self.user).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            workout_log.delete()
+            refresh_daily_activity(self.user, [workout_log.date])
+        self.assertContains(self.client.get(reverse('progress')), 'text-info">4</div>')
+
+
+class ExerciseProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        day = create_workout_history(self.user, plans=1, days_per_plan=1, exercises_per_day=1, logged_days=0)[0]
+        self.exercise = Exercise.objects.get(name='Exercise 0')
+        today = timezone.now().date()
+        monday = today - datetime.timedelta(days=today.weekday() + 21)
+        # Two sessions in one week, one the week after; one weight per session
+        self.sessions = [(monday, 20), (monday + datetime.timedelta(days=2), 30), (monday + datetime.timedelta(days=7), 40)]
+        for date, weight in self.sessions:
+            workout_log = WorkoutLog.objects.create(
+                user=self.user, workout_plan=day.plan, workout_day=day, date=date, completed=True
+            )
+            exercise_log = ExerciseLog.objects.create(workout_log=workout_log, exercise=self.exercise, sets_completed=2)
+            ExerciseSet.objects.bulk_create([
+                ExerciseSet(exercise_log=exercise_log, set_number=1, reps=10, weight=weight),
+                ExerciseSet(exercise_log=exercise_log, set_number=2, reps=5, weight=weight / 2),
+            ])
+
+    def expected_buckets(self, bucket_start):
+        buckets = {}
+        for date, weight in self.sessions:
+            entry = buckets.setdefault(bucket_start(date), {'sessions': 0, 'volume': 0, 'max_weight': 0, 'set_count': 0})
+            entry['sessions'] += 1
+            entry['volume'] += 10 * weight + 5 * weight / 2
+            entry['max_weight'] = max(entry['max_weight'], weight)
+            entry['set_count'] += 2
+        return [{'date': date, **entry} for date, entry in sorted(buckets.items())]
+
+    def test_per_session_progress(self):
+        with self.assertNumQueries(1):
+            progress = get_exercise_progress(self.user, self.exercise.id, days=90)
+        self.assertEqual(
+            [(entry['date'], entry['volume'], entry['max_weight'], entry['set_count']) for entry in progress],
+            [(date, 12.5 * weight, weight, 2) for date, weight in self.sessions]
+        )
+
+    def test_week_and_month_buckets(self):
+        for bucket, bucket_start in (
+            ('week', lambda date: date - datetime.timedelta(days=date.weekday())),
+            ('month', lambda date: date.replace(day=1)),
+        ):
+            with self.subTest(bucket=bucket):
+                with self.assertNumQueries(1):
+                    progress = get_exercise_progress(self.user, self.exercise.id, days=90, bucket=bucket)
+                self.assertEqual(
+                    [
+                        {key: entry[key] for key in ('date', 'sessions', 'volume', 'max_weight', 'set_count')}
+                        for entry in progress
+                    ],
+                    self.expected_buckets(bucket_start)
+                )
+
+
+class ChartDataTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user, plans=1, logged_days=60)
+        self.exercise = Exercise.objects.get(name='Exercise 0')
+        self.client.force_login(self.user)
+
+    def test_lttb_keeps_the_ends_and_the_peaks(self):
+        points = [(x, 100 if x == 37 else x % 5) for x in range(100)]
+        keep = lttb(points, 10)
+        self.assertEqual(len(keep), 10)
+        self.assertEqual((keep[0], keep[-1]), (0, 99))
+        self.assertIn(37, keep)
+        self.assertEqual(keep, sorted(keep))
+        self.assertEqual(lttb(points[:5], 10), [0, 1, 2, 3, 4])
+
+    def test_workout_distribution_data(self):
+        url = reverse('workout_distribution_data')
+        with self.assertQueryBudget(4):
+            response = self.client.get(url)
+        payload = response.json()
+        self.assertEqual(len(payload['labels']), 7)
+        self.assertEqual(sum(payload['series']['workouts']), 60)
+
+        # Unchanged data revalidates without a body
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkoutLog.objects.filter(user=self.user).first().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_exercise_progress_data_is_downsampled(self):
+        url = reverse('exercise_progress_data')
+        payload = self.client.get(url, {'exercise': self.exercise.pk, 'period': 90}).json()
+        self.assertEqual((payload['total_points'], len(payload['labels'])), (60, 60))
+        self.assertEqual(payload['series']['volume'][0], 600.0)
+
+        payload = self.client.get(url, {'exercise': self.exercise.pk, 'period': 90, 'points': 12}).json()
+        self.assertEqual(len(payload['labels']), 12)
+        self.assertEqual(len(payload['series']['max_weight']), 12)
+
+        payload = self.client.get(url, {'exercise': self.exercise.pk, 'period': 90, 'bucket': 'month'}).json()
+        self.assertTrue(all(label.endswith('-01') for label in payload['labels']))
+
+        # Out of range periods are clamped instead of overflowing the date arithmetic
+        payload = self.client.get(url, {'exercise': self.exercise.pk, 'period': '99999999999'}).json()
+        self.assertEqual(payload['total_points'], 60)
+
+        response = self.client.get(url, {'exercise': 'squat'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_pages_do_not_embed_chart_data(self):
+        response = self.client.get(reverse('advanced_stats'), {'exercise': self.exercise.pk})
+        self.assertContains(response, reverse('exercise_progress_data'))
+        self.assertContains(self.client.get(reverse('progress')), reverse('workout_distribution_data'))
+
+
+class ExerciseLibraryConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('athlete', password='password')
+        Exercise.objects.create(name='Push Up')
+        self.client.force_login(self.user)
+
+    def test_unchanged_catalogue_returns_not_modified(self):
+        # The first visit sets the CSRF cookie, which is part of the tag
+        self.client.get(reverse('exercise_library'))
+        response = self.client.get(reverse('exercise_library'))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get(reverse('exercise_library'), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_new_session_invalidates_etag(self):
+        # A cached page would carry the previous session's CSRF token
+        self.client.get(reverse('exercise_library'))
+        etag = self.client.get(reverse('exercise_library'))['ETag']
+        self.client.logout()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('exercise_library'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_messages_disable_etag(self):
+        response = self.client.post(reverse('exercise_library'), {'name': 'Squat'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(reverse('exercise_library'))
+        self.assertContains(response, 'Exercise added to library!')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_catalogue_change_invalidates_etag_and_list(self):
+        etag = self.client.get(reverse('exercise_library'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Exercise.objects.create(name='Squat')
+
+        response = self.client.get(reverse('exercise_library'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Squat')
+
+
+class ExerciseSearchTests(TestCase):
+    def setUp(self):
+        Exercise.objects.create(name='Chest Fly', description='Isolation exercise')
+        Exercise.objects.create(name='Push Up', description='Bodyweight press for the chest')
+        Exercise.objects.create(name='Barbell Bench Press', description='Compound chest press')
+        Exercise.objects.create(name='Dumbbell Row', description='Back exercise')
+
+    def names(self, query, **kwargs):
+        return [exercise.name for exercise in search_exercises(query, **kwargs).object_list]
+
+    def test_name_matches_rank_first(self):
+        names = self.names('chest')
+        self.assertEqual(names[0], 'Chest Fly')
+        self.assertCountEqual(names[1:], ['Push Up', 'Barbell Bench Press'])
+
+    def test_prefix_and_multiple_terms(self):
+        self.assertEqual(self.names('dumb'), ['Dumbbell Row'])
+        self.assertEqual(self.names('bench press'), ['Barbell Bench Press'])
+
+    def test_search_syntax_is_matched_literally(self):
+        self.assertEqual(self.names('"row*('), ['Dumbbell Row'])
+        self.assertEqual(self.names('  '), [])
+
+    def test_edits_are_searchable(self):
+        Exercise.objects.filter(name='Dumbbell Row').update(name='Cable Row')
+        self.assertEqual(self.names('cable'), ['Cable Row'])
+        self.assertEqual(self.names('dumbbell'), [])
+
+    def test_api_paginates(self):
+        for index in range(25):
+            Exercise.objects.create(name=f'Squat Variation {index}')
+        user = User.objects.create_user('athlete')
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('exercise_search'), {'q': 'squat', 'page': 2})
+        data = response.json()
+        self.assertEqual((data['count'], data['page'], data['num_pages']), (25, 2, 2))
+        self.assertEqual(len(data['results']), 5)
+        self.assertFalse(data['has_next'])
+
+
+class QueryPlanTests(TestCase):
+    ACCESS_PATH_INDEXES = (
+        'workoutlog_user_completed_date',
+        'workoutlog_completed_by_date',
+        'workoutlog_user_history',
+        'exerciselog_exercise_workout',
+    )
+    # SQLite reports full table scans as "SCAN <table>", PostgreSQL as "Seq Scan on <table>"
+    FULL_SCAN = re.compile(r'(?:\bSCAN|Seq Scan on) "?(workout_app_workoutlog|workout_app_exerciselog)\b')
+
+    def setUp(self):
+        self.user = User.objects.create_user('athlete')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user)
+        self.exercise = Exercise.objects.first()
+
+    def assertUsesAccessPathIndexes(self, func):
+        with record_queries() as recorder:
+            func()
+        plans = '\n'.join(
+            explain_query(query) for query in recorder.queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        )
+        self.assertIsNone(self.FULL_SCAN.search(plans), plans)
+        self.assertTrue(any(name in plans for name in self.ACCESS_PATH_INDEXES), plans)
+
+    def test_progress_queries_use_indexes(self):
+        self.assertUsesAccessPathIndexes(lambda: get_exercise_progress(self.user, self.exercise.id))
+        self.assertUsesAccessPathIndexes(lambda: get_exercise_progress(self.user, self.exercise.id, bucket='week'))
+        self.assertUsesAccessPathIndexes(lambda: get_workout_history_page(self.user))
+
+    def test_stats_queries_use_indexes(self):
+        self.assertUsesAccessPathIndexes(lambda: rebuild_streak(self.user))
+        self.assertUsesAccessPathIndexes(lambda: refresh_daily_activity(self.user, [timezone.now().date()]))
+
+
+class SyntheticDataTests(TestCase):
+    VOLUMES = {'users': 2, 'exercises': 12, 'plans': 1, 'days_per_plan': 2, 'years': 1,
+               'end_date': datetime.date(2024, 6, 30)}
+
+    def snapshot(self):
+        return list(ExerciseSet.objects.order_by(
+            'exercise_log__workout_log__user__username', 'exercise_log__workout_log__date',
+            'exercise_log__exercise__name', 'set_number'
+        ).values_list(
+            'exercise_log__workout_log__user__username', 'exercise_log__workout_log__date',
+            'exercise_log__exercise__name', 'set_number', 'reps', 'weight'
+        ))
+
+    def test_same_seed_reproduces_data(self):
+        counts = generate_synthetic_data(seed=7, **self.VOLUMES)
+        first = self.snapshot()
+        self.assertEqual(sum(user['sets'] for user in counts.values()), len(first))
+
+        delete_synthetic_data()
+        generate_synthetic_data(seed=7, **self.VOLUMES)
+        self.assertEqual(self.snapshot(), first)
+
+        delete_synthetic_data()
+        generate_synthetic_data(seed=8, **self.VOLUMES)
+        self.assertNotEqual(self.snapshot(), first)
+
+
+class WorkoutSuggestionTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def test_django_weekday_mapping(self):
+        # 2024-06-02 was a Sunday
+        sunday = datetime.date(2024, 6, 2)
+        self.assertEqual(
+            [get_django_weekday(sunday + datetime.timedelta(days=offset)) for offset in range(7)],
+            [1, 2, 3, 4, 5, 6, 7]
+        )
+
+    def test_least_recent_day_ranks_first(self):
+        days = create_workout_history(self.user, plans=1, days_per_plan=3, logged_days=3)
+        # Logs cycle through the days, so the third day was done longest ago
+        suggestions = rank_workout_suggestions(self.user, limit=3)
+        self.assertEqual([suggestion['workout_day'] for suggestion in suggestions], [days[2], days[1], days[0]])
+        self.assertEqual(suggestions[-1]['reasons'][-1], 'Already done today.')
+
+    def test_query_count_independent_of_plans(self):
+        create_workout_history(self.user, plans=10, days_per_plan=7, logged_days=30)
+        with self.assertQueryBudget(1):
+            rank_workout_suggestions(self.user, limit=5)
+        with self.assertQueryBudget(4):
+            response = self.client.get(reverse('workout_suggestions'), {'limit': 5})
+        self.assertEqual(len(response.json()['suggestions']), 5)
+
+
+class RequestMemoTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user, logged_days=5)
+
+    def test_helpers_run_once_per_memo(self):
+        with self.assertQueryBudget(1), request_memo():
+            for _ in range(3):
+                suggest_workout(self.user)
+
+        # Without an open memo every call hits the database
+        with record_queries() as recorder:
+            suggest_workout(self.user)
+            suggest_workout(self.user)
+        self.assertEqual(recorder.count, 2)
+
+    def test_memo_is_not_shared_between_blocks(self):
+        with request_memo():
+            first = suggest_workout(self.user)
+        with self.assertQueryBudget(1), request_memo():
+            self.assertEqual(suggest_workout(self.user)['workout_day'], first['workout_day'])
+
+
+class ExportHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete')
+        UserProfile.objects.create(user=self.user)
+        create_workout_history(self.user, logged_days=5)
+        other = User.objects.create_user('other')
+        UserProfile.objects.create(user=other)
+        create_workout_history(other, logged_days=3)
+        self.client.force_login(self.user)
+
+    def count_records(self, records):
+        counts = {}
+        for record in records:
+            counts[record['record']] = counts.get(record['record'], 0) + 1
+        return counts
+
+    def test_csv_export_streams_every_record(self):
+        response = self.client.get(reverse('export_history'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        # 2 plans x 3 days x 4 exercises, 5 workouts, 5 workouts x 4 exercises x 3 sets
+        self.assertEqual(self.count_records(rows), {'plan': 24, 'workout': 5, 'set': 60})
+        self.assertEqual({row['workout_id'] for row in rows if row['record'] == 'set'},
+                         {str(pk) for pk in self.user.workout_logs.values_list('pk', flat=True)})
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('export_history'), {'format': 'ndjson'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(self.count_records(records), {'plan': 24, 'workout': 5, 'set': 60})
+        self.assertEqual(records[-1]['date'], timezone.now().date().isoformat())
+
+    async def test_asgi_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('export_history'), {'format': 'ndjson'})
+        # An async iterator is streamed as it is produced instead of being buffered
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(b''.join(chunks).decode().splitlines()), 89)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('export_history'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_does_not_depend_on_chunk_size(self):
+        # Each record type is read through a single cursor, however small the chunks
+        with record_queries() as recorder:
+            lines = list(stream_export(self.user, 'ndjson', chunk_size=7))
+        self.assertEqual(len(lines), 89)
+        self.assertEqual(recorder.count, 3)
+
+    def test_management_command(self):
+        stdout = io.StringIO()
+        call_command('export_workout_history', 'athlete', '--format', 'ndjson', stdout=stdout)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 89)
+
+
+class ImportHistoryTests(TestCase):
+    def setUp(self):
+        self.source = User.objects.create_user('source')
+        UserProfile.objects.create(user=self.source)
+        create_workout_history(self.source, logged_days=6)
+        self.user = User.objects.create_user('athlete')
+        UserProfile.objects.create(user=self.user)
+
+    def test_round_trip_from_export(self):
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(export_format=export_format):
+                WorkoutPlan.objects.filter(user=self.user).delete()
+                lines = ''.join(stream_export(self.source, export_format)).splitlines(keepends=True)
+                report = import_history(self.user, lines, export_format, batch_size=10)
+
+                self.assertEqual(report['error_count'], 0)
+                self.assertEqual((report['workouts'], report['exercise_logs'], report['sets']), (6, 24, 72))
+                self.assertGreater(report['batches'], 1)
+                self.assertEqual(
+                    ExerciseSet.objects.filter(exercise_log__workout_log__user=self.user).count(), 72
+                )
+                self.user.profile.refresh_from_db()
+                self.assertEqual(self.user.profile.current_streak, 6)
+
+    def test_existing_sessions_are_skipped(self):
+        lines = ''.join(stream_export(self.source, 'ndjson')).splitlines()
+        import_history(self.user, lines, 'ndjson')
+        report = import_history(self.user, lines, 'ndjson')
+        self.assertEqual((report['workouts'], report['existing_workouts']), (0, 6))
+        self.assertEqual(WorkoutLog.objects.filter(user=self.user).count(), 6)
+
+    def test_row_errors_are_reported(self):
+        lines = [
+            'date,plan,day,exercise,reps,weight\n',
+            '2024-01-01,Push,Day A,exercise 0,10,20\n',
+            '2024-01-01,Push,Day A,Exercise 0,8,22.5\n',
+            '2024-01-01,Push,Day A,Unknown Lift,10,20\n',
+            'yesterday,Push,Day A,Exercise 1,10,20\n',
+            '2024-01-02,Push,Day A,Exercise 1,-3,20\n',
+        ]
+        report = import_history(self.user, lines, 'csv')
+
+        self.assertEqual((report['workouts'], report['exercise_logs'], report['sets']), (1, 1, 2))
+        self.assertEqual([error['line'] for error in report['errors']], [4, 5, 6])
+        self.assertIn('Unknown exercise', report['errors'][0]['error'])
+        self.assertEqual(WorkoutDay.objects.get(plan__user=self.user).day_name, 'Day A')
+
+    def test_non_finite_and_huge_numbers_are_rejected(self):
+        lines = [
+            'date,plan,day,exercise,reps,weight\n',
+            '2024-01-01,Push,Day A,Exercise 0,10,nan\n',
+            '2024-01-01,Push,Day A,Exercise 0,10,inf\n',
+            '2024-01-01,Push,Day A,Exercise 0,10,1e400\n',
+            '2024-01-01,Push,Day A,Exercise 0,1000000000000,20\n',
+        ]
+        report = import_history(self.user, lines, 'csv')
+
+        self.assertEqual(report['workouts'], 0)
+        self.assertEqual([error['line'] for error in report['errors']], [2, 3, 4, 5])
+        self.assertFalse(ExerciseSet.objects.filter(exercise_log__workout_log__user=self.user).exists())
+
+    def test_unreadable_input_keeps_committed_batches_consistent(self):
+        def lines():
+            yield from ''.join(stream_export(self.source, 'csv')).splitlines(keepends=True)
+            raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+        report = import_history(self.user, lines(), 'csv', batch_size=10)
+        self.assertEqual(report['workouts'], 6)
+        self.assertIn('Could not read the file', report['errors'][-1]['error'])
+        # The rollups and streak were still rebuilt for the committed batches
+        self.assertEqual(self.user.daily_activity.count(), 6)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.current_streak, 6)
+
+    def test_failed_batch_leaves_no_plans_behind(self):
+        lines = ['date,plan,day,exercise,reps,weight\n', '2024-01-01,Push,Day A,Exercise 0,10,20\n']
+        with mock.patch.object(ExerciseSet.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            report = import_history(self.user, lines, 'csv')
+        self.assertIn('Batch rolled back', report['errors'][0]['error'])
+        self.assertFalse(WorkoutPlan.objects.filter(user=self.user).exists())
+        self.assertFalse(self.user.daily_activity.exists())
+
+    def test_upload_view_reports_undecodable_files(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('history.csv', 'date,plan,day,exercise,reps,weight\n'.encode() + b'\xff\xfe\n')
+        response = self.client.post(reverse('import_history'), {'file': upload, 'format': 'csv'}, follow=True)
+        self.assertContains(response, 'Could not read the file')
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('history.csv', ''.join(stream_export(self.source, 'csv')).encode())
+        response = self.client.post(reverse('import_history'), {'file': upload, 'format': 'csv'})
+        self.assertRedirects(response, reverse('settings'))
+        self.assertEqual(WorkoutLog.objects.filter(user=self.user).count(), 6)
+
+
+@override_settings(BACKGROUND_JOBS={'EAGER': False, 'RETRY_DELAY': 0})
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('athlete', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def test_jobs_with_the_same_key_are_queued_once(self):
+        first = enqueue(flaky_task, key='flaky', fail=False)
+        self.assertEqual(enqueue(flaky_task, key='flaky', fail=False).pk, first.pk)
+        self.assertEqual(run_pending_jobs(), 1)
+
+        # Once the job has run, the same work can be queued again
+        self.assertNotEqual(enqueue(flaky_task, key='flaky', fail=False).pk, first.pk)
+        with self.assertRaises(ValueError):
+            enqueue('no-such-task')
+
+    def test_failed_jobs_are_retried_then_marked_failed(self):
+        job = enqueue(flaky_task, user=self.user, fail=True)
+        with self.assertLogs('workout_app.jobs', 'ERROR') as logs:
+            self.assertEqual(run_pending_jobs(), 2)
+        self.assertEqual(len(logs.records), 2)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.FAILED, 2))
+        self.assertIn('Task failed', job.error)
+        # Each failed attempt was rolled back
+        self.assertFalse(WorkoutPlan.objects.filter(user=self.user).exists())
+
+        response = self.client.get(reverse('job_status', args=[job.pk]))
+        self.assertEqual(response.json()['status'], 'failed')
+
+    def test_retry_yields_to_an_equivalent_queued_job(self):
+        enqueue(flaky_task, key='flaky', fail=True)
+        job = claim_job()
+        duplicate = enqueue(flaky_task, key='flaky', fail=False)
+        self.assertNotEqual(duplicate.pk, job.pk)
+
+        # The duplicate appears after the superseded check, so the retry collides with it
+        with self.assertLogs('workout_app.jobs', 'ERROR'), \
+                mock.patch('django.db.models.query.QuerySet.exists', return_value=False):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.FAILED)
+        self.assertEqual(BackgroundJob.objects.get(status=BackgroundJob.QUEUED).pk, duplicate.pk)
+
+    def test_status_api_is_private(self):
+        other = User.objects.create_user('other')
+        job = enqueue(flaky_task, user=other, fail=False)
+        self.assertEqual(self.client.get(reverse('job_status', args=[job.pk])).status_code, 404)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue(flaky_task, fail=False)
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.RUNNING,
+            attempts=1,
+            started_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (BackgroundJob.SUCCEEDED, {'ok': True}))
+
+    def test_plan_deletion_rebuilds_rollups_in_the_background(self):
+        create_workout_history(self.user, plans=1, logged_days=3)
+        plan = WorkoutPlan.objects.get(user=self.user)
+        self.client.post(reverse('delete_workout_plan', args=[plan.pk]))
+
+        self.assertEqual(BackgroundJob.objects.get().name, 'rebuild_user_rollups')
+        self.assertEqual(run_pending_jobs(), 1)
+
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.current_streak, 0)
+        self.assertFalse(self.user.daily_activity.exists())
+
+
+def make_image_upload(name='squat.png', size=(800, 600), mode='RGBA'):
+    """Return an uploadable PNG generated with Pillow"""
+    output = io.BytesIO()
+    Image.new(mode, size, (200, 80, 40, 255) if mode == 'RGBA' else (200, 80, 40)).save(output, 'PNG')
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/png')
+
+
+@override_settings(BACKGROUND_JOBS={'EAGER': False}, IMAGE_VARIANTS={'WIDTHS': [160, 320, 640]})
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_saving_an_image_queues_hashed_variants(self):
+        exercise = Exercise.objects.create(name='Squat', image=make_image_upload())
+        self.assertEqual(BackgroundJob.objects.get().name, 'generate_image_variants')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(run_pending_jobs(), 1)
+
+        exercise.refresh_from_db()
+        variants = exercise.image_variants['variants']
+        self.assertEqual(exercise.image_variants['source'], exercise.image.name)
+        # Only widths below the 800px original, plus the largest configured width
+        self.assertEqual(
+            sorted((v['width'], v['format']) for v in variants),
+            [(w, f) for w in (160, 320, 640) for f in ('jpeg', 'webp')]
+        )
+        for variant in variants:
+            self.assertRegex(variant['name'], r'^exercise_images/variants/squat-\d+w\.[0-9a-f]{12}\.(webp|jpg)$')
+            self.assertTrue(exercise.image.storage.exists(variant['name']))
+            with exercise.image.storage.open(variant['name']) as stored, Image.open(stored) as image:
+                self.assertEqual(image.size, (variant['width'], variant['height']))
+
+        # Saving again without changing the image queues nothing
+        exercise.save()
+        self.assertEqual(BackgroundJob.objects.filter(status=BackgroundJob.QUEUED).count(), 0)
+
+    def test_replacing_an_image_deletes_the_old_variants(self):
+        exercise = Exercise.objects.create(name='Squat', image=make_image_upload(size=(400, 300)))
+        run_pending_jobs()
+        exercise.refresh_from_db()
+        old_names = [v['name'] for v in exercise.image_variants['variants']]
+        # Small originals are not upscaled
+        self.assertEqual({v['width'] for v in exercise.image_variants['variants']}, {160, 320, 400})
+
+        exercise.image = make_image_upload('lunge.png', size=(300, 300), mode='RGB')
+        exercise.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending_jobs()
+
+        exercise.refresh_from_db()
+        self.assertEqual({v['width'] for v in exercise.image_variants['variants']}, {160, 300})
+        self.assertFalse(any(exercise.image.storage.exists(name) for name in old_names))
+
+    def test_responsive_image_renders_srcset(self):
+        profile = UserProfile.objects.create(
+            user=User.objects.create_user('athlete'),
+            profile_picture=make_image_upload('me.png')
+        )
+        # Until the variants exist the original is served
+        html = responsive_image(profile.profile_picture, profile.profile_picture_variants, '150px', alt='me')
+        self.assertIn(f'src="{profile.profile_picture.url}"', html)
+        self.assertNotIn('srcset', html)
+
+        run_pending_jobs()
+        profile.refresh_from_db()
+        html = responsive_image(profile.profile_picture, profile.profile_picture_variants, '150px', alt='me')
+        self.assertIn('<source type="image/webp" srcset="%s" sizes="150px">' % build_srcset(
+            profile.profile_picture_variants, 'webp'
+        ), html)
+        self.assertIn('/media/profile_pics/variants/me-640w.', html)
+        self.assertIn('loading="lazy"', html)
+
+        # A replaced picture is served as the original until its own variants exist
+        profile.profile_picture = make_image_upload('new.png')
+        profile.save()
+        html = responsive_image(profile.profile_picture, profile.profile_picture_variants, '150px', alt='me')
+        self.assertIn(f'src="{profile.profile_picture.url}"', html)
+        self.assertNotIn('srcset', html)
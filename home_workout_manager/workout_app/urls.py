@@ -36,17 +36,28 @@ urlpatterns = [
     # Exercise Library
     path('exercises/', views.exercise_library, name='exercise_library'),
     path('exercises/<int:pk>/', views.exercise_detail, name='exercise_detail'),
+    path('exercises/search/', views.exercise_search, name='exercise_search'),
     
     # Workout Sessions
     path('workout/', views.workout, name='workout'),
     path('start-workout/', views.start_workout, name='start_workout'),
     path('start-workout/<int:day_pk>/', views.start_workout, name='start_workout_day'),
     path('perform-workout/<int:log_pk>/', views.perform_workout, name='perform_workout'),
+    path('perform-workout/<int:log_pk>/session/', views.workout_session, name='workout_session'),
+    path('perform-workout/<int:log_pk>/session/sets/', views.workout_session_sets, name='workout_session_sets'),
+    path('perform-workout/<int:log_pk>/session/finalize/', views.finalize_workout_session, name='finalize_workout_session'),
     
     # Progress Tracking
     path('progress/', views.progress, name='progress'),
+    path('progress/history/', views.workout_history, name='workout_history'),
     
     # User Settings
     path('settings/', views.settings, name='settings'),
+    path('settings/export/', views.export_history, name='export_history'),
+    path('settings/import/', views.import_history, name='import_history'),
     path('stats/', views.advanced_stats, name='advanced_stats'),
+    path('stats/suggestions/', views.workout_suggestions, name='workout_suggestions'),
+    path('charts/workout-distribution/', views.workout_distribution_data, name='workout_distribution_data'),
+    path('charts/exercise-progress/', views.exercise_progress_data, name='exercise_progress_data'),
+    path('jobs/<int:pk>/', views.job_status, name='job_status'),
 ]
\ No newline at end of file
@@ -1,11 +1,19 @@
+import io
 import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.utils import timezone
-from django.http import JsonResponse
-from django.db.models import Count
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST, require_http_methods
 from .forms import (
     UserRegisterForm, 
     UserUpdateForm,  # Add this import
@@ -15,7 +23,11 @@ from .forms import (
     WorkoutDayForm, 
     WorkoutExerciseForm, 
     ExerciseForm, 
-    ExerciseLogForm
+    ExerciseLogForm,
+    ExerciseLogCompletionForm,
+    SessionSetForm,
+    WorkoutCompletionForm,
+    ImportHistoryForm
 )
 from .models import (
     WorkoutPlan,
@@ -23,17 +35,51 @@ from .models import (
     WorkoutExercise,
     WorkoutLog,
     ExerciseLog,
+    ExerciseSet,
     Exercise,
-    UserProfile
+    UserProfile,
+    BackgroundJob
+)
+from .middleware import query_budget
+from .jobs import enqueue
+from .tasks import enqueue_stats_warmup, rebuild_user_rollups
+from .export import EXPORT_FORMATS, astream_export, stream_export
+from .importer import import_history as import_history_file
+from .catalogue import catalogue_etag, get_catalogue_fragment
+from .search import search_exercises
+from .signals import invalidate_user_stats
+from .charts import (
+    CHART_MAX_POINTS,
+    CHART_PERIOD_LIMITS,
+    CHART_POINT_LIMITS,
+    exercise_progress_chart,
+    workout_distribution_chart
+)
+from .stats_cache import (
+    DEFAULT_STATS_PERIOD,
+    STATS_PERIODS,
+    cached_for_user,
+    user_data_etag,
+    get_cached_user_stats,
+    peek_cached_user_stats,
+    get_cached_logged_exercises,
+    get_cached_workout_suggestions,
+    get_user_fragment
 )
 
 from .workout_utils import (
-    get_user_stats, 
     get_exercise_progress, 
+    get_workout_history_page,
+    get_progress_summary,
+    calculate_streak,
+    complete_workout,
+    autosave_workout_sets,
+    finalize_workout,
     calculate_volume_progress,
-    suggest_workout,
     calculate_bmi,
-    get_bmi_category
+    get_bmi_category,
+    rank_workout_suggestions,
+    get_user_profile
 )
 
 
@@ -63,47 +109,38 @@ def register(request):
     return render(request, 'workout_app/register.html', {'form': form})
 
 @login_required
+@query_budget(10)
 def dashboard(request):
-    # Get user's workout plans
-    workout_plans = WorkoutPlan.objects.filter(user=request.user)
-    
-    # Get recent workout logs
+    # Get user's workout plans and recent workout logs, only queried when the
+    # fragments built from them are not cached for the user's data version
+    workout_plans = WorkoutPlan.objects.filter(user=request.user).with_days_and_exercise_counts()
     recent_logs = WorkoutLog.objects.filter(user=request.user).order_by('-date')[:5]
+    fragment_context = {'workout_plans': workout_plans, 'recent_logs': recent_logs}
     
     # Get today's workout if any
     today = timezone.now().date()
-    today_workout = WorkoutLog.objects.filter(user=request.user, date=today).first()
-    
-    # Calculate stats
-    total_workouts = WorkoutLog.objects.filter(user=request.user, completed=True).count()
-    total_exercises = ExerciseLog.objects.filter(workout_log__user=request.user).count()
-    
-    # Streaks calculation
-    consecutive_days = 0
-    if total_workouts > 0:
-        logs = WorkoutLog.objects.filter(user=request.user, completed=True).order_by('-date')
-        if logs.first().date == today:
-            consecutive_days = 1
-            last_date = logs.first().date
-            for log in logs[1:]:
-                if (last_date - log.date).days == 1:
-                    consecutive_days += 1
-                    last_date = log.date
-                else:
-                    break
+    today_workout = WorkoutLog.objects.filter(user=request.user, date=today).select_related(
+        'workout_plan', 'workout_day'
+    ).first()
+    
+    # Streak is read from the profile, no history scan needed
+    consecutive_days = calculate_streak(request.user)
     
     context = {
-        'workout_plans': workout_plans,
-        'recent_logs': recent_logs,
+        'overview_html': get_user_fragment(request.user, 'dashboard_overview', lambda: render_to_string(
+            'workout_app/dashboard_overview.html', fragment_context
+        )),
+        'plans_html': get_user_fragment(request.user, 'dashboard_plans', lambda: render_to_string(
+            'workout_app/dashboard_plans.html', fragment_context
+        )),
         'today_workout': today_workout,
-        'total_workouts': total_workouts,
-        'total_exercises': total_exercises,
         'consecutive_days': consecutive_days
     }
     
     return render(request, 'workout_app/dashboard.html', context)
 
 @login_required
+@query_budget(6)
 def workout_plans(request):
     """View all workout plans and create new ones"""
     if request.method == 'POST':
@@ -117,7 +154,7 @@ def workout_plans(request):
     else:
         form = WorkoutPlanForm()
     
-    plans = WorkoutPlan.objects.filter(user=request.user)
+    plans = WorkoutPlan.objects.filter(user=request.user).with_days_and_exercise_counts()
     
     context = {
         'plans': plans,
@@ -127,10 +164,11 @@ def workout_plans(request):
     return render(request, 'workout_app/workout_plans.html', context)
 
 @login_required
+@query_budget(6)
 def workout_plan_detail(request, pk):
     """View and edit a specific workout plan"""
     plan = get_object_or_404(WorkoutPlan, pk=pk, user=request.user)
-    workout_days = WorkoutDay.objects.filter(plan=plan)
+    workout_days = WorkoutDay.objects.filter(plan=plan).with_exercises()
     
     if request.method == 'POST':
         form = WorkoutDayForm(request.POST)
@@ -152,17 +190,17 @@ def workout_plan_detail(request, pk):
     return render(request, 'workout_app/workout_plan_detail.html', context)
 
 @login_required
+@query_budget(6)
 def workout_day_detail(request, pk):
     """View and edit exercises for a specific workout day"""
-    day = get_object_or_404(WorkoutDay, pk=pk)
+    day = get_object_or_404(WorkoutDay.objects.select_related('plan'), pk=pk)
     
     # Ensure user owns this workout day
-    if day.plan.user != request.user:
+    if day.plan.user_id != request.user.id:
         messages.error(request, "You don't have permission to view this workout day.")
         return redirect('dashboard')
     
-    exercises = WorkoutExercise.objects.filter(workout_day=day).order_by('order')
-    all_exercises = Exercise.objects.all()
+    exercises = WorkoutExercise.objects.filter(workout_day=day).select_related('exercise').order_by('order')
     
     if request.method == 'POST':
         form = WorkoutExerciseForm(request.POST)
@@ -176,10 +214,18 @@ def workout_day_detail(request, pk):
     else:
         form = WorkoutExerciseForm()
     
+    # An unbound exercise picker only depends on the catalogue, so reuse its rendering
+    exercise_picker = None
+    if not form.is_bound:
+        exercise_picker = get_catalogue_fragment('exercise_picker', lambda: render_to_string(
+            'workout_app/exercise_picker.html',
+            {'form': form}
+        ))
+    
     context = {
         'day': day,
         'exercises': exercises,
-        'all_exercises': all_exercises,
+        'exercise_picker': exercise_picker,
         'form': form
     }
     
@@ -201,10 +247,10 @@ def delete_workout_exercise(request, pk):
     return redirect('workout_day_detail', pk=day_pk)
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=catalogue_etag)
 def exercise_library(request):
     """View all exercises and add new ones"""
-    exercises = Exercise.objects.all()
-    
     if request.method == 'POST':
         form = ExerciseForm(request.POST, request.FILES)
         if form.is_valid():
@@ -214,8 +260,25 @@ def exercise_library(request):
     else:
         form = ExerciseForm()
     
+    search_query = request.GET.get('search', '').strip()
+    search_results = None
+    if search_query:
+        search_results = search_exercises(search_query, page=request.GET.get('page'))
+        exercise_list = render_to_string(
+            'workout_app/exercise_library_list.html',
+            {'exercises': search_results.object_list}
+        )
+    else:
+        # The catalogue list is the same for everyone, so render it once per catalogue version
+        exercise_list = get_catalogue_fragment('library', lambda: render_to_string(
+            'workout_app/exercise_library_list.html',
+            {'exercises': Exercise.objects.all()}
+        ))
+    
     context = {
-        'exercises': exercises,
+        'exercise_list': exercise_list,
+        'search_query': search_query,
+        'search_results': search_results,
         'form': form
     }
     
@@ -233,80 +296,96 @@ def exercise_detail(request, pk):
     return render(request, 'workout_app/exercise_detail.html', context)
 
 @login_required
+@query_budget(6)
+def exercise_search(request):
+    """API view returning ranked, paginated exercise search results"""
+    results = search_exercises(request.GET.get('q', ''), page=request.GET.get('page'))
+    
+    return JsonResponse({
+        'results': [
+            {
+                'id': exercise.pk,
+                'name': exercise.name,
+                'description': exercise.description or '',
+                'image': exercise.image.url if exercise.image else None,
+                'url': reverse('exercise_detail', args=[exercise.pk])
+            }
+            for exercise in results.object_list
+        ],
+        'count': results.paginator.count,
+        'page': results.number,
+        'num_pages': results.paginator.num_pages,
+        'has_next': results.has_next()
+    })
+
+@login_required
+@query_budget(12)
 def start_workout(request, day_pk=None):
     """Start a workout session from a specific day"""
     if day_pk:
-        day = get_object_or_404(WorkoutDay, pk=day_pk)
+        day = get_object_or_404(WorkoutDay.objects.select_related('plan'), pk=day_pk)
         
         # Ensure user owns this workout day
-        if day.plan.user != request.user:
+        if day.plan.user_id != request.user.id:
             messages.error(request, "You don't have permission to access this workout.")
             return redirect('dashboard')
         
-        # Check if workout already exists for today
+        # One session per user, day and date: repeated or concurrent starts reuse it
         today = timezone.now().date()
-        existing_log = WorkoutLog.objects.filter(
-            user=request.user,
-            workout_plan=day.plan,
-            workout_day=day,
-            date=today
-        ).first()
-        
-        if existing_log:
-            workout_log = existing_log
-        else:
-            # Create new workout log
-            workout_log = WorkoutLog.objects.create(
+        with transaction.atomic():
+            workout_log, created = WorkoutLog.objects.get_or_create(
                 user=request.user,
-                workout_plan=day.plan,
                 workout_day=day,
-                date=today
+                date=today,
+                defaults={'workout_plan': day.plan}
             )
             
-            # Create exercise logs for each exercise in the workout day
-            for exercise_item in WorkoutExercise.objects.filter(workout_day=day).order_by('order'):
-                ExerciseLog.objects.create(
-                    workout_log=workout_log,
-                    exercise=exercise_item.exercise
-                )
+            if created:
+                # Create exercise logs for each exercise in the workout day
+                exercise_ids = WorkoutExercise.objects.filter(
+                    workout_day=day
+                ).order_by('order').values_list('exercise_id', flat=True)
+                ExerciseLog.objects.bulk_create([
+                    ExerciseLog(workout_log=workout_log, exercise_id=exercise_id)
+                    for exercise_id in exercise_ids
+                ])
         
         return redirect('perform_workout', log_pk=workout_log.pk)
     
     # If no day_pk provided, show a list of workout plans to choose from
-    plans = WorkoutPlan.objects.filter(user=request.user)
+    plans = WorkoutPlan.objects.filter(user=request.user).with_days_and_exercise_counts()
     context = {'plans': plans}
     return render(request, 'workout_app/start_workout.html', context)
 
 @login_required
+@query_budget(20)
 def perform_workout(request, log_pk):
     """Perform a workout session"""
-    workout_log = get_object_or_404(WorkoutLog, pk=log_pk, user=request.user)
-    exercise_logs = ExerciseLog.objects.filter(workout_log=workout_log)
+    workout_log = get_object_or_404(WorkoutLog.objects.select_related('user__profile'), pk=log_pk, user=request.user)
+    exercise_logs = ExerciseLog.objects.filter(workout_log=workout_log).select_related('exercise')
     
     # Check if this is a POST request (workout completion)
     if request.method == 'POST':
-        for exercise_log in exercise_logs:
-            # Get form data for each exercise
-            sets_completed = request.POST.get(f'sets_completed_{exercise_log.pk}', 0)
-            reps_completed = request.POST.get(f'reps_completed_{exercise_log.pk}', '[]')
-            weight_used = request.POST.get(f'weight_used_{exercise_log.pk}', '[]')
-            notes = request.POST.get(f'notes_{exercise_log.pk}', '')
-            
-            # Update exercise log
-            exercise_log.sets_completed = sets_completed
-            exercise_log.reps_completed = reps_completed
-            exercise_log.weight_used = weight_used
-            exercise_log.notes = notes
-            exercise_log.save()
+        # Validate every submitted value before anything is written
+        completion_form = WorkoutCompletionForm(request.POST)
+        exercise_forms = [ExerciseLogCompletionForm(request.POST, exercise_log) for exercise_log in exercise_logs]
         
-        # Mark workout as completed
-        duration = int(request.POST.get('workout_duration', 0))
-        workout_log.completed = True
-        workout_log.duration = duration
-        workout_log.save()
+        invalid_forms = [form for form in exercise_forms if not form.is_valid()]
+        if completion_form.is_valid() and not invalid_forms:
+            complete_workout(
+                workout_log,
+                [(form.exercise_log, form.cleaned_data) for form in exercise_forms],
+                completion_form.cleaned_data['workout_duration']
+            )
+            enqueue_stats_warmup(request.user)
+            messages.success(request, 'Workout completed successfully!')
+            return redirect('dashboard')
         
-        messages.success(request, 'Workout completed successfully!')
-        return redirect('dashboard')
+        for form in invalid_forms:
+            for field, errors in form.errors.items():
+                messages.error(request, f"{form.exercise_log.exercise.name} ({field.replace('_', ' ')}): {' '.join(errors)}")
+        for errors in completion_form.errors.values():
+            messages.error(request, f"Workout duration: {' '.join(errors)}")
     
     # If not a POST request, display the workout
     context = {
@@ -316,16 +395,123 @@ def perform_workout(request, log_pk):
     
     return render(request, 'workout_app/perform_workout.html', context)
 
+async def _get_session_log(request, log_pk, *related):
+    """Load one of the requesting user's workout logs with the async ORM, or None"""
+    user = await request.auser()
+    return await WorkoutLog.objects.select_related(*related).filter(pk=log_pk, user=user).afirst()
+
+@login_required
+@query_budget(5)
+@require_GET
+async def workout_session(request, log_pk):
+    """Async API view returning the saved state of a workout session"""
+    workout_log = await _get_session_log(request, log_pk)
+    if workout_log is None:
+        return JsonResponse({'status': 'error', 'message': 'Workout not found'}, status=404)
+    
+    exercise_logs = ExerciseLog.objects.filter(workout_log=workout_log).select_related('exercise').prefetch_related(
+        Prefetch('sets', queryset=ExerciseSet.objects.order_by('set_number'))
+    ).order_by('id')
+    
+    return JsonResponse({
+        'status': 'success',
+        'completed': workout_log.completed,
+        'duration': workout_log.duration,
+        'exercise_logs': [
+            {
+                'id': exercise_log.pk,
+                'exercise': exercise_log.exercise.name,
+                'sets_completed': exercise_log.sets_completed,
+                'notes': exercise_log.notes or '',
+                'sets': [
+                    {'set_number': exercise_set.set_number, 'reps': exercise_set.reps, 'weight': exercise_set.weight}
+                    for exercise_set in exercise_log.sets.all()
+                ]
+            }
+            async for exercise_log in exercise_logs
+        ]
+    })
+
+@login_required
+@query_budget(8)
+@require_http_methods(['PATCH'])
+async def workout_session_sets(request, log_pk):
+    """Async API view autosaving a batch of sets of a workout session as they are completed"""
+    try:
+        payload = json.loads(request.body)
+        entries = payload.get('sets', [])
+        notes = {int(pk): '' if text is None else str(text) for pk, text in payload.get('notes', {}).items()}
+        set_forms = [SessionSetForm(entry) for entry in entries if isinstance(entry, dict)]
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid session data'}, status=400)
+    
+    if not isinstance(entries, list) or len(set_forms) != len(entries):
+        return JsonResponse({'status': 'error', 'message': 'Invalid session data'}, status=400)
+    invalid_forms = [form for form in set_forms if not form.is_valid()]
+    if invalid_forms:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid set data',
+            'errors': [form.errors.get_json_data() for form in invalid_forms]
+        }, status=400)
+    
+    workout_log = await _get_session_log(request, log_pk)
+    if workout_log is None:
+        return JsonResponse({'status': 'error', 'message': 'Workout not found'}, status=404)
+    if workout_log.completed:
+        return JsonResponse({'status': 'error', 'message': 'Workout already completed'}, status=409)
+    
+    sets = [form.cleaned_data for form in set_forms]
+    exercise_log_ids = {entry['exercise_log'] for entry in sets} | set(notes)
+    if exercise_log_ids:
+        session_ids = ExerciseLog.objects.filter(
+            workout_log=workout_log,
+            pk__in=exercise_log_ids
+        ).values_list('pk', flat=True)
+        if {pk async for pk in session_ids} != exercise_log_ids:
+            return JsonResponse({'status': 'error', 'message': 'Exercise is not part of this workout'}, status=400)
+    
+    saved = await sync_to_async(autosave_workout_sets)(workout_log, sets, notes)
+    # Bulk writes send no signals
+    await sync_to_async(invalidate_user_stats)(workout_log.user_id)
+    return JsonResponse({'status': 'success', 'saved': saved})
+
 @login_required
+@query_budget(14)
+@require_POST
+async def finalize_workout_session(request, log_pk):
+    """Async API view completing a workout session whose sets were autosaved"""
+    try:
+        payload = json.loads(request.body or '{}')
+        form = WorkoutCompletionForm({'workout_duration': payload.get('duration')})
+    except (AttributeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid session data'}, status=400)
+    
+    if not form.is_valid():
+        return JsonResponse({'status': 'error', 'message': 'Invalid workout duration'}, status=400)
+    
+    workout_log = await _get_session_log(request, log_pk, 'user__profile')
+    if workout_log is None:
+        return JsonResponse({'status': 'error', 'message': 'Workout not found'}, status=404)
+    
+    if not await sync_to_async(finalize_workout)(workout_log, form.cleaned_data['workout_duration']):
+        return JsonResponse({'status': 'error', 'message': 'Workout already completed'}, status=409)
+    await sync_to_async(enqueue_stats_warmup)(workout_log.user)
+    
+    messages.success(request, 'Workout completed successfully!')
+    return JsonResponse({'status': 'success', 'redirect': reverse('dashboard')})
+
+@login_required
+@query_budget(6)
 def workout(request):
     """Main workout view - shows recent and available workouts"""
     # Get user's workout plans
-    plans = WorkoutPlan.objects.filter(user=request.user)
+    plans = WorkoutPlan.objects.filter(user=request.user).with_days_and_exercise_counts()
     
     # Get recent workout logs
     recent_logs = WorkoutLog.objects.filter(
         user=request.user
-    ).order_by('-date')[:5]
+    ).select_related('workout_plan', 'workout_day').order_by('-date')[:5]
     
     context = {
         'plans': plans,
@@ -335,68 +521,44 @@ def workout(request):
     return render(request, 'workout_app/workout.html', context)
 
 @login_required
+@query_budget(10)
 def progress(request):
     """View workout progress and statistics"""
-    # Get all workout logs for the user
-    workout_logs = WorkoutLog.objects.filter(user=request.user).order_by('-date')
-    
-    # Calculate weekly stats
-    today = timezone.now().date()
-    start_of_week = today - timezone.timedelta(days=today.weekday())
-    workouts_this_week = workout_logs.filter(date__gte=start_of_week, completed=True).count()
-    
-    # Calculate monthly stats
-    start_of_month = today.replace(day=1)
-    workouts_this_month = workout_logs.filter(date__gte=start_of_month, completed=True).count()
-    
-    # Calculate all-time stats
-    total_workouts = workout_logs.filter(completed=True).count()
-    total_duration = sum(log.duration for log in workout_logs.filter(completed=True)) if total_workouts > 0 else 0
-    avg_duration = total_duration / total_workouts if total_workouts > 0 else 0
-    
-    # Get most common workout
-    most_common_workout = None
-    if workout_logs.exists():
-        most_common = workout_logs.values('workout_day__day_name').annotate(
-            count=Count('workout_day__day_name')
-        ).order_by('-count').first()
-        if most_common:
-            most_common_workout = most_common['workout_day__day_name']
-    
-    # Calculate workout distribution by day of week
-    days_of_week = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    workout_distribution = []
-    
-    for day in days_of_week:
-        # Count workouts for each day
-        count = workout_logs.filter(completed=True, date__week_day=get_weekday_number(day)).count()
-        workout_distribution.append(count)
+    # Only one page of history is rendered; older pages are loaded by cursor
+    history = get_workout_history_page(request.user, cursor=request.GET.get('cursor'))
+    
+    # Weekly, monthly, all-time and weekday stats in a fixed number of queries,
+    # rendered once per data version
+    summary_html = get_user_fragment(request.user, 'progress_summary', lambda: render_to_string(
+        'workout_app/progress_summary.html',
+        {
+            'current_streak': calculate_streak(request.user),
+            'longest_streak': get_user_profile(request.user).longest_streak,
+            **get_progress_summary(request.user)
+        }
+    ))
     
     context = {
-        'workout_logs': workout_logs,
-        'workouts_this_week': workouts_this_week,
-        'workouts_this_month': workouts_this_month,
-        'total_workouts': total_workouts,
-        'total_duration': total_duration,
-        'avg_duration': avg_duration,
-        'most_common_workout': most_common_workout,
-        'workout_distribution': workout_distribution
+        'workout_logs': history['logs'],
+        'next_cursor': history['next_cursor'],
+        'summary_html': summary_html
     }
     
     return render(request, 'workout_app/progress.html', context)
 
-def get_weekday_number(day_name):
-    """Convert day name to Django's week_day filter number (1=Sunday, 2=Monday, etc.)"""
-    days = {
-        'Monday': 2,
-        'Tuesday': 3,
-        'Wednesday': 4,
-        'Thursday': 5,
-        'Friday': 6,
-        'Saturday': 7,
-        'Sunday': 1
-    }
-    return days.get(day_name, 1)  # Default to Sunday if invalid name
+@login_required
+@query_budget(6)
+def workout_history(request):
+    """AJAX view returning the next page of workout history as HTML fragments"""
+    history = get_workout_history_page(request.user, cursor=request.GET.get('cursor'))
+    context = {'workout_logs': history['logs']}
+    
+    return JsonResponse({
+        'rows': render_to_string('workout_app/workout_history_rows.html', context, request=request),
+        'details': render_to_string('workout_app/workout_history_details.html', context, request=request),
+        'next_cursor': history['next_cursor'],
+        'has_more': history['has_more']
+    })
 
 @login_required
 def settings(request):
@@ -404,7 +566,7 @@ def settings(request):
     
     if request.method == 'POST':
         user_form = UserUpdateForm(request.POST, instance=request.user)
-        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=get_user_profile(request.user))
         
         if user_form.is_valid() and profile_form.is_valid():
             user_form.save()
@@ -423,12 +585,13 @@ def settings(request):
                     messages.error(request, f"{field}: {error}")
     else:
         user_form = UserUpdateForm(instance=request.user)
-        profile_form = ProfileUpdateForm(instance=request.user.profile)
+        profile_form = ProfileUpdateForm(instance=get_user_profile(request.user))
     
     context = {
         'user_form': user_form,
         'profile_form': profile_form,
-        'profile': request.user.profile
+        'import_form': ImportHistoryForm(),
+        'profile': get_user_profile(request.user)
     }
     
     return render(request, 'workout_app/settings.html', context)
@@ -440,7 +603,18 @@ def delete_workout_plan(request, pk):
     
     if request.method == 'POST':
         plan_name = plan.name  # Store name before deletion for the message
+        # Logged workouts are deleted with the plan, so their days need re-rolling
+        logged_dates = list(
+            WorkoutLog.objects.filter(workout_plan=plan, completed=True).values_list('date', flat=True).distinct()
+        )
         plan.delete()
+        if logged_dates:
+            enqueue(
+                rebuild_user_rollups,
+                user=request.user,
+                user_id=request.user.pk,
+                dates=[date.isoformat() for date in logged_dates]
+            )
         messages.success(request, f'Workout plan "{plan_name}" deleted successfully!')
         return redirect('workout_plans')
     
@@ -449,21 +623,39 @@ def delete_workout_plan(request, pk):
 
 
 @login_required
+@query_budget(6)
 def update_exercise_order(request):
     """AJAX view to update exercise order"""
     if request.method == 'POST':
-        exercise_ids = json.loads(request.POST.get('exercise_ids', '[]'))
+        try:
+            exercise_ids = [int(pk) for pk in json.loads(request.POST.get('exercise_ids', '[]'))]
+        except (TypeError, ValueError):
+            return JsonResponse({'status': 'error', 'message': 'Invalid exercise list'}, status=400)
         
-        # Update order for each exercise
-        for index, exercise_id in enumerate(exercise_ids):
-            exercise = WorkoutExercise.objects.get(pk=exercise_id)
-            
-            # Verify user has permission to modify this exercise
-            if exercise.workout_day.plan.user != request.user:
-                return JsonResponse({'status': 'error', 'message': 'Permission denied'})
-            
-            exercise.order = index
-            exercise.save()
+        if not exercise_ids or len(set(exercise_ids)) != len(exercise_ids):
+            return JsonResponse({'status': 'error', 'message': 'Invalid exercise list'}, status=400)
+        
+        # Load every exercise of the day the first id belongs to, provided the
+        # user owns it, so ownership and completeness are checked in one query
+        exercises = list(WorkoutExercise.objects.filter(
+            workout_day__exercises__pk=exercise_ids[0],
+            workout_day__plan__user=request.user
+        ).only('id', 'order'))
+        
+        if {exercise.pk for exercise in exercises} != set(exercise_ids):
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Exercise list must contain every exercise of one of your workout days'
+            }, status=400)
+        
+        # Update order for every exercise in a single statement
+        positions = {exercise_id: index for index, exercise_id in enumerate(exercise_ids)}
+        for exercise in exercises:
+            exercise.order = positions[exercise.pk]
+        with transaction.atomic():
+            WorkoutExercise.objects.bulk_update(exercises, ['order'])
+            # bulk_update sends no signals
+            invalidate_user_stats(request.user.pk)
         
         return JsonResponse({'status': 'success'})
     
@@ -472,53 +664,217 @@ def update_exercise_order(request):
 @login_required
 def advanced_stats(request):
     """Comprehensive statistics view for user workout data"""
-    # Get time period from request (default to 30 days)
-    time_period = int(request.GET.get('period', 30))
-    
-    # Get user stats for specified period
-    user_stats = get_user_stats(request.user, days=time_period)
+    # Get time period from request, one of the periods the page offers
+    period = request.GET.get('period', '')
+    time_period = int(period) if period.isdigit() and int(period) in STATS_PERIODS else DEFAULT_STATS_PERIOD
+    
+    # Get user stats for specified period, cached until the user's data changes.
+    # On a miss they are computed by a background job while the page polls for it.
+    user_stats = peek_cached_user_stats(request.user, days=time_period)
+    stats_job = None
+    if user_stats is None and 'stats_job' in request.GET:
+        # Reloaded after the job finished, yet its result is not visible here (the
+        # worker uses another cache, or the data changed since): compute inline
+        # rather than queueing again, so the page never reloads more than once
+        user_stats = get_cached_user_stats(request.user, days=time_period)
+    elif user_stats is None:
+        stats_job = enqueue_stats_warmup(request.user, days=time_period)
+        # Eager jobs (development) have already filled the cache
+        user_stats = peek_cached_user_stats(request.user, days=time_period)
+        if user_stats is not None:
+            stats_job = None
     
     # Get BMI information
-    user_profile = request.user.profile
+    user_profile = get_user_profile(request.user)
     bmi = calculate_bmi(user_profile)
     bmi_category = get_bmi_category(bmi)
     
     # Get exercise selection for progress chart
-    exercises = Exercise.objects.filter(
-        exerciselog__workout_log__user=request.user,
-        exerciselog__workout_log__completed=True
-    ).distinct()
+    exercises = get_cached_logged_exercises(request.user)
     
     selected_exercise_id = request.GET.get('exercise')
     
+    # Optionally bucket progress by week or month instead of per session
+    progress_bucket = request.GET.get('bucket')
+    if progress_bucket not in ('week', 'month'):
+        progress_bucket = None
+    
     # If exercise id is provided and valid, get progress data
-    exercise_progress = None
-    volume_progress = None
-    
-    if selected_exercise_id and exercises.filter(id=selected_exercise_id).exists():
-        selected_exercise = exercises.get(id=selected_exercise_id)
-        exercise_progress = get_exercise_progress(
-            request.user, 
-            selected_exercise_id, 
-            days=time_period
-        )
+    selected_exercise = None
+    
+    if selected_exercise_id and selected_exercise_id.isdigit():
+        selected_exercise = next((exercise for exercise in exercises if exercise.id == int(selected_exercise_id)), None)
+    
+    def render_exercise_progress():
+        exercise_progress = None
+        volume_progress = None
+        if selected_exercise:
+            exercise_progress = get_exercise_progress(
+                request.user, 
+                selected_exercise.id, 
+                days=time_period,
+                bucket=progress_bucket
+            )
+            
+            # Calculate volume progress statistics
+            volume_progress = calculate_volume_progress(exercise_progress)
         
-        # Calculate volume progress statistics
-        volume_progress = calculate_volume_progress(exercise_progress)
-    
-    # Get workout suggestion for today
-    suggested_workout = suggest_workout(request.user)
+        return render_to_string('workout_app/exercise_progress.html', {
+            'selected_exercise_id': selected_exercise_id,
+            'selected_exercise': selected_exercise,
+            'time_period': time_period,
+            'progress_bucket': progress_bucket,
+            'exercise_progress': exercise_progress,
+            'volume_progress': volume_progress
+        })
+    
+    # The progress table is only rebuilt when the user's data changes
+    exercise_progress_html = get_user_fragment(
+        request.user, 'exercise_progress', render_exercise_progress,
+        selected_exercise.id if selected_exercise else bool(selected_exercise_id), time_period, progress_bucket
+    )
+    
+    # Get ranked workout suggestions for today
+    suggestions = get_cached_workout_suggestions(request.user)
     
     context = {
         'user_stats': user_stats,
+        'stats_job': stats_job,
         'time_period': time_period,
         'bmi': bmi,
         'bmi_category': bmi_category,
         'exercises': exercises,
         'selected_exercise_id': selected_exercise_id,
-        'exercise_progress': exercise_progress,
-        'volume_progress': volume_progress,
-        'suggested_workout': suggested_workout
+        'selected_exercise': selected_exercise,
+        'progress_bucket': progress_bucket,
+        'exercise_progress_html': exercise_progress_html,
+        'suggested_workout': suggestions[0] if suggestions else None,
+        'other_suggestions': suggestions[1:]
     }
     
-    return render(request, 'workout_app/advanced_stats.html', context)
\ No newline at end of file
+    return render(request, 'workout_app/advanced_stats.html', context)
+
+@login_required
+@query_budget(4)
+def workout_suggestions(request):
+    """API view returning today's ranked workout suggestions"""
+    limit = request.GET.get('limit', '3')
+    limit = min(int(limit), 20) if limit.isdigit() and int(limit) > 0 else 3
+    
+    return JsonResponse({
+        'suggestions': [
+            {
+                'workout_day_id': suggestion['workout_day'].pk,
+                'day_name': suggestion['workout_day'].day_name,
+                'plan_id': suggestion['workout_day'].plan_id,
+                'plan_name': suggestion['workout_day'].plan.name,
+                'score': suggestion['score'],
+                'reasons': suggestion['reasons'],
+                'start_url': reverse('start_workout_day', args=[suggestion['workout_day'].pk])
+            }
+            for suggestion in rank_workout_suggestions(request.user, limit=limit)
+        ]
+    })
+
+@login_required
+@query_budget(4)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_data_etag)
+def workout_distribution_data(request):
+    """API view returning the workouts-per-weekday chart series"""
+    payload = cached_for_user(
+        request.user, 'chart:workout_distribution', lambda: workout_distribution_chart(request.user)
+    )
+    return JsonResponse(payload, json_dumps_params={'separators': (',', ':')})
+
+@login_required
+@query_budget(4)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_data_etag)
+def exercise_progress_data(request):
+    """API view returning an exercise's volume and max weight chart series, downsampled for long ranges"""
+    exercise_id = request.GET.get('exercise', '')
+    period = request.GET.get('period', '30')
+    points = request.GET.get('points', str(CHART_MAX_POINTS))
+    if not (exercise_id.isdigit() and period.isdigit() and points.isdigit()):
+        return JsonResponse({'status': 'error', 'message': 'Invalid chart parameters'}, status=400)
+    
+    bucket = request.GET.get('bucket')
+    if bucket not in ('week', 'month'):
+        bucket = None
+    points = min(max(int(points), CHART_POINT_LIMITS[0]), CHART_POINT_LIMITS[1])
+    period = min(max(int(period), CHART_PERIOD_LIMITS[0]), CHART_PERIOD_LIMITS[1])
+    
+    payload = cached_for_user(
+        request.user, 'chart:exercise_progress',
+        lambda: exercise_progress_chart(request.user, int(exercise_id), period, bucket, points),
+        int(exercise_id), period, bucket, points
+    )
+    return JsonResponse(payload, json_dumps_params={'separators': (',', ':')})
+
+@login_required
+def export_history(request):
+    """View streaming the user's complete training history as CSV or NDJSON"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported export format '{export_format}'")
+    
+    # The export queries run while the response is streamed, after the view returns,
+    # so a query budget here would measure nothing.
+    # ASGI servers need an async iterator, or Django buffers the whole export first.
+    export = astream_export if isinstance(request, ASGIRequest) else stream_export
+    response = StreamingHttpResponse(
+        export(request.user, export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    filename = f"workout-history-{timezone.now().date().isoformat()}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+def import_history(request):
+    """Import an uploaded training history file"""
+    if request.method != 'POST':
+        return redirect('settings')
+    
+    form = ImportHistoryForm(request.POST, request.FILES)
+    if not form.is_valid():
+        for field, errors in form.errors.items():
+            for error in errors:
+                messages.error(request, f"{field}: {error}")
+        return redirect('settings')
+    
+    # Decode the upload line by line instead of reading it into memory
+    lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+    report = import_history_file(request.user, lines, form.cleaned_data['format'])
+    
+    messages.success(
+        request,
+        f"Imported {report['workouts']} workouts with {report['exercise_logs']} exercises and {report['sets']} sets."
+    )
+    if report['existing_workouts']:
+        messages.info(request, f"Skipped {report['existing_workouts']} workouts that were already logged.")
+    for error in report['errors'][:10]:
+        line = f"line {error['line']}" if error['line'] else 'unknown line'
+        messages.warning(request, f"Batch {error['batch']}, {line}: {error['error']}")
+    if report['error_count'] > 10:
+        messages.warning(request, f"{report['error_count'] - 10} more rows could not be imported.")
+    
+    return redirect('settings')
+
+@login_required
+@query_budget(3)
+def job_status(request, pk):
+    """API view returning the status of one of the user's background jobs"""
+    job = get_object_or_404(BackgroundJob, pk=pk, user=request.user)
+    
+    return JsonResponse({
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'result': job.result if job.status == BackgroundJob.SUCCEEDED else None
+    })
\ No newline at end of file
@@ -7,16 +7,33 @@ Functions include:
 - Date and time conversion helpers
 - Progress calculation
 - Workout suggestion algorithms
+- Workout history pagination
+- Daily activity rollup maintenance
+
+Query-backed helpers that templates and views call repeatedly are memoized
+per request with request_memoize.
 """
 
-import json
 import datetime
+from itertools import zip_longest
 from django.utils import timezone
-from django.db.models import Avg, Sum, Count, Max
-from .models import WorkoutLog, ExerciseLog, WorkoutPlan, WorkoutDay, UserProfile
+from django.db import transaction
+from django.db.models import Sum, Count, Max, Q, F, Prefetch, FloatField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncWeek, TruncMonth
+from .models import (
+    WorkoutLog,
+    ExerciseLog,
+    ExerciseSet,
+    WorkoutDay,
+    UserProfile,
+    DailyActivity,
+    DailyExerciseActivity
+)
+from .memo import request_memoize
 
 # ===== Workout Statistics Functions =====
 
+@request_memoize
 def get_user_stats(user, days=30):
     """
     Get comprehensive workout statistics for a user over a specified period.
@@ -32,33 +49,38 @@ def get_user_stats(user, days=30):
     end_date = timezone.now().date()
     start_date = end_date - datetime.timedelta(days=days)
     
-    # Get relevant workout logs
-    logs = WorkoutLog.objects.filter(
+    # Read from the daily rollup so cost depends on days in the window, not on log volume
+    activity = DailyActivity.objects.filter(
         user=user,
         date__gte=start_date,
-        date__lte=end_date,
-        completed=True
+        date__lte=end_date
     )
     
     # Calculate basic stats
-    total_workouts = logs.count()
-    total_duration = logs.aggregate(Sum('duration'))['duration__sum'] or 0
-    avg_duration = logs.aggregate(Avg('duration'))['duration__avg'] or 0
+    totals = activity.aggregate(
+        total_workouts=Sum('workouts_completed'),
+        total_duration=Sum('total_duration')
+    )
+    total_workouts = totals['total_workouts'] or 0
+    total_duration = totals['total_duration'] or 0
+    avg_duration = total_duration / total_workouts if total_workouts > 0 else 0
     
     # Calculate current streak
     streak = calculate_streak(user)
     
     # Calculate most used exercises
-    exercise_logs = ExerciseLog.objects.filter(workout_log__in=logs)
-    exercise_counts = exercise_logs.values('exercise__name').annotate(
-        count=Count('exercise__name')
+    exercise_counts = DailyExerciseActivity.objects.filter(
+        user=user,
+        date__gte=start_date,
+        date__lte=end_date
+    ).values('exercise_id', 'exercise__name').annotate(
+        count=Sum('times_logged')
     ).order_by('-count')[:5]
     
     # Get day with most workouts
-    day_distribution = logs.values('date__week_day').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    most_active_day = day_distribution.first() if day_distribution.exists() else None
+    most_active_day = activity.values('date__week_day').annotate(
+        count=Sum('workouts_completed')
+    ).order_by('-count').first()
     
     if most_active_day:
         most_active_day = get_day_name(most_active_day['date__week_day'])
@@ -74,9 +96,64 @@ def get_user_stats(user, days=30):
         'workout_frequency': round(total_workouts / days * 7, 1) if total_workouts > 0 else 0  # Weekly frequency
     }
 
+def get_progress_summary(user):
+    """
+    Get the progress page statistics for a user in a fixed number of queries.
+    
+    Weekly, monthly and all-time counts, total duration and the weekday
+    distribution are computed together with conditional aggregation over
+    the daily rollup, so no rows are pulled into Python and the query count
+    does not grow with the number of figures returned.
+    
+    Args:
+        user: The User object
+        
+    Returns:
+        dict: Dictionary containing the progress statistics
+    """
+    today = timezone.now().date()
+    start_of_week = today - datetime.timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    days_of_week = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    # Sums over no rows are NULL, so each figure defaults to 0
+    aggregates = {
+        'workouts_this_week': Coalesce(Sum('workouts_completed', filter=Q(date__gte=start_of_week)), 0),
+        'workouts_this_month': Coalesce(Sum('workouts_completed', filter=Q(date__gte=start_of_month)), 0),
+        'total_workouts': Coalesce(Sum('workouts_completed'), 0),
+        'total_duration': Coalesce(Sum('total_duration'), 0),
+    }
+    for day in days_of_week:
+        aggregates[day] = Coalesce(Sum('workouts_completed', filter=Q(date__week_day=get_weekday_number(day))), 0)
+    
+    totals = DailyActivity.objects.filter(user=user).aggregate(**aggregates)
+    
+    total_workouts = totals['total_workouts']
+    total_duration = totals['total_duration']
+    
+    # Get most common workout
+    most_common = WorkoutLog.objects.filter(user=user).values('workout_day__day_name').annotate(
+        count=Count('id')
+    ).order_by('-count').first()
+    
+    return {
+        'workouts_this_week': totals['workouts_this_week'],
+        'workouts_this_month': totals['workouts_this_month'],
+        'total_workouts': total_workouts,
+        'total_duration': total_duration,
+        'avg_duration': total_duration / total_workouts if total_workouts > 0 else 0,
+        'most_common_workout': most_common['workout_day__day_name'] if most_common else None,
+        'workout_distribution': [totals[day] for day in days_of_week]
+    }
+
+@request_memoize
 def calculate_streak(user):
     """
-    Calculate the current workout streak (consecutive days) for a user.
+    Get the current workout streak (consecutive days) for a user.
+    
+    This is the single canonical streak reading. It uses the streak state
+    stored on the user profile, so it costs no queries beyond loading the
+    profile. A streak stays alive until a full day passes without a workout.
     
     Args:
         user: The User object
@@ -84,58 +161,282 @@ def calculate_streak(user):
     Returns:
         int: Number of consecutive days with completed workouts
     """
-    logs = WorkoutLog.objects.filter(
-        user=user,
-        completed=True
-    ).order_by('-date')
+    try:
+        profile = user.profile
+    except UserProfile.DoesNotExist:
+        # Users created without a profile (e.g. by createsuperuser) have no streak yet
+        return 0
     
-    if not logs.exists():
+    if not profile.last_workout_date:
         return 0
     
-    streak = 1
     today = timezone.now().date()
+    if (today - profile.last_workout_date).days > 1:
+        # No workout yesterday or today = no current streak
+        return 0
+    
+    return profile.current_streak
+
+def update_streak(user, workout_date):
+    """
+    Update the stored streak after a workout on the given date is completed.
     
-    # Check if there's a workout today
-    has_workout_today = logs.filter(date=today).exists()
+    Completing a workout on the latest or the following day is O(1). A
+    workout completed for an earlier date falls back to rebuild_streak.
     
-    if not has_workout_today:
-        # If no workout today, check if there was one yesterday to maintain streak
-        yesterday = today - datetime.timedelta(days=1)
-        has_workout_yesterday = logs.filter(date=yesterday).exists()
-        
-        if not has_workout_yesterday:
-            # No workout yesterday or today = no current streak
-            return 0
-    
-    # Start from the most recent workout date
-    current_date = logs.first().date
-    expected_date = current_date
-    
-    for log in logs:
-        if log.date == expected_date or log.date == expected_date - datetime.timedelta(days=1):
-            if log.date != expected_date:
-                # Move to the next expected date
-                expected_date = log.date
-            # Valid streak day, continue counting
-            if log.date != current_date:  # Avoid counting duplicate workouts on the same day
-                streak += 1
-                current_date = log.date
+    Args:
+        user: The User object
+        workout_date: Date of the completed workout
+    """
+    profile = get_user_profile(user)
+    last_date = profile.last_workout_date
+    
+    if last_date is not None and workout_date < last_date:
+        rebuild_streak(user)
+        return
+    
+    if last_date == workout_date:
+        profile.current_streak = max(profile.current_streak, 1)
+    elif last_date is not None and workout_date - last_date == datetime.timedelta(days=1):
+        profile.current_streak += 1
+    else:
+        profile.current_streak = 1
+    
+    profile.longest_streak = max(profile.longest_streak, profile.current_streak)
+    profile.last_workout_date = workout_date
+    profile.save(update_fields=['current_streak', 'longest_streak', 'last_workout_date'])
+
+def rebuild_streak(user):
+    """
+    Recompute the stored streak state for a user from their workout history.
+    
+    Args:
+        user: The User object
+    """
+    profile = get_user_profile(user)
+    current = longest = 0
+    last_date = None
+    
+    dates = WorkoutLog.objects.filter(
+        user=user,
+        completed=True
+    ).order_by('date').values_list('date', flat=True).distinct()
+    
+    for date in dates.iterator():
+        if last_date is not None and date - last_date == datetime.timedelta(days=1):
+            current += 1
         else:
-            # Streak is broken
-            break
+            current = 1
+        longest = max(longest, current)
+        last_date = date
+    
+    profile.current_streak = current
+    profile.longest_streak = longest
+    profile.last_workout_date = last_date
+    profile.save(update_fields=['current_streak', 'longest_streak', 'last_workout_date'])
+
+# ===== Rollup Functions =====
+
+def refresh_daily_activity(user, dates=None):
+    """
+    Recompute the daily activity rollup for a user from the raw logs.
+    
+    Only the raw logs of the affected days are read, so this is cheap enough
+    to call whenever a workout is completed or removed.
     
-    return streak
+    Args:
+        user: The User object
+        dates: Iterable of dates to recompute (default None rebuilds every day)
+    """
+    logs = WorkoutLog.objects.filter(user=user, completed=True)
+    activity = DailyActivity.objects.filter(user=user)
+    exercise_activity = DailyExerciseActivity.objects.filter(user=user)
+    
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return
+        logs = logs.filter(date__in=dates)
+        activity = activity.filter(date__in=dates)
+        exercise_activity = exercise_activity.filter(date__in=dates)
+    
+    day_totals = logs.values('date').annotate(
+        workouts=Count('id', distinct=True),
+        duration=Sum('duration')
+    ).order_by()
+    exercise_totals = ExerciseLog.objects.filter(workout_log__in=logs).values(
+        'workout_log__date', 'exercise_id'
+    ).annotate(count=Count('id')).order_by()
+    
+    exercise_rows = [
+        DailyExerciseActivity(
+            user=user,
+            date=row['workout_log__date'],
+            exercise_id=row['exercise_id'],
+            times_logged=row['count']
+        )
+        for row in exercise_totals
+    ]
+    exercises_per_day = {}
+    for row in exercise_rows:
+        exercises_per_day[row.date] = exercises_per_day.get(row.date, 0) + row.times_logged
+    
+    with transaction.atomic():
+        activity.delete()
+        exercise_activity.delete()
+        DailyActivity.objects.bulk_create([
+            DailyActivity(
+                user=user,
+                date=row['date'],
+                workouts_completed=row['workouts'],
+                total_duration=row['duration'] or 0,
+                exercises_logged=exercises_per_day.get(row['date'], 0)
+            )
+            for row in day_totals
+        ], batch_size=1000)
+        DailyExerciseActivity.objects.bulk_create(exercise_rows, batch_size=1000)
+
+# ===== Workout Logging Functions =====
+
+def complete_workout(workout_log, exercise_entries, duration):
+    """
+    Record the results of a workout session and mark it completed.
+    
+    All writes happen in one transaction with a fixed number of statements,
+    however many exercises or sets were submitted. Entries must already be
+    validated.
+    
+    Args:
+        workout_log: WorkoutLog being completed
+        exercise_entries: List of (ExerciseLog, dict) pairs, the dict holding
+            sets_completed, reps_completed, weight_used and notes
+        duration: Workout duration
+    """
+    exercise_logs = []
+    exercise_sets = []
+    for exercise_log, entry in exercise_entries:
+        exercise_log.sets_completed = entry['sets_completed']
+        exercise_log.notes = entry['notes']
+        exercise_logs.append(exercise_log)
+        exercise_sets.extend(build_exercise_sets(exercise_log, entry['reps_completed'], entry['weight_used']))
+    
+    with transaction.atomic():
+        if exercise_logs:
+            ExerciseLog.objects.bulk_update(exercise_logs, ['sets_completed', 'notes'])
+        
+        # Replace any sets recorded by an earlier submission of this session
+        ExerciseSet.objects.filter(exercise_log__workout_log=workout_log).delete()
+        ExerciseSet.objects.bulk_create(exercise_sets)
+        
+        workout_log.completed = True
+        workout_log.duration = duration
+        workout_log.save(update_fields=['completed', 'duration'])
+        
+        # Keep the daily activity rollup and streak in step with the raw logs
+        refresh_daily_activity(workout_log.user, [workout_log.date])
+        update_streak(workout_log.user, workout_log.date)
+
+def autosave_workout_sets(workout_log, sets, notes=None):
+    """
+    Save sets of an in-progress workout session as they are completed.
+    
+    Sets are upserted on (exercise log, set number) in one statement, so
+    resending a set after a dropped connection overwrites it instead of
+    adding a duplicate. Entries must already be validated and belong to the
+    session.
+    
+    Args:
+        workout_log: WorkoutLog of the session
+        sets: List of dicts with exercise_log, set_number, reps and weight
+        notes: Optional dict mapping exercise log ids to their notes
+        
+    Returns:
+        int: Number of sets saved
+    """
+    exercise_sets = {
+        (entry['exercise_log'], entry['set_number']): ExerciseSet(
+            exercise_log_id=entry['exercise_log'],
+            set_number=entry['set_number'],
+            reps=entry['reps'],
+            weight=entry['weight']
+        )
+        for entry in sets
+    }
+    
+    with transaction.atomic():
+        if exercise_sets:
+            # Within one batch the last value sent for a set wins
+            ExerciseSet.objects.bulk_create(
+                list(exercise_sets.values()),
+                update_conflicts=True,
+                unique_fields=['exercise_log', 'set_number'],
+                update_fields=['reps', 'weight']
+            )
+        if notes:
+            ExerciseLog.objects.bulk_update(
+                [ExerciseLog(pk=pk, notes=text) for pk, text in notes.items()],
+                ['notes']
+            )
+    
+    return len(exercise_sets)
+
+def finalize_workout(workout_log, duration):
+    """
+    Complete a workout session whose sets were autosaved.
+    
+    Each exercise's sets_completed is set to its number of sets with reps
+    in a single UPDATE. A session that is already completed, by this or the
+    form path, is left untouched.
+    
+    Args:
+        workout_log: WorkoutLog being completed, with user and profile loaded
+        duration: Workout duration in minutes
+        
+    Returns:
+        bool: False if the session was already completed
+    """
+    completed_sets = ExerciseSet.objects.filter(
+        exercise_log=OuterRef('pk'),
+        reps__gt=0
+    ).order_by().values('exercise_log').annotate(count=Count('id')).values('count')
+    
+    with transaction.atomic():
+        # Lock the session so concurrent finalizes complete it only once
+        if not WorkoutLog.objects.select_for_update().filter(pk=workout_log.pk, completed=False).exists():
+            return False
+        
+        ExerciseLog.objects.filter(workout_log=workout_log).update(
+            sets_completed=Coalesce(Subquery(completed_sets), 0)
+        )
+        
+        workout_log.completed = True
+        workout_log.duration = duration
+        workout_log.save(update_fields=['completed', 'duration'])
+        
+        refresh_daily_activity(workout_log.user, [workout_log.date])
+        update_streak(workout_log.user, workout_log.date)
+    
+    return True
 
 # ===== Progress Tracking Functions =====
 
-def get_exercise_progress(user, exercise_id, days=90):
+PROGRESS_BUCKETS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+def get_exercise_progress(user, exercise_id, days=90, bucket=None):
     """
     Get progress data for a specific exercise over time.
     
+    Volume, max weight, set count and total reps are aggregated in a single
+    query, either per session or bucketed by week or month.
+    
     Args:
         user: The User object
         exercise_id: ID of the exercise to track
         days: Number of days to look back (default 90)
+        bucket: None for one entry per session, or 'week' / 'month'
         
     Returns:
         list: List of dictionaries with date and performance data
@@ -143,44 +444,34 @@ def get_exercise_progress(user, exercise_id, days=90):
     end_date = timezone.now().date()
     start_date = end_date - datetime.timedelta(days=days)
     
-    # Get all logs for this exercise
     logs = ExerciseLog.objects.filter(
         workout_log__user=user,
         exercise_id=exercise_id,
         workout_log__date__gte=start_date,
         workout_log__completed=True
-    ).order_by('workout_log__date')
-    
-    progress_data = []
-    
-    for log in logs:
-        # Parse JSON data from string fields
-        try:
-            reps = json.loads(log.reps_completed) if log.reps_completed else []
-            weights = json.loads(log.weight_used) if log.weight_used else []
-        except json.JSONDecodeError:
-            # Handle case where data isn't valid JSON
-            reps = [0] * log.sets_completed
-            weights = [0] * log.sets_completed
-        
-        # Calculate volume (weight × reps)
-        volume = sum(r * w for r, w in zip(reps, weights)) if reps and weights else 0
-        
-        # Get max weight used
-        max_weight = max(weights) if weights else 0
-        
-        # Add data point
-        progress_data.append({
-            'date': log.workout_log.date,
-            'sets': log.sets_completed,
-            'reps': reps,
-            'weights': weights,
-            'volume': volume,
-            'max_weight': max_weight,
-            'notes': log.notes
-        })
+    )
+    aggregates = {
+        'volume': Coalesce(Sum(F('sets__reps') * F('sets__weight')), 0.0, output_field=FloatField()),
+        'max_weight': Coalesce(Max('sets__weight'), 0.0, output_field=FloatField()),
+        'set_count': Count('sets'),
+        'total_reps': Coalesce(Sum('sets__reps'), 0),
+    }
     
-    return progress_data
+    if bucket in PROGRESS_BUCKETS:
+        # One row per week/month, with the number of sessions in it
+        return list(logs.values(
+            date=PROGRESS_BUCKETS[bucket]('workout_log__date')
+        ).annotate(
+            sessions=Count('id', distinct=True),
+            **aggregates
+        ).order_by('date'))
+    
+    return list(logs.values(
+        'id',
+        'sets_completed',
+        'notes',
+        date=F('workout_log__date')
+    ).annotate(**aggregates).order_by('date', 'id'))
 
 def calculate_volume_progress(progress_data, window=3):
     """
@@ -234,6 +525,78 @@ def calculate_volume_progress(progress_data, window=3):
 
 # ===== Recommendation Functions =====
 
+SUGGESTION_RECENCY_DAYS = 14  # Days after which a workout counts as fully "due"
+SUGGESTION_WEEKDAY_WINDOW = 180  # Days of history used for weekday habits
+
+@request_memoize
+def rank_workout_suggestions(user, limit=3):
+    """
+    Rank the user's workout days as suggestions for today.
+    
+    Each day is scored on recency (days since it was last completed, capped at
+    SUGGESTION_RECENCY_DAYS), boosted by how often it is done on today's weekday.
+    Everything is computed from one grouped query, whatever the number of plans.
+    
+    Args:
+        user: The User object
+        limit: Number of suggestions to return (default 3)
+        
+    Returns:
+        list: Dicts with workout_day, score, reasons and reason (the main
+              reason), best suggestion first; empty if the user has no days
+    """
+    today = timezone.now().date()
+    weekday = get_django_weekday(today)
+    completed = Q(workoutlog__completed=True)
+    
+    days = list(WorkoutDay.objects.filter(plan__user=user).select_related('plan').annotate(
+        last_done=Max('workoutlog__date', filter=completed),
+        weekday_count=Count('workoutlog', filter=completed & Q(
+            workoutlog__date__week_day=weekday,
+            workoutlog__date__gte=today - datetime.timedelta(days=SUGGESTION_WEEKDAY_WINDOW),
+            workoutlog__date__lt=today
+        ))
+    ).order_by('plan_id', 'id'))
+    
+    if not days:
+        return []
+    
+    top_weekday_count = max(day.weekday_count for day in days)
+    suggestions = []
+    for day in days:
+        reasons = []
+        
+        if day.last_done is None:
+            recency = 1.0
+            reasons.append('You haven\'t done this workout yet.')
+        else:
+            days_since = (today - day.last_done).days
+            recency = min(days_since, SUGGESTION_RECENCY_DAYS) / SUGGESTION_RECENCY_DAYS
+            if days_since == 0:
+                reasons.append('Already done today.')
+            elif days_since == 1:
+                reasons.append('Last done yesterday.')
+            else:
+                reasons.append(f'You haven\'t done this workout in {days_since} days.')
+        
+        habit = day.weekday_count / top_weekday_count if top_weekday_count else 0
+        if day.weekday_count and day.weekday_count == top_weekday_count:
+            # Lead with the habit when this is the usual workout for today
+            reasons.insert(0, f'You often do this workout on {get_day_name(weekday)}.')
+        
+        suggestions.append({
+            'workout_day': day,
+            # Habit boosts days that are due; a day done today is never boosted
+            'score': round(recency * (1 + habit), 3),
+            'reasons': reasons,
+            'reason': reasons[0]
+        })
+    
+    # Stable sort keeps plan/day order for equal scores
+    suggestions.sort(key=lambda suggestion: -suggestion['score'])
+    return suggestions[:limit]
+
+@request_memoize
 def suggest_workout(user):
     """
     Suggest a workout for today based on user's history and patterns.
@@ -242,70 +605,111 @@ def suggest_workout(user):
         user: The User object
         
     Returns:
-        dict: Suggested workout information or None if no plans exist
+        dict: Best suggestion from rank_workout_suggestions or None if no plans exist
+    """
+    suggestions = rank_workout_suggestions(user, limit=1)
+    return suggestions[0] if suggestions else None
+
+# ===== History Functions =====
+
+HISTORY_PAGE_SIZE = 20
+
+def encode_history_cursor(workout_log):
+    """
+    Build the keyset cursor pointing just after a workout log.
+    
+    Args:
+        workout_log: The last WorkoutLog on the current page
+        
+    Returns:
+        str: Cursor in the form "YYYY-MM-DD_<id>"
+    """
+    return f"{workout_log.date.isoformat()}_{workout_log.pk}"
+
+def decode_history_cursor(cursor):
     """
-    # Get all user's workout plans
-    plans = WorkoutPlan.objects.filter(user=user)
+    Parse a keyset cursor produced by encode_history_cursor.
     
-    if not plans.exists():
+    Args:
+        cursor: Cursor string from the request
+        
+    Returns:
+        tuple: (date, id) or None if the cursor is missing or invalid
+    """
+    if not cursor:
         return None
     
-    # Get recent workout logs
-    recent_logs = WorkoutLog.objects.filter(
-        user=user,
-        completed=True
-    ).order_by('-date')[:5]
-    
-    # Check what was done recently to avoid repetition
-    recent_day_ids = [log.workout_day_id for log in recent_logs]
-    
-    # Get all workout days, excluding recently completed ones if possible
-    all_days = WorkoutDay.objects.filter(plan__in=plans)
-    available_days = all_days.exclude(id__in=recent_day_ids) if recent_day_ids and len(all_days) > len(recent_day_ids) else all_days
-    
-    if not available_days.exists():
-        # If all workouts were recently completed, suggest the least recently completed
-        if recent_logs.exists():
-            return {
-                'workout_day': recent_logs.last().workout_day,
-                'reason': 'All workouts completed recently. This is the least recent one.'
-            }
-        else:
-            # If no workout logs exist, suggest the first available workout day
-            return {
-                'workout_day': all_days.first(),
-                'reason': 'No recent workouts. Try this one to get started.'
-            }
+    try:
+        date_part, id_part = cursor.split('_', 1)
+        cursor_date, cursor_id = datetime.date.fromisoformat(date_part), int(id_part)
+    except ValueError:
+        return None
     
-    # Check if there's a pattern of working out on this day of the week
-    today_weekday = timezone.now().date().weekday()
+    # Ids outside the primary key range would make the database reject the query
+    if not 0 < cursor_id < 2 ** 63:
+        return None
+    return cursor_date, cursor_id
+
+def get_workout_history_page(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    Get one page of a user's workout history using (date, id) keyset pagination.
     
-    # Find workouts done on this day of the week
-    same_weekday_logs = WorkoutLog.objects.filter(
-        user=user,
-        date__week_day=today_weekday + 2,  # Django uses 1-7 where 1=Sunday, so add 2 to 0-based weekday
-        completed=True
-    ).values('workout_day').annotate(count=Count('workout_day')).order_by('-count')
+    Each page costs the same fixed number of queries regardless of how much
+    history lies before it, unlike OFFSET pagination.
     
-    if same_weekday_logs.exists():
-        # Get the most frequently done workout on this day of the week
-        frequent_day_id = same_weekday_logs.first()['workout_day']
-        frequent_day = WorkoutDay.objects.get(id=frequent_day_id)
+    Args:
+        user: The User object
+        cursor: Cursor returned with the previous page (None for the first page)
+        page_size: Number of workout logs per page (default 20)
         
-        if frequent_day_id not in recent_day_ids:
-            return {
-                'workout_day': frequent_day,
-                'reason': f'You often do this workout on {get_day_name(today_weekday + 2)}.'
-            }
+    Returns:
+        dict: Workout logs for the page, the next cursor and whether more exist
+    """
+    exercise_logs = ExerciseLog.objects.select_related('exercise').prefetch_related(
+        Prefetch('sets', queryset=ExerciseSet.objects.order_by('set_number'))
+    ).order_by('id')
+    logs = WorkoutLog.objects.filter(user=user).select_related(
+        'workout_plan', 'workout_day'
+    ).prefetch_related(
+        Prefetch('exercise_logs', queryset=exercise_logs)
+    )
+    
+    position = decode_history_cursor(cursor)
+    if position:
+        cursor_date, cursor_id = position
+        logs = logs.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+    
+    # Fetch one extra row to know whether another page exists
+    page = list(logs.order_by('-date', '-id')[:page_size + 1])
+    has_more = len(page) > page_size
+    page = page[:page_size]
     
-    # Default: suggest a workout that hasn't been done recently
     return {
-        'workout_day': available_days.first(),
-        'reason': 'You haven\'t done this workout recently.'
+        'logs': page,
+        'next_cursor': encode_history_cursor(page[-1]) if has_more else None,
+        'has_more': has_more
     }
 
 # ===== Helper Functions =====
 
+def get_user_profile(user):
+    """
+    Get a user's profile, creating it for users that were made without one.
+    
+    Args:
+        user: The User object
+        
+    Returns:
+        UserProfile: The user's profile
+    """
+    try:
+        return user.profile
+    except UserProfile.DoesNotExist:
+        # e.g. accounts created with createsuperuser or in the admin
+        profile, _created = UserProfile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
+
 def get_day_name(weekday_number):
     """
     Convert Django's weekday number to day name.
@@ -327,26 +731,56 @@ def get_day_name(weekday_number):
     }
     return days.get(weekday_number, 'Unknown')
 
-def parse_reps_or_weights(data_string):
+def get_django_weekday(date):
     """
-    Safely parse JSON string of reps or weights from ExerciseLog.
+    Get Django's weekday number (1=Sunday, 2=Monday, etc.) for a date.
     
     Args:
-        data_string: JSON string to parse
+        date: Date object
         
     Returns:
-        list: Parsed data or empty list if invalid
+        int: Weekday number as used by the __week_day lookup
     """
-    if not data_string:
-        return []
+    # date.weekday() is 0=Monday .. 6=Sunday
+    return (date.weekday() + 1) % 7 + 1
+
+def get_weekday_number(day_name):
+    """
+    Convert day name to Django's weekday number.
     
-    try:
-        data = json.loads(data_string)
-        if isinstance(data, list):
-            return data
-        return []
-    except json.JSONDecodeError:
-        return []
+    Args:
+        day_name: Day name (e.g. 'Monday')
+        
+    Returns:
+        int: Django weekday number (1=Sunday, 2=Monday, etc.), Sunday if invalid
+    """
+    days = {
+        'Sunday': 1,
+        'Monday': 2,
+        'Tuesday': 3,
+        'Wednesday': 4,
+        'Thursday': 5,
+        'Friday': 6,
+        'Saturday': 7
+    }
+    return days.get(day_name, 1)
+
+def build_exercise_sets(exercise_log, reps, weights):
+    """
+    Build unsaved per-set rows for an exercise log from parallel reps/weights lists.
+    
+    Args:
+        exercise_log: ExerciseLog the sets belong to
+        reps: List of reps per set
+        weights: List of weights per set (kg)
+        
+    Returns:
+        list: Unsaved ExerciseSet objects numbered from 1
+    """
+    return [
+        ExerciseSet(exercise_log=exercise_log, set_number=index, reps=rep_count, weight=weight)
+        for index, (rep_count, weight) in enumerate(zip_longest(reps, weights, fillvalue=0), start=1)
+    ]
 
 def format_duration(minutes):
     """